@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Batch Content Analysis - Content Intelligence Platform
+Streams content items through a bounded pool of async workers and writes
+results incrementally to JSONL, resuming from previous output on restart.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from brand_safety_filter import BrandSafetyPrefilter
+from content_routing import RoutingPlan, plan_content_analysis
+from text_metrics import compute_text_metrics
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.rate_limiter import PRIORITY_BATCH, rate_limit_priority
+
+AnalyzeFn = Callable[[Dict[str, Any], RoutingPlan], Awaitable[str]]
+
+
+def read_items(source: Union[str, os.PathLike, Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Yield content items from a JSONL file path or any iterable of dicts
+
+    Each item needs `content` and may carry `id` and `content_type`. Items
+    without an id get a stable one derived from their content so that
+    checkpointing still works across restarts. An unparseable line, a line
+    that is not an object or an item without text content is yielded with an
+    `error` instead of stopping the batch.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        def _lines():
+            with open(source, "r", encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield {"id": f"line-{number}", "error": f"JSONDecodeError: {e}"}
+                        continue
+                    if not isinstance(item, dict):
+                        yield {"id": f"line-{number}", "error": "item is not a JSON object"}
+                        continue
+                    yield item
+        iterable = _lines()
+    else:
+        iterable = source
+
+    for number, item in enumerate(iterable, 1):
+        if not isinstance(item, dict):
+            yield {"id": f"item-{number}", "content_type": "mixed", "error": "item is not a dict"}
+            continue
+        item = dict(item)
+        if "error" not in item and not isinstance(item.get("content"), str):
+            item["error"] = "missing content" if "content" not in item else "content is not a string"
+        if "id" not in item:
+            key = item["content"] if "error" not in item else json.dumps(item, sort_keys=True, default=str)
+            digest = hashlib.sha1(f"{item.get('content_type', '')}|{key}".encode("utf-8"))
+            item["id"] = digest.hexdigest()[:16]
+        item["id"] = str(item["id"])
+        item.setdefault("content_type", "mixed")
+        yield item
+
+
+def load_checkpoint(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """Return the ids already recorded in a results file"""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted run; the item is simply redone
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(str(record["id"]))
+    return done
+
+
+@dataclass
+class BatchStats:
+    """Counters for a batch run"""
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def items_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.processed} processed ({self.succeeded} ok, {self.failed} failed, "
+            f"{self.skipped} resumed, {self.retries} retries) in {self.elapsed:.1f}s "
+            f"- {self.items_per_second:.2f} items/s"
+        )
+
+
+class TeamAnalyzer:
+    """Default analyzer: one team per routed agent set, reused across items
+
+    A worker owns its analyzer, so a team is never run concurrently with itself.
+    Each item runs in its own session to keep team history from growing.
+    """
+
+    def __init__(self):
+        self._teams: Dict[Tuple[Tuple[str, ...], bool], Any] = {}
+
+    async def __call__(self, item: Dict[str, Any], plan: RoutingPlan) -> str:
+        from content_intelligence import build_analysis_query, create_content_intelligence_team
+
+        key = (tuple(plan.modalities), plan.needs_brand_safety_agent)
+        if key not in self._teams:
+            self._teams[key] = create_content_intelligence_team(
+                modalities=plan.modalities,
+                brand_safety=plan.needs_brand_safety_agent
+            )
+        query = build_analysis_query(item["content"], item["content_type"], plan, metrics=item.get("metrics"))
+        response = await self._teams[key].arun(query, session_id=f"batch_{item['id']}")
+        return response.content
+
+
+async def analyze_batch(
+    items: Union[str, os.PathLike, Iterable[Dict[str, Any]]],
+    output_path: str,
+    concurrency: int = 8,
+    max_retries: int = 3,
+    retry_backoff: float = 1.0,
+    analyzer_factory: Callable[[], AnalyzeFn] = TeamAnalyzer,
+    retry_failed: bool = False,
+    progress_every: int = 100,
+    prefilter: Optional[BrandSafetyPrefilter] = None,
+) -> BatchStats:
+    """Analyze a stream of content items with bounded concurrency
+
+    The input queue holds at most `2 * concurrency` items, so reading from a
+    large file or generator never runs ahead of the workers. Results are
+    appended to `output_path` as they complete; rerunning with the same output
+    file skips items that already have a result.
+    """
+    stats = BatchStats()
+    prefilter = prefilter or BrandSafetyPrefilter()
+    done = load_checkpoint(output_path, retry_failed=retry_failed)
+    pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def enqueue(chunk):
+        # Text metrics for a whole chunk are computed in one vectorized pass, off the event loop
+        metrics = await asyncio.to_thread(compute_text_metrics, [i["content"] for i in chunk])
+        for item, item_metrics in zip(chunk, metrics):
+            item["metrics"] = item_metrics
+            await pending.put(item)
+
+    async def produce():
+        source = read_items(items)
+        while True:
+            # File reads and JSON parsing also run in a thread, one chunk at a time
+            batch = await asyncio.to_thread(lambda: list(islice(source, concurrency)))
+            if not batch:
+                break
+            chunk = []
+            for item in batch:
+                if item["id"] in done:
+                    stats.skipped += 1
+                elif "error" in item:
+                    await results.put({"id": item["id"], "content_type": item["content_type"],
+                                       "status": "failed", "error": item["error"], "attempts": 0})
+                else:
+                    chunk.append(item)
+            if chunk:
+                await enqueue(chunk)
+        for _ in range(concurrency):
+            await pending.put(None)
+
+    async def work():
+        analyze = analyzer_factory()
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            plan = plan_content_analysis(item["content"], item["content_type"], prefilter=prefilter)
+            record = {
+                "id": item["id"],
+                "content_type": item["content_type"],
+                "modalities": plan.modalities,
+                "skipped_agents": list(plan.skipped),
+                "brand_safety": plan.safety.to_dict(),
+                "text_metrics": item["metrics"],
+            }
+            started = time.perf_counter()
+            for attempt in range(1, max_retries + 2):
+                try:
+                    # Batch items yield model capacity to interactive runs sharing the limiter
+                    with rate_limit_priority(PRIORITY_BATCH):
+                        record["result"] = await analyze(item, plan)
+                    record["status"] = "ok"
+                    break
+                except Exception as e:
+                    record["status"] = "failed"
+                    record["error"] = f"{type(e).__name__}: {e}"
+                    if attempt > max_retries:
+                        break
+                    stats.retries += 1
+                    await asyncio.sleep(retry_backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+            record["attempts"] = attempt
+            record["latency_s"] = round(time.perf_counter() - started, 3)
+            if record["status"] == "ok":
+                record.pop("error", None)
+            await results.put(record)
+
+    async def write():
+        with open(output_path, "a", encoding="utf-8") as f:
+            while True:
+                record = await results.get()
+                if record is None:
+                    return
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                if record["status"] == "ok":
+                    stats.succeeded += 1
+                else:
+                    stats.failed += 1
+                if progress_every and stats.processed % progress_every == 0:
+                    print(f"📦 {stats.summary()}")
+
+    writer = asyncio.create_task(write())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    await asyncio.gather(produce(), *workers)
+    await results.put(None)
+    await writer
+
+    stats.finished_at = time.perf_counter()
+    return stats
+
+
+def run_content_batch(items, output_path, **kwargs) -> BatchStats:
+    """Synchronous entry point for `analyze_batch`"""
+
+    print("🗂️ Starting Batch Content Analysis...")
+    print("=" * 60)
+
+    stats = asyncio.run(analyze_batch(items, output_path, **kwargs))
+
+    print("\n" + "=" * 60)
+    print(f"🎯 Batch Complete! {stats.summary()}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch content analysis to JSONL")
+    parser.add_argument("input", help="JSONL file of items with id, content and content_type")
+    parser.add_argument("output", help="JSONL results file (also used as the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--retry-failed", action="store_true", help="Redo items recorded as failed")
+    args = parser.parse_args()
+
+    run_content_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        retry_failed=args.retry_failed,
+    )
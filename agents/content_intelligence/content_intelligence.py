@@ -5,205 +5,112 @@ Simple local development version
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.reasoning import ReasoningTools
-from agno.tools.python import PythonTools
-from agno.storage.sqlite import SqliteStorage
+from content_routing import MODALITIES, plan_content_analysis
+from brand_safety_filter import BrandSafetyPrefilter
+from text_metrics import compute_text_metrics, format_metrics_for_prompt
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.platform_factory import PlatformFactory
+from shared.tracing import print_last_trace
 
 # Load environment variables
 load_dotenv()
 
-def create_content_intelligence_team():
-    """Create the content intelligence team with 7 specialized agents"""
-    
-    # Text Content Analyst
-    text_analyst = Agent(
-        name="Text Content Analyst",
-        role="Comprehensive text analysis for sentiment, themes, and quality",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            ReasoningTools(add_instructions=True),
-            PythonTools()
-        ],
-        instructions=[
-            "You are an expert in natural language processing and text analysis.",
-            "Analyze text content for sentiment, themes, readability, and engagement potential.",
-            "Detect language patterns, tone, and writing quality.",
-            "Identify key topics, entities, and semantic relationships.",
-            "Provide structured analysis with actionable insights."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Visual Content Specialist
-    vision_specialist = Agent(
-        name="Visual Content Specialist",
-        role="Advanced image and visual content analysis",
-        model=OpenAIChat(id="gpt-4o-mini"), 
-        tools=[
-            ReasoningTools(add_instructions=True),
-            PythonTools()
-        ],
-        instructions=[
-            "You are an expert in computer vision and visual content analysis.",
-            "Analyze images for objects, scenes, text, and visual quality.",
-            "Evaluate composition, color schemes, and aesthetic appeal.",
-            "Detect inappropriate content and brand safety issues.",
-            "Provide detailed visual analysis with quality scoring."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Audio Content Expert
-    audio_expert = Agent(
-        name="Audio Content Expert",
-        role="Audio content analysis and transcription",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            ReasoningTools(add_instructions=True),
-            PythonTools()
-        ],
-        instructions=[
-            "You are an expert in audio processing and speech analysis.",
-            "Analyze audio content for speech, music, and sound quality.",
-            "Perform transcription and sentiment analysis of spoken content.",
-            "Evaluate audio quality, clarity, and production value.",
-            "Detect background noise, music, and audio characteristics."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Video Content Analyzer
-    video_analyzer = Agent(
-        name="Video Content Analyzer",
-        role="Comprehensive video content analysis",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            ReasoningTools(add_instructions=True),
-            PythonTools()
-        ],
-        instructions=[
-            "You are an expert in video analysis and multimedia content.",
-            "Analyze video content for visual elements, audio, and overall quality.",
-            "Evaluate pacing, editing, and production quality.",
-            "Detect scenes, transitions, and content flow.",
-            "Provide comprehensive video analysis with engagement metrics."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Brand Safety Monitor
-    brand_safety_monitor = Agent(
-        name="Brand Safety Monitor",
-        role="Content safety and brand compliance assessment",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are an expert in brand safety and content compliance.",
-            "Assess content for brand safety, appropriateness, and compliance.",
-            "Detect potentially harmful, offensive, or inappropriate content.",
-            "Evaluate content against brand guidelines and standards.",
-            "Provide safety scores and risk assessments."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Engagement Predictor
-    engagement_predictor = Agent(
-        name="Engagement Predictor",
-        role="Predict content engagement and performance",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            ReasoningTools(add_instructions=True),
-            PythonTools()
-        ],
-        instructions=[
-            "You are an expert in content performance and audience engagement.",
-            "Analyze content for engagement potential across different platforms.",
-            "Predict likes, shares, comments, and overall reach.",
-            "Provide optimization recommendations for better performance.",
-            "Consider platform-specific engagement patterns and trends."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Content Intelligence Coordinator
-    intelligence_coordinator = Agent(
-        name="Content Intelligence Coordinator",
-        role="Synthesize multi-modal analysis into actionable insights",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are a content strategy expert coordinating multi-modal analysis.",
-            "Synthesize insights from text, visual, audio, and video analysis.",
-            "Provide comprehensive content intelligence reports.",
-            "Ensure all modalities are considered in the final assessment.",
-            "Deliver actionable recommendations for content optimization."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Create coordinated team
-    team = Team(
-        name="Content Intelligence Team",
-        mode="collaborate",
-        members=[text_analyst, vision_specialist, audio_expert, video_analyzer, brand_safety_monitor, engagement_predictor, intelligence_coordinator],
-        instructions=[
-            "Work together to provide comprehensive multi-modal content analysis.",
-            "Each agent should focus on their specialty while contributing to overall assessment.",
-            "Ensure thorough coverage of all content aspects and modalities.",
-            "Provide actionable insights for content optimization and strategy.",
-            "Maintain high standards for brand safety and content quality."
-        ],
-        storage=SqliteStorage(table_name="content_sessions", db_file="content_intelligence.db"),
-        show_tool_calls=True,
-        markdown=True,
-        debug_mode=True
-    )
-    
-    return team
+# Local brand safety pre-filter; only ambiguous items reach the Brand Safety Monitor
+brand_safety_prefilter = BrandSafetyPrefilter()
 
-def analyze_content(content_description, content_type="mixed"):
-    """Analyze multi-modal content"""
+# Specialist agent in content_intelligence.toml for each modality
+MODALITY_SPECIALISTS = {
+    "text": "text_analyst",
+    "visual": "vision_specialist",
+    "audio": "audio_expert",
+    "video": "video_analyzer",
+}
+
+def create_content_intelligence_team(modalities=None, brand_safety=True, profile=None):
+    """Create the content intelligence team with up to 7 specialized agents
+
+    Only the specialists for the given modalities are included; the engagement
+    and coordinator agents are always part of the team, and the brand safety
+    agent unless the pre-filter has already decided the item. Agents, team and
+    storage are defined in content_intelligence.toml.
+    """
     
-    team = create_content_intelligence_team()
+    modalities = set(modalities or MODALITIES)
+    members = [MODALITY_SPECIALISTS[m] for m in MODALITIES if m in modalities]
+    members += (["brand_safety_monitor"] if brand_safety else []) + ["engagement_predictor", "intelligence_coordinator"]
     
-    query = f"""
+    factory = PlatformFactory.for_script(__file__, profile=profile)
+    return factory.build_team(members, context={"modalities": ", ".join(sorted(modalities))})
+
+def build_analysis_query(content_description, content_type, plan, metrics=None):
+    """Build the team prompt for one content item, its routing plan and text metrics"""
+    
+    # Only ask for the sections the routed team can actually answer
+    sections = {
+        "text": "Text analysis: sentiment, themes, readability, quality",
+        "visual": "Visual analysis: objects, scenes, composition, aesthetic quality",
+        "audio": "Audio analysis: speech transcription, audio quality, characteristics",
+        "video": "Video analysis: pacing, editing, production quality",
+    }
+    if plan.needs_brand_safety_agent:
+        safety_section = "Brand safety assessment: appropriateness, compliance, risk factors"
+    else:
+        safety_section = (
+            f"Brand safety: already decided by the local pre-filter as {plan.safety.decision.upper()} "
+            f"({plan.safety.reason}); report this verdict as-is"
+        )
+    requested = [sections[m] for m in plan.modalities] + [
+        safety_section,
+        "Engagement prediction: potential performance across platforms",
+        "Content intelligence synthesis: overall assessment and optimization recommendations",
+    ]
+    requested_list = "\n    ".join(f"{i}. {item}" for i, item in enumerate(requested, 1))
+    
+    # Figures computed locally so agents don't spend a tool round-trip on them
+    metrics = metrics or compute_text_metrics([content_description])[0]
+    metrics_block = format_metrics_for_prompt(metrics).replace("\n", "\n    ")
+    
+    return f"""
     Conduct comprehensive multi-modal content analysis for:
     
     Content: {content_description}
     Type: {content_type}
+    Detected modalities: {', '.join(plan.modalities)}
+    
+    Precomputed text metrics:
+    {metrics_block}
     
     Please provide:
-    1. Text analysis (if applicable): sentiment, themes, readability, quality
-    2. Visual analysis (if applicable): objects, scenes, composition, aesthetic quality
-    3. Audio analysis (if applicable): speech transcription, audio quality, characteristics
-    4. Video analysis (if applicable): pacing, editing, production quality
-    5. Brand safety assessment: appropriateness, compliance, risk factors
-    6. Engagement prediction: potential performance across platforms
-    7. Content intelligence synthesis: overall assessment and optimization recommendations
-    
-    Ensure analysis covers all relevant modalities and provides actionable insights.
+    {requested_list}
+    
+    Ensure analysis covers all detected modalities and provides actionable insights.
     """
+
+def analyze_content(content_description, content_type="mixed"):
+    """Analyze multi-modal content, waking only the specialists for modalities present"""
+    
+    plan = plan_content_analysis(content_description, content_type, prefilter=brand_safety_prefilter)
+    team = create_content_intelligence_team(
+        modalities=plan.modalities,
+        brand_safety=plan.needs_brand_safety_agent
+    )
+    query = build_analysis_query(content_description, content_type, plan)
     
     print("🎨 Starting Multi-Modal Content Analysis...")
+    print(f"🧭 {plan.summary()}")
     print("=" * 60)
     
     response = team.run(query)
     
     print("\n" + "=" * 60)
     print("🎯 Content Analysis Complete!")
+    if plan.skipped:
+        print(f"⏭️ Skipped agents: {', '.join(plan.skipped)}")
+    print_last_trace()
     
     return response
 
@@ -0,0 +1,110 @@
+"""
+Modality Routing - Content Intelligence Platform
+Detects which modalities a piece of content carries so that only the
+relevant specialists are woken for it.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from brand_safety_filter import BrandSafetyPrefilter, SafetyVerdict
+
+MODALITIES = ("text", "visual", "audio", "video")
+
+# Specialist responsible for each modality
+SPECIALISTS = {
+    "text": "Text Content Analyst",
+    "visual": "Visual Content Specialist",
+    "audio": "Audio Content Expert",
+    "video": "Video Content Analyzer",
+}
+
+# Agents that run for every item regardless of modality
+CORE_AGENTS = ("Brand Safety Monitor", "Engagement Predictor", "Content Intelligence Coordinator")
+BRAND_SAFETY_AGENT = "Brand Safety Monitor"
+
+# Declared content types and the modalities they imply
+CONTENT_TYPE_MODALITIES = {
+    "text": {"text"},
+    "article": {"text"},
+    "post": {"text"},
+    "image": {"visual"},
+    "photo": {"visual"},
+    "audio": {"audio"},
+    "podcast": {"audio"},
+    "video": {"video"},
+}
+
+# Signals of a modality inside the content itself
+MODALITY_SIGNALS = {
+    "text": re.compile(
+        r"\b(transcript|captions?|headline|body copy|article|blog|tweet)\b|\btext:"
+        r"|\"[^\"]{40,}\"",
+        re.IGNORECASE,
+    ),
+    "visual": re.compile(
+        r"\.(png|jpe?g|gif|webp|svg)\b|\b(image|photo|visual elements?|thumbnail|screenshot|infographic|"
+        r"illustration|color palette|brand colou?rs?)\b",
+        re.IGNORECASE,
+    ),
+    "audio": re.compile(
+        r"\.(mp3|wav|m4a|flac|ogg)\b|\b(audio( elements?)?|podcast|narration|voice-?over|"
+        r"background music|soundtrack|\d+\s?bpm|\d+\s?khz)\b",
+        re.IGNORECASE,
+    ),
+    "video": re.compile(
+        r"\.(mp4|mov|avi|mkv|webm)\b|youtube\.com|vimeo\.com|\b(video|footage|"
+        r"b-roll|\d+k resolution|\d+\s?fps)\b|\bduration:",
+        re.IGNORECASE,
+    ),
+}
+
+
+def detect_modalities(content_description: str, content_type: str = "mixed") -> List[str]:
+    """Return the modalities present, from the declared type and the content itself"""
+    declared = CONTENT_TYPE_MODALITIES.get((content_type or "").strip().lower(), set())
+    found = {m for m, pattern in MODALITY_SIGNALS.items() if pattern.search(content_description or "")}
+    modalities = declared | found
+
+    # Plain prose with no other signals is a text post
+    if not modalities:
+        modalities = {"text"}
+    return [m for m in MODALITIES if m in modalities]
+
+
+@dataclass
+class RoutingPlan:
+    """Which agents a content item needs, and which were skipped and why"""
+    modalities: List[str]
+    agents: List[str]
+    skipped: Dict[str, str] = field(default_factory=dict)
+    safety: Optional[SafetyVerdict] = None
+
+    @property
+    def needs_brand_safety_agent(self) -> bool:
+        return BRAND_SAFETY_AGENT in self.agents
+
+    def summary(self) -> str:
+        skipped = ", ".join(f"{name} ({reason})" for name, reason in self.skipped.items()) or "none"
+        return f"Modalities: {', '.join(self.modalities)} | Agents: {len(self.agents)} | Skipped: {skipped}"
+
+
+def plan_content_analysis(content_description: str, content_type: str = "mixed",
+                          prefilter: Optional[BrandSafetyPrefilter] = None) -> RoutingPlan:
+    """Plan the team for one content item
+
+    With a `prefilter`, items it can decide locally skip the Brand Safety Monitor.
+    """
+    modalities = detect_modalities(content_description, content_type)
+    agents = [SPECIALISTS[m] for m in modalities] + list(CORE_AGENTS)
+    skipped = {
+        SPECIALISTS[m]: f"no {m} content detected"
+        for m in MODALITIES if m not in modalities
+    }
+
+    safety = prefilter.check(content_description) if prefilter else None
+    if safety and safety.decided:
+        agents.remove(BRAND_SAFETY_AGENT)
+        skipped[BRAND_SAFETY_AGENT] = f"pre-filter decided {safety.decision}"
+    return RoutingPlan(modalities=modalities, agents=agents, skipped=skipped, safety=safety)
@@ -0,0 +1,382 @@
+"""
+Sandboxed Python Execution Pool - Content Intelligence Platform
+A pool of pre-warmed worker subprocesses that run agent-generated code with
+CPU, memory and wall-clock limits, in place of PythonTools' in-process exec.
+"""
+
+import atexit
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.tools import Toolkit
+from agno.utils.log import log_debug, logger
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock limits and recycling still apply
+    resource = None
+
+# Imported once per worker and exposed to executed code under these names
+DEFAULT_PRELOAD = {
+    "math": "math",
+    "statistics": "statistics",
+    "json": "json",
+    "re": "re",
+    "collections": "collections",
+    "datetime": "datetime",
+    "np": "numpy",
+    "pd": "pandas",
+}
+
+# Environment variables that generated code has no business reading
+SENSITIVE_ENV_MARKERS = ("KEY", "TOKEN", "SECRET", "PASSWORD")
+
+
+@dataclass
+class SandboxLimits:
+    """Per-execution resource limits"""
+    cpu_seconds: int = 5
+    memory_mb: int = 512
+    wall_seconds: float = 10.0
+    max_output_chars: int = 20000
+
+
+@dataclass
+class SandboxResult:
+    ok: bool
+    value: Optional[str] = None
+    stdout: str = ""
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    def render(self) -> str:
+        """Format the result the way PythonTools reports back to the agent"""
+        if not self.ok:
+            return f"Error running python code: {self.error}"
+        parts = []
+        if self.stdout:
+            parts.append(self.stdout.rstrip())
+        if self.value is not None:
+            parts.append(self.value)
+        return "\n".join(parts) or "successfully ran python code"
+
+
+def _vm_size_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _worker_main(conn, limits: SandboxLimits, preload: Dict[str, str]) -> None:
+    """Worker loop: warm up, then execute code sent over the pipe until told to stop"""
+    for name in list(os.environ):
+        if any(marker in name.upper() for marker in SENSITIVE_ENV_MARKERS):
+            del os.environ[name]
+
+    modules: Dict[str, Any] = {}
+    for alias, module_name in preload.items():
+        try:
+            modules[alias] = __import__(module_name)
+        except ImportError:
+            pass
+
+    # Cap address space above what the warm imports already use
+    if resource is not None:
+        base = _vm_size_bytes()
+        if base is not None:
+            cap = base + limits.memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        code, variable_to_return = message
+
+        if resource is not None:
+            # RLIMIT_CPU is cumulative, so grant this execution its budget on top of usage so far
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            budget = int(used.ru_utime + used.ru_stime) + limits.cpu_seconds
+            resource.setrlimit(resource.RLIMIT_CPU, (budget, budget + 1))
+
+        stdout = io.StringIO()
+        scope: Dict[str, Any] = {"__name__": "__main__", **modules}
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(stdout):
+                exec(compile(code, "<sandbox>", "exec"), scope)
+            value = None
+            if variable_to_return:
+                if variable_to_return not in scope:
+                    raise NameError(f"Variable {variable_to_return} not found")
+                value = str(scope[variable_to_return])[:limits.max_output_chars]
+            result = SandboxResult(True, value, stdout.getvalue()[:limits.max_output_chars])
+        except MemoryError:
+            result = SandboxResult(False, error=f"memory limit of {limits.memory_mb} MB exceeded")
+        except BaseException as e:
+            tb = traceback.format_exception_only(type(e), e)
+            result = SandboxResult(False, stdout=stdout.getvalue()[:limits.max_output_chars],
+                                   error="".join(tb).strip())
+        result.elapsed = time.perf_counter() - started
+        conn.send(("result", result))
+
+
+class _Worker:
+    def __init__(self, ctx, limits: SandboxLimits, preload: Dict[str, str]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, limits, preload), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.executions = 0
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise TimeoutError("sandbox worker did not start in time")
+        self.conn.recv()
+        self.ready = True
+
+    def stop(self, force: bool = False) -> None:
+        try:
+            if not force and self.process.is_alive():
+                self.conn.send(None)
+                self.process.join(1)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+@dataclass
+class PoolStats:
+    executions: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    crashes: int = 0
+    recycled: int = 0
+    total_exec_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return 1000 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+
+
+class WarmSandboxPool:
+    """Thread-safe pool of pre-warmed, resource-limited Python workers
+
+    Each execution checks out an idle worker, so concurrent agents never share
+    one. Workers are replaced after `max_executions` runs, and immediately when
+    they time out or die, so runaway code cannot stall the team.
+    """
+
+    def __init__(self, size: int = 4, limits: Optional[SandboxLimits] = None,
+                 max_executions: int = 50, preload: Optional[Dict[str, str]] = None,
+                 start_method: str = "spawn", startup_timeout: float = 60.0):
+        self.size = size
+        self.limits = limits or SandboxLimits()
+        self.max_executions = max_executions
+        self.preload = DEFAULT_PRELOAD if preload is None else preload
+        self.startup_timeout = startup_timeout
+        self.stats = PoolStats()
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._ctx, self.limits, self.preload)
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if self._closed:
+            worker.stop(force=not healthy)
+            return
+        if not healthy or worker.executions >= self.max_executions:
+            worker.stop(force=not healthy)
+            with self._lock:
+                self.stats.recycled += 1
+            # The replacement warms up in its own process; it is only waited on when next checked out
+            worker = self._spawn()
+        self._idle.put(worker)
+
+    def execute(self, code: str, variable_to_return: Optional[str] = None,
+                timeout: Optional[float] = None) -> SandboxResult:
+        if self._closed:
+            raise RuntimeError("sandbox pool is closed")
+        timeout = timeout or self.limits.wall_seconds
+        started = time.perf_counter()
+        worker = self._idle.get()
+        healthy = True
+        try:
+            worker.wait_ready(self.startup_timeout)
+            worker.executions += 1
+            worker.conn.send((code, variable_to_return))
+            if worker.conn.poll(timeout):
+                _, result = worker.conn.recv()
+            else:
+                healthy = False
+                result = SandboxResult(False, error=f"execution exceeded {timeout:.0f}s wall-clock limit")
+                with self._lock:
+                    self.stats.timeouts += 1
+        except (EOFError, OSError, TimeoutError) as e:
+            # Worker was killed (CPU limit, segfault) or never came up
+            healthy = False
+            result = SandboxResult(False, error=f"sandbox worker died ({type(e).__name__}); "
+                                                f"CPU limit is {self.limits.cpu_seconds}s")
+            with self._lock:
+                self.stats.crashes += 1
+        finally:
+            self._release(worker, healthy)
+
+        with self._lock:
+            self.stats.executions += 1
+            self.stats.failures += not result.ok
+            self.stats.total_exec_seconds += result.elapsed
+            self.stats.latencies.append(time.perf_counter() - started)
+            del self.stats.latencies[:-1000]
+        return result
+
+    def warm_up(self) -> None:
+        """Block until every idle worker has finished its imports"""
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            try:
+                worker.wait_ready(self.startup_timeout)
+            finally:
+                self._idle.put(worker)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+_default_pool: Optional[WarmSandboxPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> WarmSandboxPool:
+    """Process-wide pool shared by every agent, created on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            size = int(os.getenv("SANDBOX_POOL_SIZE", "4"))
+            _default_pool = WarmSandboxPool(size=size)
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+class SandboxedPythonTools(Toolkit):
+    """Drop-in replacement for PythonTools that executes code in the warm sandbox pool"""
+
+    def __init__(self, pool: Optional[WarmSandboxPool] = None, base_dir: Optional[Path] = None, **kwargs):
+        self._pool = pool
+        self.base_dir: Path = base_dir or Path.cwd()
+        tools = [self.run_python_code, self.save_to_file_and_run]
+        super().__init__(name="python_tools", tools=tools, **kwargs)
+
+    @property
+    def pool(self) -> WarmSandboxPool:
+        return self._pool or get_default_pool()
+
+    def run_python_code(self, code: str, variable_to_return: Optional[str] = None) -> str:
+        """This function runs Python code in a sandboxed worker and returns the value of `variable_to_return`.
+        numpy (np), pandas (pd), math, statistics, json, re, collections and datetime are already imported.
+        If successful, returns the printed output and the value of `variable_to_return` if provided.
+        If failed, returns an error message.
+
+        :param code: The code to run.
+        :param variable_to_return: The variable to return.
+        :return: value of `variable_to_return` if successful, otherwise returns an error message.
+        """
+        log_debug(f"Running code in sandbox:\n\n{code}\n\n")
+        result = self.pool.execute(code, variable_to_return)
+        if not result.ok:
+            logger.warning(f"Sandboxed code failed: {result.error}")
+        return result.render()
+
+    def save_to_file_and_run(self, file_name: str, code: str, variable_to_return: Optional[str] = None,
+                             overwrite: bool = True) -> str:
+        """This function saves Python code to a file called `file_name` and then runs it in a sandboxed worker.
+        If successful, returns the value of `variable_to_return` if provided otherwise returns a success message.
+        If failed, returns an error message.
+
+        Make sure the file_name ends with `.py`
+
+        :param file_name: The name of the file the code will be saved to.
+        :param code: The code to save and run.
+        :param variable_to_return: The variable to return.
+        :param overwrite: Overwrite the file if it already exists.
+        :return: if run is successful, the value of `variable_to_return` if provided else file name.
+        """
+        file_path = self.base_dir.joinpath(file_name)
+        if file_path.exists() and not overwrite:
+            return f"File {file_name} already exists"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(code, encoding="utf-8")
+        result = self.pool.execute(code, variable_to_return)
+        if result.ok and variable_to_return is None and not result.stdout:
+            return f"successfully ran {str(file_path)}"
+        return result.render()
+
+
+def benchmark(executions: int = 40) -> Tuple[float, float]:
+    """Compare a cold subprocess per execution against the warm pool (ms per run)"""
+    import subprocess
+    import sys
+
+    code = "import numpy as np\nx = float(np.arange(1000).sum())"
+    started = time.perf_counter()
+    for _ in range(executions // 4):
+        subprocess.run([sys.executable, "-c", code], check=True)
+    cold_ms = 1000 * (time.perf_counter() - started) / (executions // 4)
+
+    pool = WarmSandboxPool(size=4)
+    pool.warm_up()
+    started = time.perf_counter()
+    for _ in range(executions):
+        pool.execute("x = float(np.arange(1000).sum())", "x")
+    warm_ms = 1000 * (time.perf_counter() - started) / executions
+    pool.close()
+    return cold_ms, warm_ms
+
+
+if __name__ == "__main__":
+    cold_ms, warm_ms = benchmark()
+    print("🧪 Sandbox Pool Benchmark")
+    print("=" * 60)
+    print(f"Cold subprocess per run: {cold_ms:.1f} ms")
+    print(f"Warm pool per run:       {warm_ms:.1f} ms")
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Backtester - Historical check of allocations for the Financial Intelligence Platform
+Simulates target weights with periodic rebalancing over an aligned daily price
+matrix, for thousands of candidate allocations in one vectorized batch, and
+scores an agent's recommended allocation against random alternatives.
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.analytics_store import extract_recommendations
+from shared.request_cache import canonical_symbols
+
+load_dotenv()
+
+TRADING_DAYS = 252
+# Calendar period that starts a new rebalance; an int schedule rebalances every N trading days instead
+REBALANCE_PERIODS = {"weekly": "W", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+# Rows simulated at once; bounds memory at CHUNK_ROWS x candidates values
+CHUNK_ROWS = 256
+# Metrics where a higher value is better, usable to rank candidates
+RANKABLE = ("sharpe", "total_return", "cagr", "max_drawdown")
+
+
+def load_prices(symbols: List[str], start: str, end: Optional[str] = None) -> pd.DataFrame:
+    """Adjusted daily closes (dates x symbols) from Yahoo Finance, aligned with `align_prices`"""
+    import yfinance as yf
+
+    data = yf.download(symbols, start=start, end=end, interval="1d", auto_adjust=True, progress=False,
+                       group_by="column", multi_level_index=True)
+    if data is None or data.empty:
+        raise ValueError(f"No prices for {', '.join(symbols)} from {start}")
+    return align_prices(data["Close"].reindex(columns=symbols))
+
+
+def align_prices(prices: pd.DataFrame) -> pd.DataFrame:
+    """Forward-fill gaps and start on the first date every symbol has a price"""
+    prices = prices.sort_index().ffill()
+    missing = [s for s in prices.columns if prices[s].isna().all()]
+    if missing:
+        raise ValueError(f"No prices for {', '.join(map(str, missing))}")
+    return prices.loc[prices.notna().all(axis=1).idxmax():]
+
+
+def rebalance_points(dates: pd.DatetimeIndex, schedule: Union[str, int, None] = "monthly") -> np.ndarray:
+    """Row indices where holdings are reset to the target weights, at that day's close; always includes 0
+
+    `schedule` is "none" (buy and hold), "weekly", "monthly", "quarterly",
+    "yearly" (first trading day of each period) or a number of trading days.
+    """
+    if schedule in (None, "none"):
+        return np.array([0])
+    if isinstance(schedule, (int, np.integer)):
+        if schedule < 1:
+            raise ValueError("A rebalance interval must be at least one trading day")
+        return np.arange(0, len(dates), schedule)
+    if schedule not in REBALANCE_PERIODS:
+        raise ValueError(f"Unknown rebalance schedule '{schedule}', expected none, "
+                         f"{', '.join(REBALANCE_PERIODS)} or a number of days")
+    periods = pd.DatetimeIndex(dates).tz_localize(None).to_period(REBALANCE_PERIODS[schedule]).asi8
+    return np.concatenate([[0], np.flatnonzero(periods[1:] != periods[:-1]) + 1])
+
+
+def normalize_weights(weights: Union[Sequence[float], np.ndarray], n_symbols: int) -> np.ndarray:
+    """Candidates x symbols fractions; rows above 100% are scaled down, the remainder under 100% is cash"""
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if weights.shape[1] != n_symbols:
+        raise ValueError(f"Expected {n_symbols} weights per allocation, got {weights.shape[1]}")
+    if (weights < 0).any() or not np.isfinite(weights).all():
+        raise ValueError("Weights must be finite and non-negative (long-only)")
+    totals = weights.sum(axis=1, keepdims=True)
+    return np.where(totals > 1, weights / np.where(totals > 0, totals, 1), weights)
+
+
+@dataclass
+class BacktestResult:
+    """Per-candidate metrics from one batch; row i belongs to `weights[i]`"""
+    symbols: List[str]
+    start: pd.Timestamp
+    end: pd.Timestamp
+    weights: np.ndarray
+    final_value: np.ndarray
+    total_return: np.ndarray
+    cagr: np.ndarray
+    volatility: np.ndarray
+    sharpe: np.ndarray
+    max_drawdown: np.ndarray
+    turnover: np.ndarray
+    rebalances: int
+    curves: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.final_value)
+
+    def rank(self, by: str = "sharpe") -> np.ndarray:
+        """Candidate indices, best first"""
+        if by not in RANKABLE:
+            raise ValueError(f"Cannot rank by '{by}', expected one of: {', '.join(RANKABLE)}")
+        return np.argsort(-np.nan_to_num(getattr(self, by), nan=-np.inf), kind="stable")
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame({name: getattr(self, name) for name in
+                              ("total_return", "cagr", "volatility", "sharpe", "max_drawdown", "turnover")})
+        return frame.join(pd.DataFrame(self.weights, columns=self.symbols))
+
+
+def backtest(prices: pd.DataFrame, weights: Union[Sequence[float], np.ndarray],
+             rebalance: Union[str, int, None] = "monthly", cost_bps: float = 0.0, risk_free: float = 0.0,
+             keep_curves: bool = False) -> BacktestResult:
+    """Simulate each row of `weights` (fractions per column of `prices`) over the whole price history
+
+    Between rebalances positions drift with prices; at each rebalance they are
+    traded back to the target weights, paying `cost_bps` on the traded value.
+    All candidates are simulated together, one price chunk at a time, so a
+    batch costs a few matrix products per rebalance period.
+
+    Reported per candidate: total return, CAGR, annualized volatility and
+    Sharpe ratio (against `risk_free`, annual) of daily returns, maximum
+    drawdown (a negative fraction) and annual one-way turnover.
+    """
+    prices = align_prices(prices)
+    matrix = prices.to_numpy(dtype=float)
+    rows, n_symbols = matrix.shape
+    if rows < 2:
+        raise ValueError("A backtest needs at least two days of prices")
+    target = normalize_weights(weights, n_symbols)
+    cash = 1 - target.sum(axis=1)
+    candidates = len(target)
+    points = rebalance_points(prices.index, rebalance)
+
+    value = np.ones(candidates)
+    previous = np.ones(candidates)
+    peak = np.ones(candidates)
+    max_drawdown = np.zeros(candidates)
+    sum_returns = np.zeros(candidates)
+    sum_squares = np.zeros(candidates)
+    traded = np.zeros(candidates)
+    curves = np.empty((rows, candidates)) if keep_curves else None
+    cost = cost_bps / 10_000
+
+    bounds = list(points) + [rows]
+    for index, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if index:
+            # Holdings drifted since the last rebalance; trade them back to the target weights
+            growth = matrix[start] / matrix[bounds[index - 1]]
+            drifted = target * growth
+            before = drifted.sum(axis=1) + cash
+            trade = np.abs(target - drifted / before[:, None]).sum(axis=1)
+            traded += trade
+            value = value_start * before * (1 - cost * trade)
+        value_start = value
+        base = matrix[start]
+        for chunk in range(start, stop, CHUNK_ROWS):
+            # Portfolio value at each day's close, relative to the value right after this rebalance
+            relative = matrix[chunk:min(chunk + CHUNK_ROWS, stop)] / base
+            values = (relative @ target.T + cash) * value_start
+            if chunk == 0:
+                daily = values[1:] / values[:-1] - 1
+            else:
+                daily = values / np.vstack([previous, values[:-1]]) - 1
+            sum_returns += daily.sum(axis=0)
+            sum_squares += np.square(daily).sum(axis=0)
+            running_peak = np.maximum(np.maximum.accumulate(values, axis=0), peak)
+            max_drawdown = np.minimum(max_drawdown, (values / running_peak - 1).min(axis=0))
+            peak = running_peak[-1]
+            previous = values[-1]
+            if curves is not None:
+                curves[chunk:chunk + len(values)] = values
+
+    days = rows - 1
+    years = days / TRADING_DAYS
+    mean = sum_returns / days
+    volatility = np.sqrt(np.maximum(sum_squares / days - mean ** 2, 0) * days / max(days - 1, 1)) * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(volatility > 0, (mean * TRADING_DAYS - risk_free) / volatility, np.nan)
+    return BacktestResult(
+        symbols=list(prices.columns), start=prices.index[0], end=prices.index[-1], weights=target,
+        final_value=previous, total_return=previous - 1, cagr=previous ** (1 / years) - 1,
+        volatility=volatility, sharpe=sharpe, max_drawdown=max_drawdown, turnover=traded / 2 / years,
+        rebalances=len(points) - 1, curves=curves,
+    )
+
+
+def random_allocations(n_symbols: int, count: int, seed: int = 0) -> np.ndarray:
+    """Fully invested long-only allocations drawn uniformly over all possible weightings"""
+    return np.random.default_rng(seed).dirichlet(np.ones(n_symbols), size=count)
+
+
+def weights_from_recommendations(recommendations: Iterable, symbols: List[str]) -> np.ndarray:
+    """Fractions per symbol from StockRecommendation (`allocation_percent`) or extracted `Recommendation`
+    (`allocation_pct`) objects; symbols without an allocation get none"""
+    weights = np.zeros(len(symbols))
+    for recommendation in recommendations:
+        percent = getattr(recommendation, "allocation_percent", None)
+        if percent is None:
+            percent = getattr(recommendation, "allocation_pct", None)
+        if percent is not None and recommendation.symbol.upper() in symbols:
+            weights[symbols.index(recommendation.symbol.upper())] = percent / 100
+    return weights
+
+
+@dataclass
+class AllocationScore:
+    """How a recommended allocation did against equal weighting and random allocations"""
+    by: str
+    result: BacktestResult
+    percentile: float
+
+    @property
+    def recommended(self) -> pd.Series:
+        return self.result.to_frame().iloc[0]
+
+    @property
+    def equal_weight(self) -> pd.Series:
+        return self.result.to_frame().iloc[1]
+
+    def summary(self) -> str:
+        frame = self.result.to_frame()
+        rows = [("recommended", 0), ("equal weight", 1)]
+        if len(frame) > 2:
+            rows.append((f"best of {len(frame) - 2:,} random", next(i for i in self.result.rank(self.by) if i >= 2)))
+        lines = [f"{'portfolio':<22}{'return':>9}{'CAGR':>8}{'vol':>8}{'sharpe':>8}{'max DD':>9}{'turnover':>10}"]
+        for label, row in rows:
+            metrics = frame.iloc[row]
+            lines.append(f"{label:<22}{metrics.total_return:>9.1%}{metrics.cagr:>8.1%}{metrics.volatility:>8.1%}"
+                         f"{metrics.sharpe:>8.2f}{metrics.max_drawdown:>9.1%}{metrics.turnover:>9.0%}")
+        if len(frame) > 2:
+            lines.append(f"🎯 Recommended allocation beats {self.percentile:.0%} of {len(frame) - 2:,} "
+                         f"random allocations on {self.by}")
+        return "\n".join(lines)
+
+
+def score_allocation(prices: pd.DataFrame, weights: Sequence[float], rebalance: Union[str, int, None] = "monthly",
+                     candidates: int = 5000, by: str = "sharpe", cost_bps: float = 5.0,
+                     seed: int = 0) -> AllocationScore:
+    """Backtest `weights` in one batch with equal weighting and `candidates` random allocations
+
+    The percentile is the share of random allocations it beats on `by`, a
+    cheap historical check of a recommendation that needs no model call.
+    """
+    n_symbols = prices.shape[1]
+    batch = np.vstack([normalize_weights(weights, n_symbols), np.full(n_symbols, 1 / n_symbols),
+                       random_allocations(n_symbols, candidates, seed)])
+    result = backtest(prices, batch, rebalance, cost_bps)
+    metric = np.nan_to_num(getattr(result, by), nan=-np.inf)
+    return AllocationScore(by, result, float((metric[2:] < metric[0]).mean()) if candidates else float("nan"))
+
+
+def score_analysis(text: str, symbols: List[str], prices: pd.DataFrame, **kwargs) -> Optional[AllocationScore]:
+    """Score the allocation stated in an analysis (e.g. `analyze_portfolio(...).content`); None if it gives none"""
+    symbols = canonical_symbols(symbols)
+    weights = weights_from_recommendations(extract_recommendations(text, symbols), symbols)
+    if not weights.any():
+        return None
+    return score_allocation(prices[symbols], weights, **kwargs)
+
+
+def synthetic_prices(days: int, symbols: int, seed: int = 0) -> pd.DataFrame:
+    """Geometric Brownian motion closes with realistic equity drift and volatility"""
+    rng = np.random.default_rng(seed)
+    drift = rng.uniform(0.0, 0.15, symbols) / TRADING_DAYS
+    volatility = rng.uniform(0.15, 0.5, symbols) / np.sqrt(TRADING_DAYS)
+    returns = drift - volatility ** 2 / 2 + volatility * rng.standard_normal((days, symbols))
+    dates = pd.bdate_range("2016-01-04", periods=days)
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=dates,
+                        columns=[f"SYM{i:03d}" for i in range(symbols)])
+
+
+def benchmark(years: int = 10, symbols: int = 50, candidates: int = 10_000, rebalance: str = "monthly") -> dict:
+    prices = synthetic_prices(years * TRADING_DAYS, symbols)
+    batch = random_allocations(symbols, candidates)
+    start = time.perf_counter()
+    result = backtest(prices, batch, rebalance, cost_bps=5)
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "rebalances": result.rebalances,
+            "candidate_days_per_s": candidates * len(prices) / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest recommended allocations against history")
+    parser.add_argument("symbols", nargs="*", help="symbols of the allocation, or 'bench'")
+    parser.add_argument("--weights", type=float, nargs="+", help="allocation percent per symbol")
+    parser.add_argument("--analysis", help="file with an analysis to take the allocation from")
+    parser.add_argument("--start", default="2021-01-01")
+    parser.add_argument("--end")
+    parser.add_argument("--rebalance", default="monthly", help="none, weekly, monthly, quarterly, yearly or days")
+    parser.add_argument("--cost-bps", type=float, default=5.0, help="trading cost per rebalance, basis points")
+    parser.add_argument("--candidates", type=int, default=5000, help="random allocations to rank against")
+    parser.add_argument("--by", choices=RANKABLE, default="sharpe")
+    args = parser.parse_args()
+    rebalance = int(args.rebalance) if args.rebalance.isdigit() else args.rebalance
+
+    if args.symbols == ["bench"]:
+        print("⏱️ Backtester: 10 years of daily prices, 50 symbols, 10,000 allocations")
+        print("=" * 60)
+        for schedule in ("none", "monthly", "weekly"):
+            stats = benchmark(rebalance=schedule)
+            print(f"{schedule:<10} {stats['rebalances']:>4} rebalances  {stats['seconds'] * 1000:>8.1f} ms  "
+                  f"{stats['candidate_days_per_s'] / 1e6:>7.1f}M candidate-days/s")
+        raise SystemExit
+    if not args.symbols:
+        parser.error("symbols are required")
+    symbols = canonical_symbols(args.symbols)
+    try:
+        prices = load_prices(symbols, args.start, args.end)
+    except ValueError as error:
+        raise SystemExit(f"❌ {error}")
+    print(f"📈 Backtest: {', '.join(symbols)} {prices.index[0]:%Y-%m-%d} → {prices.index[-1]:%Y-%m-%d}, "
+          f"{args.rebalance} rebalancing, {args.cost_bps:g} bps costs")
+    print("=" * 60)
+    options = dict(rebalance=rebalance, candidates=args.candidates, by=args.by, cost_bps=args.cost_bps)
+    if args.analysis:
+        with open(args.analysis) as handle:
+            score = score_analysis(handle.read(), symbols, prices, **options)
+        if score is None:
+            raise SystemExit("❌ No allocation percentages found in the analysis")
+    else:
+        weights = args.weights or [100 / len(symbols)] * len(symbols)
+        if len(weights) != len(symbols):
+            parser.error("give one weight per symbol")
+        score = score_allocation(prices, np.array(weights) / 100, **options)
+    print(score.summary())
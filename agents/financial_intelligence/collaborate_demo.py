@@ -5,131 +5,205 @@ Demonstrates advanced team collaboration patterns per AGNO best practices
 """
 
 import os
+import sys
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.tools.yfinance import YFinanceTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.reasoning import ReasoningTools
-from agno.storage.sqlite import SqliteStorage
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.analytics_store import metered_run
+from shared.platform_factory import PlatformFactory
+from shared.tracing import get_tracer, instrument, print_last_trace
 
 load_dotenv()
 
-def create_collaborative_investment_team():
+# "AAPL: BUY", "**AAPL** - HOLD", "AAPL (Apple) — SELL", "| AAPL | BUY |"
+RECOMMENDATION_PATTERN = re.compile(
+    r"\b([A-Z]{1,5}(?:\.[A-Z])?)\b\**\s*(?:\([^)\n]{0,40}\)\s*)?\**\s*(?:[:\-–—|=]\s*)+\**\s*(BUY|HOLD|SELL)\b",
+    re.IGNORECASE,
+)
+CALL_PATTERN = re.compile(r"\b(BUY|HOLD|SELL)\b", re.IGNORECASE)
+
+@dataclass
+class DebateRound:
+    """Positions and summary for one round of debate"""
+    number: int
+    positions: Dict[str, Dict[str, str]]
+    summary: str
+    changed: bool
+
+@dataclass
+class DebateResult:
+    """Outcome of a bounded debate"""
+    content: str
+    rounds: List[DebateRound] = field(default_factory=list)
+    converged: bool = False
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+def _token_usage(response):
+    """Sum input and output tokens from an agno run response"""
+    metrics = getattr(response, "metrics", None) or {}
+    def total(key):
+        value = metrics.get(key, 0)
+        return sum(value) if isinstance(value, list) else (value or 0)
+    return total("input_tokens"), total("output_tokens")
+
+def parse_recommendations(text, symbols):
+    """Extract BUY/HOLD/SELL calls for the given symbols from an agent's answer"""
+    wanted = {s.upper() for s in symbols}
+    calls = {}
+    for symbol, call in RECOMMENDATION_PATTERN.findall(text or ""):
+        if symbol.upper() in wanted:
+            calls[symbol.upper()] = call.upper()
+    # Table rows with other columns between the symbol and the call, e.g. "| AAPL | $195 | BUY |"
+    for line in (text or "").splitlines():
+        cells = [cell.strip(" *") for cell in line.strip().strip("|").split("|")] if line.lstrip().startswith("|") else []
+        symbol = next((cell.upper() for cell in cells if cell.upper() in wanted), None)
+        call = next((match.group(1).upper() for cell in cells for match in [CALL_PATTERN.fullmatch(cell)] if match), None)
+        if symbol and call:
+            calls.setdefault(symbol, call)
+    return calls
+
+def create_debate_moderator(profile=None):
+    """Cheap agent that condenses each round so members never see the raw transcript"""
+    moderator = PlatformFactory.for_script(__file__, profile=profile).build_agent("moderator")
+    return instrument(moderator, "member")
+
+def create_collaborative_investment_team(profile=None):
     """
     AGNO Collaborate Mode Demo - Advanced team interaction pattern
     
     This demonstrates the collaborate mode where agents engage in deeper 
-    reasoning and discussion, as specified in AGNO documentation.
+    reasoning and discussion, as specified in AGNO documentation. Agents,
+    team and storage are defined in collaborate_demo.toml.
     """
     
-    storage = SqliteStorage(
-        table_name="collaborative_investment_team",
-        db_file="collaborative_investment.db"
-    )
-    
-    # Senior Investment Analyst - Strategic thinking
-    senior_analyst = Agent(
-        name="Senior Investment Analyst",
-        role="Lead strategic investment analysis and challenge assumptions",
-        model=OpenAIChat(id="gpt-4o"),  # Using more powerful model for senior role
-        tools=[
-            YFinanceTools(
-                stock_price=True,
-                company_info=True,
-                analyst_recommendations=True,
-                stock_fundamentals=True
-            ),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a senior investment analyst with 15+ years experience.",
-            "Lead strategic discussions and challenge team assumptions.",
-            "Ask probing questions to ensure thorough analysis.",
-            "Identify potential blind spots in investment recommendations.",
-            "Synthesize team insights into strategic recommendations."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Market Research Specialist - Data-driven insights
-    market_researcher = Agent(
-        name="Market Research Specialist", 
-        role="Provide comprehensive market research and competitive analysis",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            DuckDuckGoTools(cache_results=True),
-            YFinanceTools(company_news=True),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a market research expert specializing in competitive intelligence.",
-            "Provide comprehensive market context and competitive positioning.",
-            "Challenge investment theses with market reality checks.",
-            "Engage in analytical discussions with team members.",
-            "Question assumptions and provide alternative perspectives."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Risk Management Expert - Conservative perspective
-    risk_expert = Agent(
-        name="Risk Management Expert",
-        role="Provide risk assessment and challenge aggressive assumptions",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            YFinanceTools(stock_fundamentals=True),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a risk management expert focused on capital preservation.",
-            "Challenge optimistic projections with realistic risk assessments.",
-            "Engage in debates about risk-return trade-offs.",
-            "Provide conservative counterpoints to aggressive strategies.",
-            "Ensure team considers downside scenarios thoroughly."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Create team in collaborate mode for deeper interaction
-    team = Team(
-        name="Collaborative Investment Research Team",
-        mode="collaborate",  # AGNO collaborate mode for deeper reasoning
-        members=[senior_analyst, market_researcher, risk_expert],
-        instructions=[
-            "Engage in thorough analytical discussions about investment opportunities.",
-            "Challenge each other's assumptions and provide alternative perspectives.",
-            "Debate the merits and risks of each investment recommendation.",
-            "Build consensus through collaborative reasoning and analysis.",
-            "Ensure all viewpoints are considered before reaching conclusions.",
-            "Use your expertise to enhance the team's collective intelligence."
-        ],
-        success_criteria=[
-            "Comprehensive debate covering multiple perspectives",
-            "Risk-return analysis from conservative and aggressive viewpoints", 
-            "Consensus recommendations with clear rationale",
-            "Identification of key assumptions and potential blind spots",
-            "Final recommendations that balance opportunity with prudent risk management"
-        ],
-        storage=storage,
-        show_tool_calls=True,
-        markdown=True,
-        debug_mode=True,
-    )
-    
-    return team
+    return PlatformFactory.for_script(__file__, profile=profile).build_team()
 
-def collaborative_investment_analysis(symbols, investment_amount=1000000):
+def run_debate(team, symbols, investment_amount, max_rounds=3, moderator=None):
+    """
+    Run the team's debate in explicit rounds with convergence detection
+    
+    Each member states a BUY/HOLD/SELL call per symbol. After every round a
+    moderator condenses the positions into a short brief, and the next round
+    sees only that brief instead of the full transcript. The debate stops
+    early once every member has stated a call for every symbol and no member
+    changes one between rounds. The team's instructions guide every member
+    and its success criteria the consensus.
+    """
+    
+    moderator = moderator or create_debate_moderator()
+    # Members are run one by one here, so one span ties the whole debate into a single trace
+    with get_tracer().span(f"team:{team.name} debate", "team", symbols=",".join(symbols), max_rounds=max_rounds):
+        return _run_debate(team, symbols, investment_amount, max_rounds, moderator)
+
+def _run_debate(team, symbols, investment_amount, max_rounds, moderator):
+    result = DebateResult(content="")
+    previous = None
+    brief = "No discussion yet - this is the opening round."
+    wanted = {s.upper() for s in symbols}
+    guidelines = "\n".join(f"            - {line}" for line in team.instructions or [])
+    criteria = "\n".join(f"    - {line}" for line in getattr(team, "success_criteria", None) or [])
+    
+    def track(response):
+        input_tokens, output_tokens = _token_usage(response)
+        result.input_tokens += input_tokens
+        result.output_tokens += output_tokens
+        return response
+    
+    for number in range(1, max_rounds + 1):
+        print(f"\n🗣️ Debate Round {number}/{max_rounds}")
+        
+        positions = {}
+        statements = []
+        for member in team.members:
+            prompt = f"""
+            Investment debate round {number} of {max_rounds}.
+            Portfolio: {', '.join(symbols)}
+            Investment Amount: ${investment_amount:,.2f}
+            
+            Team guidelines:
+{guidelines}
+            
+            Brief of the debate so far:
+            {brief}
+            
+            As {member.name}, respond to the open disagreements and state your current position.
+            End with one line per symbol in the form `SYMBOL: BUY|HOLD|SELL - one-line rationale`.
+            """
+            response = track(member.run(prompt))
+            positions[member.name] = parse_recommendations(response.content, symbols)
+            statements.append(f"### {member.name}\n{response.content}")
+        
+        changed = positions != previous
+        # Members whose calls could not be parsed have not converged on anything
+        complete = all(set(calls) == wanted for calls in positions.values())
+        summary = track(moderator.run(
+            f"Summarize round {number} of the debate on {', '.join(symbols)}:\n\n" + "\n\n".join(statements)
+        )).content
+        result.rounds.append(DebateRound(number, positions, summary, changed))
+        brief = summary
+        
+        if previous is not None and not changed and complete:
+            result.converged = True
+            print(f"✅ Positions unchanged since round {number - 1} - ending debate early")
+            break
+        previous = positions
+    
+    # The senior analyst leads the team, so they write the consensus from the final brief
+    lead = team.members[0]
+    final = track(lead.run(f"""
+    The debate on {', '.join(symbols)} (${investment_amount:,.2f}) has concluded after {len(result.rounds)} rounds.
+    
+    Final brief:
+    {brief}
+    
+    Write the team's consensus recommendations with allocation percentages, the key
+    assumptions, remaining dissent, and the main risks.
+    
+    The consensus should meet these criteria:
+{criteria}
+    """))
+    result.content = final.content
+    return result
+
+def collaborative_investment_analysis(symbols, investment_amount=1000000, max_rounds=3):
     """
     Demonstrate collaborative analysis with debate and discussion
+    
+    With `max_rounds`, the debate runs in bounded, summarized rounds (see
+    `run_debate`). Pass `max_rounds=None` for the original open-ended
+    single collaborate-mode run.
     """
     
     team = create_collaborative_investment_team()
     
+    if max_rounds:
+        print("🤝 Starting Collaborative Investment Analysis...")
+        print("=" * 60)
+        print(f"Note: Bounded debate - up to {max_rounds} rounds with per-round summaries")
+        print("=" * 60)
+        
+        with metered_run("collaborate", symbols=list(symbols), investment_amount=float(investment_amount)) as run:
+            result = run_debate(team, symbols, investment_amount, max_rounds=max_rounds)
+            run.record.iterations, run.record.converged = len(result.rounds), result.converged
+            run.content = result.content
+        
+        print("\n" + "=" * 60)
+        print("🎯 Collaborative Analysis Complete!")
+        print(f"Rounds: {len(result.rounds)}/{max_rounds} ({'converged' if result.converged else 'round limit reached'})")
+        print(f"Tokens: {result.total_tokens:,} ({result.input_tokens:,} in / {result.output_tokens:,} out)")
+        print_last_trace()
+        
+        return result
+    
     query = f"""
     Please conduct a collaborative investment analysis for:
     
@@ -155,11 +229,14 @@ def collaborative_investment_analysis(symbols, investment_amount=1000000):
     print("Note: This demonstrates AGNO's 'collaborate' mode with deeper reasoning")
     print("=" * 60)
     
-    response = team.run(query)
+    with metered_run("collaborate", symbols=list(symbols), investment_amount=float(investment_amount)) as run:
+        response = team.run(query)
+        run.content = str(response.content)
     
     print("\n" + "=" * 60)
     print("🎯 Collaborative Analysis Complete!")
     print("This shows advanced AGNO team coordination patterns")
+    print_last_trace()
     
     return response
 
@@ -5,16 +5,20 @@ Simple local development version
 """
 
 import os
+import sys
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.tools.yfinance import YFinanceTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.reasoning import ReasoningTools
-from agno.storage.sqlite import SqliteStorage
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.analytics_store import metered_run
+from shared.incremental import IncrementalResult, IncrementalRun, IncrementalStore, fetch_symbol_inputs
+from shared.market_hours import market_ttl
+from shared.news_ingest import NewsIngestor
+from shared.platform_factory import PlatformFactory
+from shared.request_cache import RequestCache, canonical_symbols, rescale_dollar_amounts
+from shared.tracing import print_last_trace
 
 # Load environment variables
 load_dotenv()
@@ -36,143 +40,158 @@ class PortfolioAnalysis(BaseModel):
     expected_return: float = Field(description="Expected annual return %")
     executive_summary: str = Field(description="Key insights and recommendations")
 
-def create_financial_intelligence_team():
-    """Create the financial intelligence team with 5 specialized agents"""
-    
-    # Create storage instance
-    storage = SqliteStorage(
-        table_name="financial_intelligence_team",
-        db_file="financial_intelligence.db"
-    )
-    
-    # Market Data Analyst
-    market_analyst = Agent(
-        name="Market Data Analyst",
-        role="Analyze individual stock performance and market conditions",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            YFinanceTools(
-                stock_price=True,
-                company_info=True,
-                analyst_recommendations=True,
-                company_news=True
-            )
-        ],
-        instructions=[
-            "You are a senior market analyst with expertise in equity research.",
-            "Analyze each stock's financial metrics, recent performance, and market position.",
-            "Provide specific price targets and recommendation rationales.",
-            "Include quantitative metrics: P/E, ROE, revenue growth, market cap.",
-            "Structure your analysis with clear buy/hold/sell recommendations."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Market Sentiment Analyst
-    sentiment_analyst = Agent(
-        name="Market Sentiment Analyst",
-        role="Analyze market sentiment and news impact on stocks",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            DuckDuckGoTools(cache_results=True),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a sentiment analysis expert specializing in financial markets.",
-            "Analyze recent news, social media sentiment, and market psychology.",
-            "Identify sentiment trends that could impact stock performance.",
-            "Provide sentiment scores and trend analysis.",
-            "Consider both short-term and long-term sentiment implications."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Risk Assessment Specialist
-    risk_assessor = Agent(
-        name="Risk Assessment Specialist",
-        role="Evaluate portfolio risk and provide mitigation strategies",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            YFinanceTools(stock_fundamentals=True),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a risk management expert with deep knowledge of portfolio theory.",
-            "Analyze systematic and unsystematic risks for each investment.",
-            "Calculate portfolio volatility, beta, and correlation metrics.",
-            "Identify potential risk factors: sector concentration, market cycles, liquidity.",
-            "Provide specific risk mitigation strategies and position sizing guidance."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Portfolio Strategy Advisor
-    portfolio_strategist = Agent(
-        name="Portfolio Strategy Advisor",
-        role="Design optimal portfolio allocation and investment strategy",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are a portfolio strategist with expertise in asset allocation.",
-            "Design optimal portfolio allocations based on risk-return profiles.",
-            "Consider investment timeline, risk tolerance, and diversification.",
-            "Provide specific allocation percentages and rebalancing schedules.",
-            "Include tactical and strategic allocation recommendations."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Research Coordinator
-    research_coordinator = Agent(
-        name="Research Coordinator",
-        role="Synthesize analysis and ensure comprehensive coverage",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are a research director responsible for comprehensive investment analysis.",
-            "Synthesize insights from market, sentiment, and risk analysis.",
-            "Ensure all aspects of investment decision-making are covered.",
-            "Provide executive summary with clear actionable recommendations.",
-            "Maintain high analytical standards and quality control."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Create coordinated team with AGNO best practices
-    team = Team(
-        name="Financial Intelligence Team",
-        mode="coordinate",  # AGNO coordination mode for collaborative problem-solving
-        members=[market_analyst, sentiment_analyst, risk_assessor, portfolio_strategist, research_coordinator],
-        instructions=[
-            "Work together systematically to provide comprehensive investment analysis.",
-            "Build upon each other's analysis to create cohesive recommendations.",
-            "Ensure quantitative rigor and risk-aware decision making.",
-            "Deliver institutional-quality investment research.",
-            "Each agent should contribute their specialized expertise to the team goal.",
-            "Share context and insights to enable collective intelligence."
-        ],
-        success_criteria=[
-            "All stocks analyzed with quantitative metrics and clear recommendations",
-            "Portfolio risk assessment completed with specific risk scores",
-            "Allocation percentages provided for each investment",
-            "Executive summary delivered with actionable insights",
-            "Analysis meets institutional investment standards"
-        ],
-        storage=storage,
-        show_tool_calls=True,
-        markdown=True,
-        debug_mode=True,
-    )
-    
-    return team
-
-def analyze_portfolio(symbols, investment_amount=100000):
-    """Analyze a portfolio of stocks"""
+def create_financial_intelligence_team(profile=None):
+    """Create the financial intelligence team with 5 specialized agents
+
+    Agents, team and storage are defined in financial_intelligence.toml. The
+    profile (default: AGENT_PROFILE, else "development") controls debug
+    logging, tool-call echo and storage tuning.
+    """
+    
+    return PlatformFactory.for_script(__file__, profile=profile).build_team()
+
+# A cached analysis is reused for a different amount only within this ratio range;
+# further out, position sizing and risk advice may no longer scale linearly
+MIN_SCALE_RATIO = 0.5
+MAX_SCALE_RATIO = 2.0
+
+_request_cache = None
+
+def get_request_cache():
+    """Request cache shared by every process using this platform's database"""
+    global _request_cache
+    if _request_cache is None:
+        _request_cache = RequestCache(db_file="financial_intelligence.db")
+    return _request_cache
+
+def find_cached_analysis(symbols, investment_amount):
+    """Return a live cached analysis for this basket, rescaled to the amount if needed"""
+    cache = get_request_cache()
+    params = {"symbols": symbols, "investment_amount": round(float(investment_amount), 2)}
+    cached = cache.get("portfolio", params)
+    if cached:
+        cached.note = "exact match"
+        return cached
+
+    for entry in cache.related("portfolio", ",".join(symbols)):
+        original_amount = entry.params["investment_amount"]
+        if not MIN_SCALE_RATIO <= investment_amount / original_amount <= MAX_SCALE_RATIO:
+            continue
+        content, changed = rescale_dollar_amounts(entry.content, original_amount, investment_amount)
+        cache.record_hit(entry.key)
+        entry.note = f"rescaled {changed} position sizes from ${original_amount:,.2f}"
+        entry.content = (
+            f"> ♻️ Reused analysis for ${original_amount:,.2f} from {entry.age_seconds / 60:.0f} min ago, "
+            f"position sizes rescaled to ${investment_amount:,.2f}.\n\n{content}"
+        )
+        return entry
+    return None
+
+_incremental_store = None
+
+def get_incremental_store():
+    """Recorded symbol inputs and stage results for incremental re-analysis"""
+    global _incremental_store
+    if _incremental_store is None:
+        _incremental_store = IncrementalStore(db_file="financial_intelligence.db", namespace="portfolio")
+    return _incremental_store
+
+_news_ingestor = None
+
+def get_news_ingestor():
+    """Incrementally fetched, deduplicated and pre-scored news for the sentiment analyst"""
+    global _news_ingestor
+    if _news_ingestor is None:
+        _news_ingestor = NewsIngestor(db_file="financial_intelligence.db")
+    return _news_ingestor
+
+def analyze_portfolio_incremental(symbols, investment_amount, fetch_inputs=fetch_symbol_inputs):
+    """Re-analyze a portfolio, recomputing only what changed since the last run
+
+    Each symbol gets its own stock analysis stage from the Market Data Analyst,
+    rerun only when its price, fundamentals or headlines changed. The team then
+    builds the portfolio view on top of those analyses, rerun only when one of
+    them or the amount changed.
+    """
+    
+    team = create_financial_intelligence_team()
+    market_analyst = next(m for m in team.members if m.name == "Market Data Analyst")
+    run = IncrementalRun(get_incremental_store(), symbols, fetch_inputs)
+    
+    print("🏦 Starting Incremental Financial Intelligence Analysis...")
+    print("=" * 60)
+    
+    news = get_news_ingestor()
+    print(news.ingest(symbols).summary())
+    
+    stock_stages = []
+    for symbol in symbols:
+        stage = f"stock_analysis:{symbol}"
+        run.stage(stage, lambda symbol=symbol: market_analyst.run(f"""
+        Analyze {symbol} as part of an investment portfolio.
+        Cover recent performance, financial metrics (P/E, ROE, revenue growth, market cap),
+        analyst recommendations and the latest news, and end with a BUY/HOLD/SELL call and price target.
+        
+        {news.brief([symbol], refresh=False)}
+        """), symbol=symbol)
+        stock_stages.append(stage)
+    
+    stock_analyses = "\n\n".join(f"### {stage.split(':')[1]}\n{run.result(stage)}" for stage in stock_stages)
+    news_brief = news.brief(symbols, refresh=False)
+    portfolio = run.stage(f"portfolio:{','.join(symbols)}", lambda: team.run(f"""
+    Conduct comprehensive investment analysis for the following portfolio:
+    
+    Symbols: {', '.join(symbols)}
+    Investment Amount: ${investment_amount:,.2f}
+    
+    Individual stock analyses (already completed; build on them rather than repeating them):
+    {stock_analyses}
+    
+    {news_brief}
+    
+    Please provide:
+    1. Market sentiment analysis and news impact assessment
+    2. Portfolio risk evaluation with quantitative measures
+    3. Optimal allocation strategy with specific percentages
+    4. Executive summary with actionable investment recommendations
+    
+    Ensure analysis meets institutional investment standards.
+    """), depends_on=stock_stages, params={"investment_amount": round(float(investment_amount), 2)})
+    run.finish()
+    
+    print("\n" + "=" * 60)
+    print("🎯 Analysis Complete!")
+    print(run.report.summary())
+    print_last_trace()
+    
+    return IncrementalResult(content=f"{run.report.note()}\n\n{stock_analyses}\n\n{portfolio}", report=run.report)
+
+def analyze_portfolio(symbols, investment_amount=100000, use_cache=True, incremental=False):
+    """Analyze a portfolio of stocks
+
+    Requests are canonicalized (symbol order and case do not matter) and answered
+    from the request cache while the result is fresh: 15 minutes during market
+    hours, until the next open otherwise.
+
+    With `incremental`, the request cache is bypassed and the analysis is
+    refreshed stage by stage instead (see `analyze_portfolio_incremental`).
+    """
+    
+    symbols = canonical_symbols(symbols)
+    
+    if incremental:
+        with metered_run("financial", symbols=symbols, investment_amount=float(investment_amount)) as run:
+            result = analyze_portfolio_incremental(symbols, investment_amount)
+            run.record.stages_recomputed = len(result.report.recomputed)
+            run.record.stages_reused = len(result.report.reused)
+            run.content = result.content
+        return result
+    
+    if use_cache:
+        cached = find_cached_analysis(symbols, investment_amount)
+        if cached:
+            print(f"⚡ Cache hit for {', '.join(symbols)} ({cached.note})")
+            return cached
     
     team = create_financial_intelligence_team()
     
@@ -182,6 +201,8 @@ def analyze_portfolio(symbols, investment_amount=100000):
     Symbols: {', '.join(symbols)}
     Investment Amount: ${investment_amount:,.2f}
     
+    {get_news_ingestor().brief(symbols)}
+    
     Please provide:
     1. Individual stock analysis with financial metrics and recommendations
     2. Market sentiment analysis and news impact assessment
@@ -195,10 +216,22 @@ def analyze_portfolio(symbols, investment_amount=100000):
     print("🏦 Starting Financial Intelligence Analysis...")
     print("=" * 60)
     
-    response = team.run(query)
+    with metered_run("financial", symbols=symbols, investment_amount=float(investment_amount)) as run:
+        response = team.run(query)
+        run.content = str(response.content)
+    
+    if use_cache and response.content:
+        get_request_cache().put(
+            "portfolio",
+            {"symbols": symbols, "investment_amount": round(float(investment_amount), 2)},
+            str(response.content),
+            ttl=market_ttl(),
+            group=",".join(symbols),
+        )
     
     print("\n" + "=" * 60)
     print("🎯 Analysis Complete!")
+    print_last_trace()
     
     return response
 
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Watchlist Monitor - Continuous monitoring for the Financial Intelligence Platform
+Polls a large watchlist cheaply (batched daily bars, rotating headline checks),
+computes change signals locally and wakes the agent team only for symbols
+that cross a threshold.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.incremental import fetch_headlines
+from shared.job_queue import QUEUED, RUNNING, JobQueue
+from shared.market_hours import MARKET_CLOSE, MARKET_OPEN, MARKET_TZ, is_market_open, market_ttl
+from shared.request_cache import canonical_symbols
+
+load_dotenv()
+
+# Symbols per batched price download
+DOWNLOAD_CHUNK = 200
+# Trading days each day's move is measured against
+SIGNAL_WINDOW = 20
+# Early in the session volume is front-loaded, so it is never projected from less than this share of the day
+MIN_SESSION_FRACTION = 0.25
+
+@dataclass
+class Thresholds:
+    """Signal levels that wake the agent team for a symbol"""
+    return_z: float = 3.0          # today's return in standard deviations of the trailing window
+    volume_ratio: float = 3.0      # projected volume over the trailing median volume
+    new_headlines: int = 2         # headlines not seen at the previous check
+    cooldown: float = 4 * 3600     # seconds before a symbol can trigger again
+    escalation: float = 1.5        # ...unless its score reaches this multiple of the last trigger's
+
+@dataclass
+class Signal:
+    """Change signals of one symbol that crossed a threshold"""
+    symbol: str
+    bar: str                       # date of the daily bar the price signals were measured on
+    return_pct: float
+    return_z: float
+    volume_ratio: float
+    new_headlines: List[str] = field(default_factory=list)
+    score: float = 0.0             # largest signal as a multiple of its threshold
+    reasons: List[str] = field(default_factory=list)
+
+@dataclass
+class CycleReport:
+    """What one polling cycle looked at and did"""
+    symbols: int
+    news_checked: int
+    triggered: List[Signal] = field(default_factory=list)
+    coalesced: List[Tuple[Signal, str]] = field(default_factory=list)
+    deferred: List[Signal] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        line = (f"👀 {datetime.now():%H:%M:%S} {self.symbols} symbols, {self.news_checked} news checks in "
+                f"{self.elapsed:.1f}s: {len(self.triggered)} triggered, {len(self.coalesced)} coalesced, "
+                f"{len(self.deferred)} deferred")
+        details = [f"  🚨 {s.symbol} ({s.score:.1f}x) - {'; '.join(s.reasons)}" for s in self.triggered]
+        details += [f"  🔕 {s.symbol} - {reason}" for s, reason in self.coalesced]
+        return "\n".join([line] + details)
+
+def load_watchlist(path: str) -> List[str]:
+    """Symbols from a file, separated by commas or whitespace; `#` starts a comment"""
+    with open(path, encoding="utf-8") as f:
+        text = "\n".join(line.split("#", 1)[0] for line in f)
+    return canonical_symbols(re.split(r"[\s,]+", text.strip())) if text.strip() else []
+
+def download_bars(symbols: List[str], period: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Daily closes and volumes (dates x symbols) from Yahoo Finance, in batched downloads"""
+    import yfinance as yf
+
+    closes, volumes = [], []
+    for start in range(0, len(symbols), DOWNLOAD_CHUNK):
+        data = yf.download(symbols[start:start + DOWNLOAD_CHUNK], period=period, interval="1d",
+                           auto_adjust=True, progress=False, group_by="column", multi_level_index=True)
+        if data is not None and not data.empty:
+            closes.append(data["Close"])
+            volumes.append(data["Volume"])
+    if not closes:
+        return pd.DataFrame(), pd.DataFrame()
+    return pd.concat(closes, axis=1), pd.concat(volumes, axis=1)
+
+class MarketDataCache:
+    """Daily bars for the watchlist
+
+    The trailing history is downloaded once per day. Today's bar is refreshed at
+    most every `quote_ttl` seconds while the market is open, and not at all
+    while it is closed.
+    """
+
+    def __init__(self, symbols: List[str], fetch_bars: Callable = download_bars, quote_ttl: float = 300.0):
+        self.symbols = symbols
+        self.fetch_bars = fetch_bars
+        self.quote_ttl = quote_ttl
+        self._history: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None
+        self._history_date = None
+        self._today: Tuple[pd.DataFrame, pd.DataFrame] = (pd.DataFrame(), pd.DataFrame())
+        self._today_expires = 0.0
+
+    def _split(self, closes: pd.DataFrame, volumes: pd.DataFrame, today) -> Tuple[tuple, tuple]:
+        # An empty download has a plain RangeIndex, which cannot be normalized to dates
+        if closes.empty or not isinstance(closes.index, pd.DatetimeIndex):
+            empty = (pd.DataFrame(), pd.DataFrame())
+            return empty, empty
+        is_today = closes.index.normalize() == pd.Timestamp(today)
+        return (closes[~is_today], volumes[~is_today]), (closes[is_today], volumes[is_today])
+
+    def frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Closes and volumes up to and including today's bar, if the market has opened"""
+        today = datetime.now(MARKET_TZ).date()
+        if self._history_date != today:
+            self._history, self._today = self._split(*self.fetch_bars(self.symbols, "3mo"), today)
+            # A failed download is retried next cycle instead of leaving the day without history
+            self._history_date = today if not self._history[0].empty else None
+            self._today_expires = time.time() + market_ttl(open_ttl=self.quote_ttl)
+        elif time.time() >= self._today_expires:
+            _, self._today = self._split(*self.fetch_bars(self.symbols, "1d"), today)
+            self._today_expires = time.time() + market_ttl(open_ttl=self.quote_ttl)
+        if self._today[0].empty:
+            return self._history
+        return pd.concat([self._history[0], self._today[0]]), pd.concat([self._history[1], self._today[1]])
+
+def session_fraction(now: Optional[datetime] = None) -> float:
+    """Share of the regular session elapsed, for projecting today's partial volume"""
+    now = now or datetime.now(MARKET_TZ)
+    if not is_market_open(now):
+        return 1.0
+    opened = now.replace(hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0)
+    closes = now.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0)
+    return max((now - opened) / (closes - opened), MIN_SESSION_FRACTION)
+
+def compute_signals(closes: pd.DataFrame, volumes: pd.DataFrame, fraction: float = 1.0) -> pd.DataFrame:
+    """Return z-score and volume ratio of each symbol's latest bar against the trailing window
+
+    `fraction` is the share of the session the latest bar covers; its volume
+    is projected to a full day. Symbols with too little history get NaN, and
+    with fewer than two bars there are no signals at all.
+    """
+    if len(closes) < 2:
+        return pd.DataFrame(columns=["return_pct", "return_z", "volume_ratio"], dtype=float)
+    returns = closes.pct_change(fill_method=None)
+    window = returns.iloc[-SIGNAL_WINDOW - 1:-1]
+    latest = returns.iloc[-1]
+    return_z = (latest - window.mean()) / window.std().replace(0, np.nan)
+    median_volume = volumes.iloc[-SIGNAL_WINDOW - 1:-1].median().replace(0, np.nan)
+    volume_ratio = volumes.iloc[-1] / fraction / median_volume
+    enough = window.count() >= SIGNAL_WINDOW // 2
+    return pd.DataFrame({
+        "return_pct": latest * 100,
+        "return_z": return_z.where(enough),
+        "volume_ratio": volume_ratio.where(enough),
+    })
+
+class WatchlistState:
+    """Seen headlines, last triggers and the trigger log in the platform database"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS watchlist_symbols (symbol TEXT PRIMARY KEY, headlines TEXT, "
+                         "news_checked_at REAL, triggered_at REAL, trigger_bar TEXT, trigger_score REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS watchlist_events (at REAL, symbol TEXT, score REAL, reasons TEXT)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self) -> Dict[str, Dict]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT symbol, headlines, news_checked_at, triggered_at, trigger_bar, trigger_score "
+                                "FROM watchlist_symbols").fetchall()
+        return {row[0]: {"headlines": json.loads(row[1]) if row[1] else None, "news_checked_at": row[2],
+                         "triggered_at": row[3], "trigger_bar": row[4], "trigger_score": row[5]} for row in rows}
+
+    def save_headlines(self, checked: Dict[str, List[str]]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO watchlist_symbols (symbol, headlines, news_checked_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET headlines = excluded.headlines, "
+                "news_checked_at = excluded.news_checked_at",
+                [(symbol, json.dumps(headlines), now) for symbol, headlines in checked.items()],
+            )
+
+    def record(self, triggered: List[Signal]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO watchlist_symbols (symbol, triggered_at, trigger_bar, trigger_score) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET triggered_at = excluded.triggered_at, "
+                "trigger_bar = excluded.trigger_bar, trigger_score = excluded.trigger_score",
+                [(s.symbol, now, s.bar, s.score) for s in triggered],
+            )
+            conn.executemany("INSERT INTO watchlist_events VALUES (?, ?, ?, ?)",
+                             [(now, s.symbol, s.score, "; ".join(s.reasons)) for s in triggered])
+
+    def recent_events(self, limit: int = 20) -> List[tuple]:
+        with self._connect() as conn:
+            return conn.execute("SELECT at, symbol, score, reasons FROM watchlist_events "
+                                "ORDER BY at DESC LIMIT ?", (limit,)).fetchall()
+
+class WatchlistMonitor:
+    """Polling loop that wakes `on_trigger` for symbols whose signals cross `thresholds`
+
+    Each cycle computes price signals for the whole watchlist from cached daily
+    bars and checks headlines for `news_per_cycle` symbols, those with elevated
+    price signals first, then those checked longest ago. Crossing symbols are
+    coalesced: a symbol does not trigger again within the cooldown, nor for a
+    price move on a bar it already triggered on, unless its score has escalated.
+    At most `max_triggers` symbols, the strongest, are dispatched per cycle;
+    the rest are deferred to the next cycle.
+    """
+
+    def __init__(self, symbols: List[str], on_trigger: Callable[[List[Signal]], None],
+                 thresholds: Optional[Thresholds] = None, db_file: str = "financial_intelligence.db",
+                 news_per_cycle: int = 50, max_triggers: int = 5, quote_ttl: float = 300.0,
+                 fetch_bars: Callable = download_bars, fetch_news: Callable[[str], List[str]] = fetch_headlines):
+        self.symbols = canonical_symbols(symbols)
+        self.on_trigger = on_trigger
+        self.thresholds = thresholds or Thresholds()
+        self.news_per_cycle = news_per_cycle
+        self.max_triggers = max_triggers
+        self.fetch_news = fetch_news
+        self.market_data = MarketDataCache(self.symbols, fetch_bars, quote_ttl)
+        self.state = WatchlistState(db_file)
+
+    def _check_news(self, symbols: List[str], state: Dict[str, Dict]) -> Tuple[Dict, Dict]:
+        """Fetched and new headlines per checked symbol; the first check of a symbol only sets a baseline"""
+        def fetch(symbol):
+            try:
+                return self.fetch_news(symbol)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            fetched = {s: h for s, h in zip(symbols, pool.map(fetch, symbols)) if h is not None}
+        new = {}
+        for symbol, headlines in fetched.items():
+            seen = (state.get(symbol) or {}).get("headlines")
+            if seen is not None:
+                new[symbol] = [h for h in headlines if h not in set(seen)]
+        return fetched, new
+
+    def _coalesce(self, signal: Signal, record: Optional[Dict]) -> Optional[str]:
+        """Why a crossing signal is not dispatched, or None to dispatch it"""
+        if not record or record["triggered_at"] is None:
+            return None
+        if signal.score >= record["trigger_score"] * self.thresholds.escalation:
+            return None
+        if not signal.new_headlines and signal.bar == record["trigger_bar"]:
+            return f"already triggered on the {signal.bar} bar"
+        remaining = self.thresholds.cooldown - (time.time() - record["triggered_at"])
+        if remaining > 0:
+            return f"cooling down, {remaining / 60:.0f} min left"
+        return None
+
+    def poll_once(self) -> CycleReport:
+        started = time.perf_counter()
+        t = self.thresholds
+        closes, volumes = self.market_data.frames()
+        partial = not closes.empty and closes.index[-1].date() == datetime.now(MARKET_TZ).date()
+        signals = compute_signals(closes, volumes, session_fraction() if partial else 1.0)
+        bar = closes.index[-1].strftime("%Y-%m-%d") if not closes.empty else ""
+        price_score = pd.concat([signals["return_z"].abs() / t.return_z, signals["volume_ratio"] / t.volume_ratio],
+                                axis=1).max(axis=1).fillna(0).reindex(self.symbols, fill_value=0.0)
+
+        state = self.state.load()
+        news_order = sorted(self.symbols, key=lambda s: (price_score[s] < 0.5,
+                                                         (state.get(s) or {}).get("news_checked_at") or 0))
+        fetched, new_headlines = self._check_news(news_order[:self.news_per_cycle], state)
+
+        crossing = []
+        for symbol in self.symbols:
+            headlines = new_headlines.get(symbol, [])
+            score = max(price_score[symbol], len(headlines) / t.new_headlines)
+            if score < 1:
+                continue
+            row = signals.loc[symbol] if symbol in signals.index else None
+            signal = Signal(symbol, bar, *(float(row[c]) if row is not None else float("nan")
+                                           for c in ("return_pct", "return_z", "volume_ratio")),
+                            new_headlines=headlines, score=score)
+            if abs(signal.return_z) >= t.return_z:
+                signal.reasons.append(f"return {signal.return_pct:+.1f}% ({signal.return_z:+.1f}σ)")
+            if signal.volume_ratio >= t.volume_ratio:
+                signal.reasons.append(f"volume {signal.volume_ratio:.1f}x median")
+            if len(headlines) >= t.new_headlines:
+                signal.reasons.append(f"{len(headlines)} new headlines: '{headlines[0][:80]}'")
+            crossing.append(signal)
+
+        report = CycleReport(symbols=len(self.symbols), news_checked=len(news_order[:self.news_per_cycle]))
+        for signal in sorted(crossing, key=lambda s: s.score, reverse=True):
+            reason = self._coalesce(signal, state.get(signal.symbol))
+            if reason:
+                report.coalesced.append((signal, reason))
+            elif len(report.triggered) < self.max_triggers:
+                report.triggered.append(signal)
+            else:
+                report.deferred.append(signal)
+
+        # Deferred symbols keep their old headline baseline, so their news still counts as new next cycle
+        deferred = {signal.symbol for signal in report.deferred}
+        self.state.save_headlines({s: h for s, h in fetched.items() if s not in deferred})
+        self.state.record(report.triggered)
+        if report.triggered:
+            try:
+                self.on_trigger(report.triggered)
+            except Exception:
+                # The triggers are already recorded; a failing handler must not stop the monitor
+                print(f"❌ on_trigger failed for {', '.join(s.symbol for s in report.triggered)}")
+                traceback.print_exc(limit=5)
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def run(self, interval: float = 300.0, cycles: Optional[int] = None):
+        """Poll every `interval` seconds until interrupted, or for `cycles` cycles
+
+        A cycle that fails (a download or database error) is reported and the
+        loop keeps polling.
+        """
+        print(f"📡 Monitoring {len(self.symbols)} symbols every {interval:.0f}s")
+        print("=" * 60)
+        cycle = 0
+        try:
+            while cycles is None or cycle < cycles:
+                started = time.perf_counter()
+                try:
+                    print(self.poll_once().summary())
+                except Exception:
+                    print(f"❌ {datetime.now():%H:%M:%S} poll failed, retrying in {interval:.0f}s")
+                    traceback.print_exc(limit=5)
+                cycle += 1
+                if cycles is None or cycle < cycles:
+                    time.sleep(max(interval - (time.perf_counter() - started), 0))
+        except KeyboardInterrupt:
+            print("🛑 Monitor stopped")
+
+def analyze_triggered(signals: List[Signal], investment_amount: float = 100000):
+    """Wake the financial intelligence team for each triggered symbol, in this process"""
+    from financial_intelligence import analyze_portfolio
+
+    for signal in signals:
+        print(f"🚨 {signal.symbol}: {'; '.join(signal.reasons)}")
+        result = analyze_portfolio([signal.symbol], investment_amount, incremental=True)
+        print(result.content)
+
+class QueueTrigger:
+    """Hand triggered symbols to job queue workers instead of analyzing them in the monitor
+
+    A symbol whose previous job is still queued or running is not enqueued again.
+    """
+
+    def __init__(self, queue: JobQueue, investment_amount: float = 100000, priority: int = 1):
+        self.queue = queue
+        self.investment_amount = investment_amount
+        self.priority = priority
+        self.jobs: Dict[str, int] = {}
+
+    def __call__(self, signals: List[Signal]):
+        for signal in signals:
+            job = self.queue.get(self.jobs[signal.symbol]) if signal.symbol in self.jobs else None
+            if job and job.status in (QUEUED, RUNNING):
+                print(f"🔕 {signal.symbol}: job {job.id} still {job.status}")
+                continue
+            self.jobs[signal.symbol] = self.queue.enqueue(
+                "financial", {"symbols": [signal.symbol], "investment_amount": self.investment_amount,
+                              "incremental": True}, priority=self.priority)
+            print(f"📥 {signal.symbol}: queued job {self.jobs[signal.symbol]} ({'; '.join(signal.reasons)})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch a symbol list and analyze only the symbols that move")
+    parser.add_argument("watchlist", nargs="?", help="file of symbols separated by commas or whitespace")
+    parser.add_argument("--interval", type=float, default=300.0, help="seconds between polls")
+    parser.add_argument("--cycles", type=int, help="stop after this many polls")
+    parser.add_argument("--amount", type=float, default=100000, help="investment amount for triggered analyses")
+    parser.add_argument("--enqueue", action="store_true", help="queue analyses for job_runner workers")
+    parser.add_argument("--news-per-cycle", type=int, default=50)
+    parser.add_argument("--max-triggers", type=int, default=5, help="analyses started per poll")
+    parser.add_argument("--return-z", type=float, default=Thresholds.return_z)
+    parser.add_argument("--volume-ratio", type=float, default=Thresholds.volume_ratio)
+    parser.add_argument("--new-headlines", type=int, default=Thresholds.new_headlines)
+    parser.add_argument("--cooldown-hours", type=float, default=Thresholds.cooldown / 3600)
+    parser.add_argument("--events", action="store_true", help="show recent triggers and exit")
+    args = parser.parse_args()
+
+    if args.events:
+        for at, symbol, score, reasons in WatchlistState("financial_intelligence.db").recent_events():
+            print(f"{datetime.fromtimestamp(at):%Y-%m-%d %H:%M}  {symbol:<6} {score:4.1f}x  {reasons}")
+        raise SystemExit
+    if not args.watchlist:
+        parser.error("a watchlist file is required")
+
+    thresholds = Thresholds(return_z=args.return_z, volume_ratio=args.volume_ratio,
+                            new_headlines=args.new_headlines, cooldown=args.cooldown_hours * 3600)
+    on_trigger = (QueueTrigger(JobQueue(), args.amount) if args.enqueue
+                  else lambda signals: analyze_triggered(signals, args.amount))
+    monitor = WatchlistMonitor(load_watchlist(args.watchlist), on_trigger, thresholds,
+                               news_per_cycle=args.news_per_cycle, max_triggers=args.max_triggers)
+    monitor.run(args.interval, args.cycles)
@@ -5,155 +5,63 @@ Simple local development version
 """
 
 import os
+import sys
 import time
 from datetime import datetime
-from typing import List, Iterator, Dict, Any
+from typing import List, Iterator, Dict, Any, Optional
 from dotenv import load_dotenv
 from agno.agent import Agent
 # Removed Workflow import - implementing custom workflow pattern
-from agno.models.openai import OpenAIChat
-from agno.tools.yfinance import YFinanceTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.reasoning import ReasoningTools
-from agno.storage.sqlite import SqliteStorage
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.analytics_store import RunRecord, record_run
+from shared.budget import BudgetExceeded, PartialResponse, RunBudget
+from shared.hedging import get_hedger
+from shared.incremental import IncrementalRun, IncrementalStore, fetch_symbol_inputs
+from shared.news_ingest import NewsIngestor
+from shared.platform_factory import PlatformFactory
 
 # Load environment variables
 load_dotenv()
 
+# Default limits for one workflow run; past 60% of any of them the run degrades
+WORKFLOW_BUDGET = {"max_tokens": 400_000, "max_dollars": 3.00, "max_seconds": 900}
+
 class SelfImprovingInvestmentWorkflow:
     """Level 5 workflow with self-improvement capabilities"""
     
-    def __init__(self, session_id: str = None, quality_threshold: float = 0.85, max_iterations: int = 3):
+    def __init__(self, session_id: str = None, quality_threshold: float = 0.85, max_iterations: int = 3,
+                 budget: Optional[RunBudget] = None, profile: Optional[str] = None, incremental: bool = False,
+                 fetch_inputs=fetch_symbol_inputs, hedge: bool = False):
         
         self.session_id = session_id or f"workflow_{int(time.time())}"
         self.quality_threshold = quality_threshold
         self.max_iterations = max_iterations
+        self.budget = budget or RunBudget(**WORKFLOW_BUDGET)
         self.session_state = {}
         self.iteration_count = 0
         self.quality_history = []
-        
-        # Shared storage for state persistence
-        self.storage = SqliteStorage(table_name="workflow_sessions", db_file="investment_workflow.db")
+        # Incremental mode reuses each stage whose inputs are unchanged since the last run
+        self.incremental = incremental
+        self.fetch_inputs = fetch_inputs
+        self.incremental_run = None
+        
+        # Agents and their shared storage are defined in investment_workflow.toml
+        # Hedged model calls keep one slow response from stalling a stage on the critical path
+        self.hedge = hedge
+        factory = PlatformFactory.for_script(__file__, profile=profile, model_kwargs={"hedge": True} if hedge else None)
+        self.storage = factory.storage()
+        # Pre-scored news sentiment for the researcher, kept next to the agent sessions
+        self.news = NewsIngestor(self.storage.db_engine.url.database)
         
         # Initialize agents
-        self.market_researcher = Agent(
-            name="Market Researcher",
-            role="Comprehensive market research and data analysis",
-            model=OpenAIChat(id="gpt-4o-mini"),
-            tools=[
-                YFinanceTools(
-                    stock_price=True,
-                    stock_fundamentals=True,
-                    company_info=True,
-                    company_news=True
-                ),
-                DuckDuckGoTools(cache_results=True)
-            ],
-            instructions=[
-                "You are a senior market researcher with deep expertise in financial analysis.",
-                "Conduct thorough research on market conditions, company fundamentals, and industry trends.",
-                "Provide comprehensive data-driven insights with quantitative metrics.",
-                "Focus on actionable intelligence for investment decision-making.",
-                "Ensure all analysis is current and based on the latest available data."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
-        
-        self.risk_analyst = Agent(
-            name="Risk Analyst",
-            role="Advanced risk assessment and portfolio optimization",
-            model=OpenAIChat(id="gpt-4o-mini"),
-            tools=[
-                YFinanceTools(stock_fundamentals=True),
-                ReasoningTools(add_instructions=True)
-            ],
-            instructions=[
-                "You are a risk management expert specializing in quantitative analysis.",
-                "Evaluate portfolio risk using modern portfolio theory and advanced metrics.",
-                "Calculate VaR, beta, correlation matrices, and stress test scenarios.",
-                "Provide specific risk mitigation strategies and position sizing recommendations.",
-                "Focus on preserving capital while optimizing risk-adjusted returns."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
-        
-        self.portfolio_optimizer = Agent(
-            name="Portfolio Optimizer",
-            role="Optimal portfolio construction and allocation strategy",
-            model=OpenAIChat(id="gpt-4o-mini"),
-            tools=[ReasoningTools(add_instructions=True)],
-            instructions=[
-                "You are a portfolio optimization expert with advanced quantitative skills.",
-                "Design optimal portfolios using mean-variance optimization and modern techniques.",
-                "Consider constraints, transaction costs, and rebalancing frequencies.",
-                "Provide specific allocation percentages and implementation guidelines.",
-                "Optimize for risk-adjusted returns while meeting investor objectives."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
-        
-        self.quality_evaluator = Agent(
-            name="Quality Evaluator",
-            role="Assess analysis quality and identify improvement opportunities",
-            model=OpenAIChat(id="gpt-4o"),
-            tools=[ReasoningTools(add_instructions=True)],
-            instructions=[
-                "You are a quality assurance expert for investment research.",
-                "Evaluate analysis quality across multiple dimensions: accuracy, completeness, insight depth.",
-                "Identify gaps, weaknesses, and areas for improvement in investment analysis.",
-                "Provide specific recommendations for enhancing analysis quality.",
-                "Maintain high standards consistent with institutional investment research."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
-        
-        self.improvement_strategist = Agent(
-            name="Improvement Strategist",
-            role="Generate targeted improvements for analysis enhancement",
-            model=OpenAIChat(id="gpt-4o"),
-            tools=[ReasoningTools(add_instructions=True)],
-            instructions=[
-                "You are an expert in systematic improvement of investment analysis.",
-                "Generate specific, actionable improvements based on quality assessments.",
-                "Focus on enhancing analytical rigor, depth, and practical utility.",
-                "Provide step-by-step improvement strategies with clear implementation guidance.",
-                "Ensure improvements address identified weaknesses systematically."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
-        
-        self.final_validator = Agent(
-            name="Final Validator",
-            role="Final validation and synthesis of improved analysis",
-            model=OpenAIChat(id="gpt-4o-mini"),
-            tools=[ReasoningTools(add_instructions=True)],
-            instructions=[
-                "You are a senior investment committee member responsible for final validation.",
-                "Review and validate the complete investment analysis for accuracy and completeness.",
-                "Ensure all recommendations are well-supported and actionable.",
-                "Provide final synthesis with executive summary and clear next steps.",
-                "Maintain institutional-grade standards for investment decision-making."
-            ],
-            storage=self.storage,
-            show_tool_calls=True,
-            markdown=True,
-            debug_mode=True
-        )
+        self.market_researcher = factory.build_agent("market_researcher")
+        self.risk_analyst = factory.build_agent("risk_analyst")
+        self.portfolio_optimizer = factory.build_agent("portfolio_optimizer")
+        self.quality_evaluator = factory.build_agent("quality_evaluator")
+        self.improvement_strategist = factory.build_agent("improvement_strategist")
+        self.final_validator = factory.build_agent("final_validator")
     
     def run(self, symbols: List[str], investment_amount: float = 1000000) -> Iterator[str]:
         """Execute the self-improving workflow"""
@@ -165,11 +73,39 @@ class SelfImprovingInvestmentWorkflow:
         print(f"Quality Threshold: {self.quality_threshold}")
         print("=" * 60)
         
+        basket = ",".join(symbols)
+        if self.incremental:
+            store = IncrementalStore(db_file=self.storage.db_engine.url.database, namespace="workflow")
+            self.incremental_run = IncrementalRun(store, symbols, self.fetch_inputs)
+        
         # Stage 1: Market Research
         self.session_state['stage'] = 'market_research'
         print("📊 Stage 1: Market Research")
         
-        research_query = f"""
+        if self.incremental:
+            # Researched per symbol, so an unchanged symbol keeps yesterday's research
+            print(self.news.ingest(symbols).summary())
+            research_stages = []
+            for symbol in symbols:
+                research_stages.append(f"market_research:{symbol}")
+                self._stage(research_stages[-1], self.market_researcher, f"""
+                Conduct comprehensive market research for: {symbol}
+                
+                Provide detailed analysis including:
+                - Current market conditions and trends
+                - Company fundamentals and financial metrics
+                - Industry analysis and competitive positioning
+                - Recent news and market sentiment
+                - Technical and fundamental analysis
+                
+                {self.news.brief([symbol], refresh=False)}
+                """, symbol=symbol)
+            research_content = "\n\n".join(
+                f"### {stage.split(':')[1]}\n{self.incremental_run.result(stage)}" for stage in research_stages
+            )
+        else:
+            research_stages = []
+            research_content = self._stage("market_research", self.market_researcher, f"""
         Conduct comprehensive market research for: {', '.join(symbols)}
         Investment amount: ${investment_amount:,.2f}
         
@@ -179,20 +115,20 @@ class SelfImprovingInvestmentWorkflow:
         - Industry analysis and competitive positioning
         - Recent news and market sentiment
         - Technical and fundamental analysis
-        """
         
-        research_result = self.market_researcher.run(research_query)
-        yield f"✅ Market Research Complete\n\n{research_result.content}"
+        {self.news.brief(symbols)}
+        """)
+        yield f"✅ Market Research Complete\n\n{research_content}"
         
         # Stage 2: Risk Analysis
         self.session_state['stage'] = 'risk_analysis'
         print("\n⚠️ Stage 2: Risk Analysis")
         
-        risk_query = f"""
+        risk_content = self._stage(f"risk_analysis:{basket}", self.risk_analyst, f"""
         Based on the market research, conduct advanced risk analysis for: {', '.join(symbols)}
         
         Market Research Context:
-        {research_result.content}
+        {research_content}
         
         Provide comprehensive risk assessment including:
         - Individual stock risk metrics (beta, volatility, VaR)
@@ -200,22 +136,20 @@ class SelfImprovingInvestmentWorkflow:
         - Stress testing and scenario analysis
         - Risk mitigation strategies
         - Position sizing recommendations
-        """
-        
-        risk_result = self.risk_analyst.run(risk_query)
-        yield f"✅ Risk Analysis Complete\n\n{risk_result.content}"
+        """, depends_on=research_stages)
+        yield f"✅ Risk Analysis Complete\n\n{risk_content}"
         
         # Stage 3: Portfolio Optimization
         self.session_state['stage'] = 'portfolio_optimization'
         print("\n🎯 Stage 3: Portfolio Optimization")
         
-        optimization_query = f"""
+        optimization_content = self._stage(f"portfolio_optimization:{basket}", self.portfolio_optimizer, f"""
         Based on market research and risk analysis, optimize portfolio for: {', '.join(symbols)}
         Investment amount: ${investment_amount:,.2f}
         
         Context:
-        Market Research: {research_result.content[:1000]}...
-        Risk Analysis: {risk_result.content[:1000]}...
+        Market Research: {research_content[:1000]}...
+        Risk Analysis: {risk_content[:1000]}...
         
         Provide optimal portfolio construction including:
         - Specific allocation percentages for each symbol
@@ -223,27 +157,85 @@ class SelfImprovingInvestmentWorkflow:
         - Rebalancing strategy and timeline
         - Implementation guidance
         - Performance expectations
-        """
-        
-        optimization_result = self.portfolio_optimizer.run(optimization_query)
-        yield f"✅ Portfolio Optimization Complete\n\n{optimization_result.content}"
+        """, depends_on=research_stages + [f"risk_analysis:{basket}"], params={"investment_amount": investment_amount})
+        yield f"✅ Portfolio Optimization Complete\n\n{optimization_content}"
         
         # Combine initial analysis
         combined_analysis = f"""
         Market Research:
-        {research_result.content}
+        {research_content}
         
         Risk Analysis:
-        {risk_result.content}
+        {risk_content}
         
         Portfolio Optimization:
-        {optimization_result.content}
+        {optimization_content}
+        """
+        
+        # Stages 4 and 5: quality loop and final validation
+        if self.incremental:
+            # The loop is skipped entirely when the analysis it would refine is unchanged
+            progress = []
+            final_content = self.incremental_run.stage(
+                f"final_validation:{basket}", lambda: self._collect(self._refine(combined_analysis), progress),
+                depends_on=[f"portfolio_optimization:{basket}"],
+                params={"quality_threshold": self.quality_threshold, "max_iterations": self.max_iterations},
+                meta=lambda: {"quality_history": self.quality_history, "iterations": self.iteration_count},
+            )
+            # A reused result brings back the quality scores and iterations that produced it
+            refined = self.incremental_run.meta(f"final_validation:{basket}")
+            self.quality_history = list(refined.get("quality_history", self.quality_history))
+            self.iteration_count = refined.get("iterations", self.iteration_count)
+            yield from progress
+            self.incremental_run.finish()
+            print(self.incremental_run.report.summary())
+            self.session_state['incremental'] = [vars(outcome) for outcome in self.incremental_run.report.outcomes]
+        else:
+            final_content = (yield from self._refine(combined_analysis)).content
+        
+        # Save session state
+        self.session_state['completed_at'] = datetime.now().isoformat()
+        self.session_state['final_quality'] = self.quality_history[-1] if self.quality_history else 0
+        self.session_state['iterations_completed'] = self.iteration_count
+        self.session_state['budget'] = self.budget.usage_summary()
+        if self.hedge:
+            print(get_hedger().summary())
+            self.session_state['hedging'] = get_hedger().report()
+        record_run(RunRecord(
+            "investment_workflow", run_id=self.session_id, symbols=list(symbols),
+            investment_amount=float(investment_amount),
+            quality=self.quality_history[-1] if self.quality_history else None,
+            quality_history=list(self.quality_history), iterations=self.iteration_count,
+            converged=bool(self.quality_history) and self.quality_history[-1] >= self.quality_threshold,
+            stages_recomputed=len(self.incremental_run.report.recomputed) if self.incremental else None,
+            stages_reused=len(self.incremental_run.report.reused) if self.incremental else None,
+        ).with_usage(self.budget), final_content)
+        
+        note = self.budget.note()
+        if note:
+            final_content = f"{note}\n\n{final_content}"
+        if self.incremental:
+            final_content = f"{self.incremental_run.report.note()}\n\n{final_content}"
+        
+        yield f"🎉 Workflow Complete!\n\nFinal Analysis:\n{final_content}"
+    
+    def _refine(self, combined_analysis: str):
+        """Quality loop and final validation; yields progress messages and returns the final response
+        
+        The result is a `PartialResponse` whenever the budget cut anything short.
         """
         
         # Stage 4: Quality Evaluation & Self-Improvement Loop
         current_analysis = combined_analysis
         
         for iteration in range(self.max_iterations):
+            # Improvement rounds are optional; a degraded budget goes straight to final validation
+            if self.budget.degraded:
+                skipped = self.max_iterations - iteration
+                self.budget.note_event("skipped_iterations", skipped)
+                print(f"💸 Budget running low ({self.budget.usage_summary()}) - skipping {skipped} improvement iteration(s)")
+                break
+            
             self.iteration_count = iteration + 1
             
             print(f"\n🔍 Quality Evaluation - Iteration {self.iteration_count}")
@@ -264,7 +256,7 @@ class SelfImprovingInvestmentWorkflow:
             Provide overall quality score (0-1) and specific improvement recommendations.
             """
             
-            quality_result = self.quality_evaluator.run(quality_query)
+            quality_result = self._run_agent(self.quality_evaluator, quality_query)
             
             # Extract quality score (simplified - in production would use structured output)
             quality_score = self._extract_quality_score(quality_result.content)
@@ -292,7 +284,7 @@ class SelfImprovingInvestmentWorkflow:
             Focus on addressing identified weaknesses and gaps.
             """
             
-            improvement_result = self.improvement_strategist.run(improvement_query)
+            improvement_result = self._run_agent(self.improvement_strategist, improvement_query)
             
             # Apply improvements
             improvement_application_query = f"""
@@ -307,8 +299,9 @@ class SelfImprovingInvestmentWorkflow:
             Provide the enhanced analysis incorporating all improvements.
             """
             
-            enhanced_result = self.final_validator.run(improvement_application_query)
-            current_analysis = enhanced_result.content
+            enhanced_result = self._run_agent(self.final_validator, improvement_application_query)
+            if not isinstance(enhanced_result, PartialResponse):
+                current_analysis = enhanced_result.content
             
             yield f"🔄 Iteration {self.iteration_count} - Quality Score: {quality_score:.2f}\n\nImprovements Applied:\n{improvement_result.content}"
         
@@ -328,14 +321,39 @@ class SelfImprovingInvestmentWorkflow:
         4. Risk warnings and disclaimers
         """
         
-        final_result = self.final_validator.run(final_query)
-        
-        # Save session state
-        self.session_state['completed_at'] = datetime.now().isoformat()
-        self.session_state['final_quality'] = self.quality_history[-1] if self.quality_history else 0
-        self.session_state['iterations_completed'] = self.iteration_count
-        
-        yield f"🎉 Workflow Complete!\n\nFinal Analysis:\n{final_result.content}"
+        final_result = self._run_agent(self.final_validator, final_query)
+        if isinstance(final_result, PartialResponse):
+            return PartialResponse(content=current_analysis)
+        if self.budget.events:
+            return PartialResponse(content=final_result.content)
+        return final_result
+    
+    @staticmethod
+    def _collect(generator, progress: List[str]):
+        """Run a generator to completion, keeping what it yields; returns its return value"""
+        while True:
+            try:
+                progress.append(next(generator))
+            except StopIteration as done:
+                return done.value
+    
+    def _stage(self, name: str, agent: Agent, query: str, symbol: Optional[str] = None,
+               depends_on: List[str] = (), params: Optional[Dict[str, Any]] = None) -> str:
+        """Run a stage's agent, or in incremental mode reuse its stored result if the stage's inputs are unchanged"""
+        if not self.incremental:
+            return self._run_agent(agent, query).content
+        return self.incremental_run.stage(name, lambda: self._run_agent(agent, query), symbol=symbol,
+                                          depends_on=depends_on, params=params)
+    
+    def _run_agent(self, agent: Agent, query: str):
+        """Run one agent under the workflow's budget; past the hard limit the stage is skipped"""
+        try:
+            with self.budget.activate():
+                return agent.run(query)
+        except BudgetExceeded:
+            self.budget.note_event("skipped_stages")
+            print(f"💸 Budget exhausted ({self.budget.usage_summary()}) - skipping {agent.name}")
+            return PartialResponse(content=f"_{agent.name} skipped: run budget exhausted._")
     
     def _extract_quality_score(self, quality_text: str) -> float:
         """Extract quality score from quality evaluation text (simplified)"""
@@ -367,21 +385,35 @@ class SelfImprovingInvestmentWorkflow:
         return 0.75
 
 def run_investment_workflow(symbols: List[str], investment_amount: float = 1000000, 
-                          quality_threshold: float = 0.85, max_iterations: int = 3):
-    """Run the self-improving investment workflow"""
+                          quality_threshold: float = 0.85, max_iterations: int = 3,
+                          budget: Optional[RunBudget] = None, profile: Optional[str] = None,
+                          incremental: bool = False, hedge: bool = False):
+    """Run the self-improving investment workflow within a per-run budget (default `WORKFLOW_BUDGET`)
+
+    Stages are printed as they finish; the last one, with the final analysis, is returned.
+    With `incremental`, stages whose inputs are unchanged since the last run are reused.
+    With `hedge`, a model call running past its latency percentile is duplicated and the first answer used.
+    """
     
     workflow = SelfImprovingInvestmentWorkflow(
         quality_threshold=quality_threshold,
-        max_iterations=max_iterations
+        max_iterations=max_iterations,
+        budget=budget,
+        profile=profile,
+        incremental=incremental,
+        hedge=hedge
     )
     
     print("💼 Self-Improving Investment Research Workflow")
     print("=" * 60)
     
     # Execute the workflow and iterate over results
+    stage_result = None
     for stage_result in workflow.run(symbols, investment_amount):
         print(stage_result)
         print("\n" + "=" * 60 + "\n")
+    
+    return stage_result
 
 if __name__ == "__main__":
     # Example usage
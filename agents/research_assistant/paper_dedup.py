@@ -0,0 +1,349 @@
+"""
+Near-Duplicate Paper Detection - Research Assistant Platform
+Collapses arXiv versions, publisher pages and web mirrors of the same paper
+before they reach the analysis agents.
+"""
+
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agno.tools import Toolkit
+from agno.tools.arxiv import ArxivTools
+from agno.tools.duckduckgo import DuckDuckGoTools
+from agno.utils.log import logger
+
+# Identifier patterns
+NEW_ARXIV_ID = re.compile(r"(?<![\d.])(\d{4}\.\d{4,5})(?:v\d+)?(?![\d])", re.IGNORECASE)
+OLD_ARXIV_ID = re.compile(r"\b([a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?\b", re.IGNORECASE)
+ARXIV_CONTEXT = re.compile(r"arxiv", re.IGNORECASE)
+DOI_PATTERN = re.compile(r"(10\.\d{4,9}/[^\s\"'<>]+)", re.IGNORECASE)
+ARXIV_DOI_PREFIX = "10.48550/arxiv."
+
+# Trailing site names that mirrors append to paper titles ("Title | arXiv", "Title - ResearchGate")
+TITLE_SUFFIX = re.compile(r"\s+[|\-–—]\s+[^|\-–—]{1,40}$")
+TITLE_ID_PREFIX = re.compile(r"^\s*\[[^\]]+\]\s*")
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_arxiv_id(value: Optional[str]) -> Optional[str]:
+    """Return the version-less arXiv id found in an id, URL or DOI, if any"""
+    if not value:
+        return None
+    text = value.strip()
+    if text.lower().startswith(ARXIV_DOI_PREFIX):
+        text = text[len(ARXIV_DOI_PREFIX):]
+
+    match = NEW_ARXIV_ID.search(text)
+    if match:
+        return match.group(1)
+    match = OLD_ARXIV_ID.search(text)
+    if match:
+        return match.group(1).lower()
+    return None
+
+
+def normalize_doi(value: Optional[str]) -> Optional[str]:
+    """Return a lower-cased bare DOI from a DOI string or doi.org URL"""
+    if not value:
+        return None
+    match = DOI_PATTERN.search(value)
+    if not match:
+        return None
+    doi = match.group(1).lower().rstrip(".,;)]}")
+    # Publisher landing pages often append /abstract, /full or /pdf to the DOI path
+    doi = re.sub(r"/(abstract|full|pdf|epdf)$", "", doi)
+    return doi
+
+
+def normalize_title(title: str) -> str:
+    """Lower-case a title and strip mirror prefixes, site suffixes and punctuation"""
+    title = TITLE_ID_PREFIX.sub("", title or "")
+    title = TITLE_SUFFIX.sub("", title)
+    title = re.sub(r"[^\w\s]", " ", title.lower())
+    return re.sub(r"\s+", " ", title).strip()
+
+
+@dataclass
+class PaperRecord:
+    """A single search hit for a paper, from arXiv or the web"""
+    title: str
+    abstract: str = ""
+    url: str = ""
+    source: str = "web"
+    arxiv_id: Optional[str] = None
+    doi: Optional[str] = None
+    authors: List[str] = field(default_factory=list)
+    published: Optional[str] = None
+    duplicate_urls: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_arxiv(cls, article: Dict) -> "PaperRecord":
+        """Build a record from an `ArxivTools.search_arxiv_and_return_articles` entry"""
+        doi = None
+        for link in article.get("links") or []:
+            doi = doi or normalize_doi(link)
+        return cls(
+            title=article.get("title", ""),
+            abstract=article.get("summary", "") or "",
+            url=article.get("entry_id") or article.get("pdf_url") or "",
+            source="arxiv",
+            arxiv_id=normalize_arxiv_id(article.get("id") or article.get("entry_id")),
+            doi=doi if doi and not doi.startswith(ARXIV_DOI_PREFIX) else None,
+            authors=list(article.get("authors") or []),
+            published=article.get("published"),
+        )
+
+    @classmethod
+    def from_web(cls, result: Dict) -> "PaperRecord":
+        """Build a record from a `DuckDuckGoTools.duckduckgo_search` result"""
+        title = result.get("title", "")
+        url = result.get("href", "") or ""
+        body = result.get("body", "") or ""
+        haystack = f"{url} {title}"
+
+        arxiv_id = None
+        if ARXIV_CONTEXT.search(haystack) or TITLE_ID_PREFIX.match(title):
+            arxiv_id = normalize_arxiv_id(haystack)
+        doi = normalize_doi(url) or normalize_doi(body)
+        if doi and doi.startswith(ARXIV_DOI_PREFIX):
+            arxiv_id, doi = arxiv_id or normalize_arxiv_id(doi), None
+
+        return cls(title=title, abstract=body, url=url, source="web", arxiv_id=arxiv_id, doi=doi)
+
+    def to_dict(self) -> Dict:
+        return {
+            "title": self.title,
+            "arxiv_id": self.arxiv_id,
+            "doi": self.doi,
+            "url": self.url,
+            "source": self.source,
+            "authors": self.authors,
+            "published": self.published,
+            "abstract": self.abstract,
+            "duplicate_urls": self.duplicate_urls,
+        }
+
+
+class MinHashLSH:
+    """MinHash signatures with banded locality-sensitive hashing"""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 7):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self.signatures: Dict[int, Tuple[int, ...]] = {}
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in set(shingles)
+        ]
+        if not hashes:
+            return tuple([MERSENNE_PRIME] * self.num_perm)
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    def add(self, key: int, shingles: Iterable[str]) -> List[int]:
+        """Index `key` and return previously indexed keys sharing at least one band"""
+        sig = self.signature(shingles)
+        self.signatures[key] = sig
+        candidates = set()
+        for band in range(self.bands):
+            bucket = (band, sig[band * self.rows:(band + 1) * self.rows])
+            members = self._buckets.setdefault(bucket, [])
+            candidates.update(members)
+            members.append(key)
+        return sorted(candidates)
+
+    def similarity(self, a: int, b: int) -> float:
+        """Estimated Jaccard similarity between two indexed keys"""
+        sig_a, sig_b = self.signatures[a], self.signatures[b]
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / self.num_perm
+
+
+def char_shingles(text: str, size: int = 5) -> List[str]:
+    text = text.replace(" ", "_")
+    if len(text) <= size:
+        return [text] if text else []
+    return [text[i:i + size] for i in range(len(text) - size + 1)]
+
+
+def word_shingles(text: str, size: int = 3) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+@dataclass
+class DedupResult:
+    """Canonical papers plus bookkeeping on what was collapsed"""
+    papers: List[PaperRecord]
+    input_count: int
+    clusters: List[List[int]]
+
+    @property
+    def duplicates_removed(self) -> int:
+        return self.input_count - len(self.papers)
+
+
+class PaperDeduplicator:
+    """Collapse copies of the same paper using identifiers first, then MinHash/LSH
+
+    Title and similarity matches never merge clusters whose arXiv ids or DOIs
+    differ: two papers may share a title ("A Survey on Large Language Models").
+    """
+
+    def __init__(self, title_threshold: float = 0.8, content_threshold: float = 0.6,
+                 num_perm: int = 128, bands: int = 32):
+        self.title_threshold = title_threshold
+        self.content_threshold = content_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+
+    def deduplicate(self, papers: List[PaperRecord]) -> DedupResult:
+        parent = list(range(len(papers)))
+        # Identifiers held by each cluster root
+        ids = [{"arxiv": {p.arxiv_id} - {None}, "doi": {p.doi} - {None}} for p in papers]
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int, same_identifier: bool = False) -> None:
+            ri, rj = find(i), find(j)
+            if ri == rj:
+                return
+            if not same_identifier and any(ids[ri][kind] and ids[rj][kind] and not ids[ri][kind] & ids[rj][kind]
+                                           for kind in ("arxiv", "doi")):
+                return
+            root, child = min(ri, rj), max(ri, rj)
+            parent[child] = root
+            for kind in ("arxiv", "doi"):
+                ids[root][kind] |= ids[child][kind]
+
+        # Exact identifier matches
+        seen: Dict[Tuple[str, str], int] = {}
+        for i, paper in enumerate(papers):
+            keys = [("arxiv", paper.arxiv_id), ("doi", paper.doi), ("title", normalize_title(paper.title))]
+            for key in keys:
+                if not key[1]:
+                    continue
+                if key in seen:
+                    union(i, seen[key], same_identifier=key[0] != "title")
+                else:
+                    seen[key] = i
+
+        # Near-duplicate titles and abstracts
+        title_index = MinHashLSH(self.num_perm, self.bands)
+        content_index = MinHashLSH(self.num_perm, self.bands, seed=11)
+        for i, paper in enumerate(papers):
+            title = normalize_title(paper.title)
+            for j in title_index.add(i, char_shingles(title)):
+                if title_index.similarity(i, j) >= self.title_threshold:
+                    union(i, j)
+            for j in content_index.add(i, word_shingles(f"{title} {paper.abstract}")):
+                if content_index.similarity(i, j) >= self.content_threshold:
+                    union(i, j)
+
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(papers)):
+            groups.setdefault(find(i), []).append(i)
+        clusters = list(groups.values())
+
+        return DedupResult(
+            papers=[self._merge([papers[i] for i in cluster]) for cluster in clusters],
+            input_count=len(papers),
+            clusters=clusters,
+        )
+
+    @staticmethod
+    def _merge(copies: List[PaperRecord]) -> PaperRecord:
+        """Keep the most authoritative copy and fold identifiers from the rest into it"""
+        ranked = sorted(copies, key=lambda p: (p.source != "arxiv", p.doi is None, -len(p.abstract)))
+        # Merged into a copy, so the caller's records are left as they were
+        canonical = replace(ranked[0], authors=list(ranked[0].authors), duplicate_urls=list(ranked[0].duplicate_urls))
+        for other in ranked[1:]:
+            canonical.arxiv_id = canonical.arxiv_id or other.arxiv_id
+            canonical.doi = canonical.doi or other.doi
+            if len(other.abstract) > len(canonical.abstract):
+                canonical.abstract = other.abstract
+            if other.url and other.url != canonical.url and other.url not in canonical.duplicate_urls:
+                canonical.duplicate_urls.append(other.url)
+        return canonical
+
+
+class PaperDiscoveryTools(Toolkit):
+    """Combined ArXiv and web paper search that returns each paper exactly once"""
+
+    def __init__(self, arxiv_tools: Optional[ArxivTools] = None,
+                 web_tools: Optional[DuckDuckGoTools] = None,
+                 deduplicator: Optional[PaperDeduplicator] = None, **kwargs):
+        self.arxiv_tools = arxiv_tools or ArxivTools()
+        self.web_tools = web_tools or DuckDuckGoTools(cache_results=True)
+        self.deduplicator = deduplicator or PaperDeduplicator()
+
+        tools = [self.search_papers, self.read_arxiv_papers]
+        super().__init__(name="paper_discovery_tools", tools=tools, **kwargs)
+
+    def search_papers(self, query: str, max_results: int = 10) -> str:
+        """Use this function to search ArXiv and the web for research papers on a query.
+        Copies of the same paper (arXiv versions, publisher pages, mirrors) are merged into one entry.
+
+        Args:
+            query (str): The research topic or keywords to search for.
+            max_results (int, optional): Maximum results to fetch from each source. Defaults to 10.
+
+        Returns:
+            str: A JSON object with the deduplicated papers and how many duplicates were removed.
+        """
+        records: List[PaperRecord] = []
+        try:
+            articles = json.loads(self.arxiv_tools.search_arxiv_and_return_articles(query, max_results))
+            records.extend(PaperRecord.from_arxiv(a) for a in articles)
+        except Exception as e:
+            logger.warning(f"ArXiv search failed for '{query}': {e}")
+        try:
+            results = json.loads(self.web_tools.duckduckgo_search(f"{query} paper", max_results))
+            records.extend(PaperRecord.from_web(r) for r in results)
+        except Exception as e:
+            logger.warning(f"Web search failed for '{query}': {e}")
+
+        result = self.deduplicator.deduplicate(records)
+        return json.dumps({
+            "papers": [paper.to_dict() for paper in result.papers],
+            "results_found": result.input_count,
+            "duplicates_removed": result.duplicates_removed,
+        }, indent=2)
+
+    def read_arxiv_papers(self, id_list: List[str], pages_to_read: Optional[int] = None) -> str:
+        """Use this function to read a list of arxiv papers and return the content.
+
+        Args:
+            id_list (list, str): The list of `id` of the papers to add to the knowledge base.
+                    Should be of the format: ["2103.03404v1", "2103.03404v2"]
+            pages_to_read (int, optional): The number of pages to read from the paper.
+                    None means read all pages. Defaults to None.
+        Returns:
+            str: JSON of the papers.
+        """
+        # Reading two versions of the same paper is the most expensive duplicate of all
+        unique_ids = list(dict.fromkeys(normalize_arxiv_id(i) or i for i in id_list))
+        return self.arxiv_tools.read_arxiv_papers(unique_ids, pages_to_read)
@@ -5,14 +5,16 @@ Simple local development version
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openai import OpenAIChat
-from agno.tools.arxiv import ArxivTools
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.tools.reasoning import ReasoningTools
-from agno.storage.sqlite import SqliteStorage
+
+# Shared platform infrastructure lives in agents/shared
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from shared.budget import BudgetExceeded, PartialResponse, RunBudget, partial_team_result
+from shared.platform_factory import PlatformFactory
+from shared.request_cache import RequestCache, canonical_text, content_terms
+from shared.tracing import print_last_trace
+
 # Simplified imports - using tools instead of knowledge base for demo
 # from agno.knowledge.arxiv import ArxivKnowledge
 # from agno.knowledge.pdf import PdfKnowledge
@@ -21,140 +23,57 @@ from agno.storage.sqlite import SqliteStorage
 # Load environment variables
 load_dotenv()
 
-def create_research_assistant_team():
-    """Create the research assistant team with 6 specialized agents"""
-    
-    # Create storage for team-level use only
-    storage = SqliteStorage(table_name="research_sessions", db_file="research_assistant.db")
-    
-    # Paper Discovery Specialist
-    paper_discoverer = Agent(
-        name="Paper Discovery Specialist",
-        role="Comprehensive research paper discovery across multiple academic sources",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[
-            ArxivTools(),
-            DuckDuckGoTools(cache_results=True),
-            ReasoningTools(add_instructions=True)
-        ],
-        instructions=[
-            "You are a research librarian with expertise in academic paper discovery.",
-            "Search across ArXiv and web sources for relevant research papers.",
-            "Prioritize high-impact journals and recent publications.",
-            "Identify seminal papers and review articles in the field.",
-            "Provide detailed paper metadata including citations and relevance scores."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Paper Analysis Expert
-    paper_analyzer = Agent(
-        name="Paper Analysis Expert",
-        role="In-depth analysis of individual research papers",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are an expert at analyzing academic papers for methodology, contributions, and quality.",
-            "Evaluate research design, novelty, and significance of findings.",
-            "Assess statistical methods, sample sizes, and validity of conclusions.",
-            "Identify key contributions, limitations, and areas for future work.",
-            "Provide structured analysis with quality scoring."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Bias Detection Specialist
-    bias_detector = Agent(
-        name="Bias Detection Specialist",
-        role="Identification of bias and methodological issues in research",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are an expert in research methodology and bias detection.",
-            "Identify potential sources of bias: selection, confirmation, publication, funding.",
-            "Evaluate methodological rigor and experimental design.",
-            "Assess sample representativeness and statistical validity.",
-            "Provide bias risk scores and mitigation recommendations."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Citation Network Analyst
-    citation_analyst = Agent(
-        name="Citation Network Analyst",
-        role="Analysis of citation patterns, research impact, and collaboration networks",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are an expert in scientometrics and citation analysis.",
-            "Analyze citation patterns, research impact, and collaboration networks.",
-            "Identify highly influential papers and researchers in the field.",
-            "Track research trends and emerging topics.",
-            "Provide insights on research community dynamics and knowledge flow."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Literature Synthesis Expert
-    literature_synthesizer = Agent(
-        name="Literature Synthesis Expert",
-        role="Synthesis of research findings into comprehensive literature reviews",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are an expert at synthesizing research literature into coherent narratives.",
-            "Identify common themes, contradictions, and knowledge gaps.",
-            "Track the evolution of research topics over time.",
-            "Provide comprehensive literature reviews with clear structure.",
-            "Suggest future research directions and priorities."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Research Process Coordinator
-    research_coordinator = Agent(
-        name="Research Process Coordinator",
-        role="Orchestration of research activities and quality assurance",
-        model=OpenAIChat(id="gpt-4o-mini"),
-        tools=[ReasoningTools(add_instructions=True)],
-        instructions=[
-            "You are a research director ensuring comprehensive and high-quality analysis.",
-            "Coordinate between different research specialists.",
-            "Ensure all aspects of literature review are covered systematically.",
-            "Maintain academic standards and provide quality control.",
-            "Synthesize findings into actionable research insights."
-        ],
-        show_tool_calls=True,
-        markdown=True
-    )
-    
-    # Create coordinated team
-    team = Team(
-        name="Academic Research Team",
-        mode="coordinate",
-        members=[paper_discoverer, paper_analyzer, bias_detector, citation_analyst, literature_synthesizer, research_coordinator],
-        instructions=[
-            "Work together systematically to conduct comprehensive literature reviews.",
-            "Build upon each other's findings to create thorough research analysis.",
-            "Maintain high academic standards and methodological rigor.",
-            "Identify research gaps and provide actionable insights.",
-            "Deliver publication-quality literature reviews."
-        ],
-        storage=storage,
-        show_tool_calls=True,
-        markdown=True,
-        debug_mode=True
-    )
+def create_research_assistant_team(profile=None):
+    """Create the research assistant team with 6 specialized agents
+
+    Agents, team and storage are defined in research_assistant.toml; see
+    shared/platform_factory.py for the development and production profiles.
+    """
     
-    return team
+    return PlatformFactory.for_script(__file__, profile=profile).build_team()
+
+# Literature moves slowly, so reviews stay reusable for a week
+LITERATURE_REVIEW_TTL = 7 * 24 * 3600
+# Cosine similarity above which a cached topic is a candidate; it is reused only with the same content words
+TOPIC_SIMILARITY_THRESHOLD = 0.85
+# Default limits for one review; past 60% of any of them the review degrades
+LITERATURE_REVIEW_BUDGET = {"max_tokens": 300_000, "max_dollars": 2.00, "max_seconds": 600}
+
+_request_cache = None
+
+def get_request_cache():
+    """Request cache shared by every process using this platform's database"""
+    global _request_cache
+    if _request_cache is None:
+        _request_cache = RequestCache(db_file="research_assistant.db")
+    return _request_cache
 
-def conduct_literature_review(research_topic, max_papers=15):
-    """Conduct a comprehensive literature review"""
+def conduct_literature_review(research_topic, max_papers=15, use_cache=True, budget=None):
+    """Conduct a comprehensive literature review
+
+    A review of the same topic, or a rephrasing of it with the same content
+    words (ranked by local embedding similarity), with the same paper budget
+    is reused while fresh.
+
+    Every model call is charged to `budget` (a `RunBudget`, by default
+    `LITERATURE_REVIEW_BUDGET`). A review that runs low degrades and returns a
+    best-effort result with a budget note; such results are not cached.
+    """
+    
+    params = {"topic": canonical_text(research_topic), "max_papers": max_papers}
+    group = f"max_papers={max_papers}"
+    
+    if use_cache:
+        cache = get_request_cache()
+        terms = content_terms(research_topic)
+        # Close embeddings are not enough: "code review" vs "code generation" scores 0.89
+        cached = cache.get("literature_review", params) or cache.find_similar(
+            "literature_review", research_topic, threshold=TOPIC_SIMILARITY_THRESHOLD, group=group,
+            accept=lambda candidate: content_terms(candidate.params["topic"]) == terms
+        )
+        if cached:
+            print(f"⚡ Reusing literature review on '{cached.params['topic']}' (similarity {cached.similarity:.2f})")
+            return cached
     
     team = create_research_assistant_team()
     
@@ -172,13 +91,31 @@ def conduct_literature_review(research_topic, max_papers=15):
     Ensure the review meets academic publication standards.
     """
     
+    budget = budget or RunBudget(**LITERATURE_REVIEW_BUDGET)
+    
     print("📚 Starting Academic Literature Review...")
     print("=" * 60)
     
-    response = team.run(query)
+    try:
+        with budget.activate():
+            response = team.run(query)
+    except BudgetExceeded:
+        budget.note_event("stopped_early")
+        response = PartialResponse(content=partial_team_result(team))
+    
+    note = budget.note()
+    if note:
+        response.content = f"{note}\n\n{response.content}"
+    elif use_cache and response.content:
+        get_request_cache().put(
+            "literature_review", params, str(response.content),
+            ttl=LITERATURE_REVIEW_TTL, group=group, text=research_topic
+        )
     
     print("\n" + "=" * 60)
     print("🎯 Literature Review Complete!")
+    print(f"💸 Budget used: {budget.usage_summary()}")
+    print_last_trace()
     
     return response
 
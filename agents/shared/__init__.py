@@ -0,0 +1,4 @@
+"""
+Shared infrastructure for the multi-agent platforms.
+Platform scripts add the `agents/` directory to `sys.path` and import from here.
+"""
@@ -0,0 +1,389 @@
+"""
+Analytics Store - Shared Platform Infrastructure
+Structured history of every platform run in a Parquet dataset partitioned by
+date and platform: one row per run (quality, iterations, timings, tokens,
+cost) and one per stock recommendation. Filtered scans read only the
+partitions and columns they need, so trends over months of runs stay fast.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .budget import RunBudget
+
+DEFAULT_ANALYTICS_DIR = os.getenv(
+    "AGENT_ANALYTICS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analytics")
+)
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("platform", pa.string())]), flavor="hive")
+
+RUN_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("symbols", pa.list_(pa.string())),
+    ("investment_amount", pa.float64()),
+    ("quality", pa.float64()),
+    ("quality_history", pa.list_(pa.float64())),
+    ("iterations", pa.int32()),
+    ("converged", pa.bool_()),
+    ("duration_s", pa.float64()),
+    ("model_calls", pa.int32()),
+    ("total_tokens", pa.int64()),
+    ("cost_usd", pa.float64()),
+    ("degraded", pa.bool_()),
+    ("stages_recomputed", pa.int32()),
+    ("stages_reused", pa.int32()),
+])
+
+RECOMMENDATION_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("symbol", pa.string()),
+    ("action", pa.string()),
+    ("target_price", pa.float64()),
+    ("allocation_pct", pa.float64()),
+])
+
+SCHEMAS = {"runs": RUN_SCHEMA, "recommendations": RECOMMENDATION_SCHEMA}
+
+# Text following a symbol, up to the next symbol mentioned, is searched for its recommendation
+MAX_SECTION_CHARS = 600
+ACTION_PATTERN = re.compile(r"\b(?:strong\s+)?(BUY|HOLD|SELL)\b", re.IGNORECASE)
+TARGET_PATTERN = re.compile(r"target(?:\s+price)?[^$\d\n]{0,25}\$\s?([\d,]+(?:\.\d+)?)", re.IGNORECASE)
+ALLOCATION_PATTERN = re.compile(r"(?:allocat\w*|weight\w*|position)[^%\n]{0,40}?(\d{1,3}(?:\.\d+)?)\s?%", re.IGNORECASE)
+
+
+@dataclass
+class RunRecord:
+    """One finished platform run; fields a platform does not have stay None"""
+    platform: str
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    symbols: List[str] = field(default_factory=list)
+    investment_amount: Optional[float] = None
+    quality: Optional[float] = None
+    quality_history: Optional[List[float]] = None
+    iterations: Optional[int] = None
+    converged: Optional[bool] = None
+    duration_s: Optional[float] = None
+    model_calls: Optional[int] = None
+    total_tokens: Optional[int] = None
+    cost_usd: Optional[float] = None
+    degraded: Optional[bool] = None
+    stages_recomputed: Optional[int] = None
+    stages_reused: Optional[int] = None
+
+    def with_usage(self, usage: RunBudget) -> "RunRecord":
+        """Fill timing, token and cost fields from the budget the run was metered with"""
+        self.duration_s = round(usage.elapsed, 3)
+        self.model_calls = usage.calls
+        self.total_tokens = usage.tokens
+        self.cost_usd = round(usage.dollars, 6)
+        self.degraded = bool(usage.events)
+        return self
+
+
+@dataclass
+class Recommendation:
+    """One stock call from a run"""
+    symbol: str
+    action: Optional[str] = None
+    target_price: Optional[float] = None
+    allocation_pct: Optional[float] = None
+
+
+def _number(match: Optional[re.Match]) -> Optional[float]:
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def extract_recommendations(text: str, symbols: List[str]) -> List[Recommendation]:
+    """Best-effort BUY/HOLD/SELL call, price target and allocation per symbol from an analysis
+
+    Each symbol is matched against the text that follows its mentions, up to
+    the next mention of another symbol. Symbols without a call are left out.
+    """
+    text = text or ""
+    symbols = [s.upper() for s in symbols]
+    if not symbols:
+        return []
+    mentions = sorted((m.start(), m.end(), m.group(0).upper()) for m in re.finditer(
+        r"\b(" + "|".join(re.escape(s) for s in symbols) + r")\b", text, re.IGNORECASE))
+    sections: Dict[str, List[str]] = {}
+    for index, (start, end, symbol) in enumerate(mentions):
+        stop = next((s for s, _, other in mentions[index + 1:] if other != symbol), len(text))
+        sections.setdefault(symbol, []).append(text[end:min(stop, end + MAX_SECTION_CHARS)])
+
+    recommendations = []
+    for symbol in symbols:
+        section = "\n".join(sections.get(symbol, []))
+        action = ACTION_PATTERN.search(section)
+        if action is None:
+            continue
+        allocation = _number(ALLOCATION_PATTERN.search(section))
+        recommendations.append(Recommendation(
+            symbol=symbol,
+            action=action.group(1).upper(),
+            target_price=_number(TARGET_PATTERN.search(section)),
+            allocation_pct=allocation if allocation is not None and allocation <= 100 else None,
+        ))
+    return recommendations
+
+
+class AnalyticsStore:
+    """Parquet datasets `runs` and `recommendations` under `root`, partitioned as date=YYYY-MM-DD/platform=NAME
+
+    Each run is written as its own small file, so any number of processes
+    can record at once. `compact()` merges a partition's files into one.
+    """
+
+    def __init__(self, root: str = DEFAULT_ANALYTICS_DIR):
+        self.root = root
+
+    def _partition_dir(self, dataset: str, day: str, platform: str) -> str:
+        return os.path.join(self.root, dataset, f"date={day}", f"platform={platform}")
+
+    def _write(self, dataset: str, rows: List[Dict[str, Any]], day: str, platform: str, name: str):
+        directory = self._partition_dir(dataset, day, platform)
+        os.makedirs(directory, exist_ok=True)
+        # Dataset discovery skips dot-files, so readers only ever see complete files
+        temporary = os.path.join(directory, f".{name}.tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=SCHEMAS[dataset]), temporary)
+        os.replace(temporary, os.path.join(directory, f"{name}.parquet"))
+
+    def record(self, run: RunRecord, recommendations: Optional[List[Recommendation]] = None) -> str:
+        row = asdict(run)
+        platform = row.pop("platform")
+        day = run.timestamp.astimezone(timezone.utc).strftime("%Y-%m-%d")
+        self._write("runs", [row], day, platform, run.run_id)
+        if recommendations:
+            self._write("recommendations", [
+                {"run_id": run.run_id, "timestamp": run.timestamp, **asdict(r)} for r in recommendations
+            ], day, platform, run.run_id)
+        return run.run_id
+
+    def scan(self, dataset: str = "runs", start: Optional[str] = None, end: Optional[str] = None,
+             platforms: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+             filter: Optional[ds.Expression] = None) -> pa.Table:
+        """Rows between `start` and `end` (inclusive YYYY-MM-DD dates) for the given platforms
+
+        Date and platform conditions prune whole partitions; `columns` limits
+        what is read from the files that remain.
+        """
+        path = os.path.join(self.root, dataset)
+        schema = SCHEMAS[dataset].append(pa.field("date", pa.string())).append(pa.field("platform", pa.string()))
+        if not os.path.isdir(path):
+            return schema.empty_table().select(columns) if columns else schema.empty_table()
+        dataset_ = ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=schema)
+        conditions = [condition for condition in (
+            ds.field("date") >= start if start else None,
+            ds.field("date") <= end if end else None,
+            ds.field("platform").isin(platforms) if platforms else None,
+            filter,
+        ) if condition is not None]
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset_.to_table(columns=columns, filter=expression)
+
+    def trend(self, start: Optional[str] = None, end: Optional[str] = None, by: str = "week",
+              platforms: Optional[List[str]] = None) -> pa.Table:
+        """Runs, quality, tokens, cost and duration per period (day, week or month) and platform"""
+        table = self.scan("runs", start, end, platforms,
+                          columns=["timestamp", "platform", "run_id", "quality", "total_tokens", "cost_usd",
+                                   "duration_s", "degraded"])
+        options = {"week_starts_monday": True} if by == "week" else {}
+        period = pc.floor_temporal(table["timestamp"], unit=by, **options)
+        table = table.append_column("period", pc.strftime(period, format="%Y-%m-%d"))
+        return table.group_by(["period", "platform"]).aggregate([
+            ("run_id", "count"),
+            ("quality", "mean"),
+            ("total_tokens", "sum"),
+            ("cost_usd", "sum"),
+            ("cost_usd", "mean"),
+            ("duration_s", "mean"),
+            ("degraded", "sum"),
+        ]).sort_by([("period", "ascending"), ("platform", "ascending")])
+
+    def compact(self, dataset: str = "runs", before: Optional[str] = None) -> int:
+        """Merge each partition's files into one, for partitions dated before `before` (default today)
+
+        Only files present when a partition is read are replaced, so runs
+        recorded meanwhile are kept. Returns the number of files removed.
+        """
+        before = before or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        removed = 0
+        base = os.path.join(self.root, dataset)
+        for day_dir in sorted(os.listdir(base)) if os.path.isdir(base) else []:
+            if not day_dir.startswith("date=") or day_dir[5:] >= before:
+                continue
+            for platform_dir in os.listdir(os.path.join(base, day_dir)):
+                directory = os.path.join(base, day_dir, platform_dir)
+                files = sorted(f for f in os.listdir(directory) if f.endswith(".parquet"))
+                if len(files) < 2:
+                    continue
+                table = pa.concat_tables(pq.read_table(os.path.join(directory, f), schema=SCHEMAS[dataset])
+                                         for f in files)
+                temporary = os.path.join(directory, ".compacted.tmp")
+                pq.write_table(table.sort_by("timestamp"), temporary)
+                os.replace(temporary, os.path.join(directory, f"compacted-{uuid.uuid4().hex[:8]}.parquet"))
+                for f in files:
+                    os.remove(os.path.join(directory, f))
+                removed += len(files) - 1
+        return removed
+
+
+_store: Optional[AnalyticsStore] = None
+
+
+def get_store() -> AnalyticsStore:
+    global _store
+    if _store is None:
+        _store = AnalyticsStore()
+    return _store
+
+
+def record_run(run: RunRecord, content: Optional[str] = None) -> Optional[str]:
+    """Record a finished run, with recommendations extracted from `content`, in the default store
+
+    Set AGENT_ANALYTICS=0 to turn recording off. Recording problems are
+    reported and never fail the run itself.
+    """
+    if os.getenv("AGENT_ANALYTICS", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    try:
+        recommendations = extract_recommendations(content, run.symbols) if content else None
+        return get_store().record(run, recommendations)
+    except Exception as e:
+        print(f"⚠️ Run not recorded in analytics store: {e}")
+        return None
+
+
+@dataclass
+class MeteredRun:
+    """A run inside `metered_run`; set result fields on `record` and the final text as `content`"""
+    record: RunRecord
+    content: Optional[str] = None
+
+
+@contextmanager
+def metered_run(platform: str, **fields: Any) -> Iterator[MeteredRun]:
+    """Meter the model calls made inside the block, then record the run
+
+        with metered_run("financial", symbols=symbols) as run:
+            response = team.run(query)
+            run.content = str(response.content)
+
+    The budget has no limits: it only meters tokens, cost and time for the
+    analytics store. A block that raises is not recorded.
+    """
+    usage = RunBudget()
+    run = MeteredRun(RunRecord(platform, **fields))
+    with usage.activate():
+        yield run
+    record_run(run.record.with_usage(usage), run.content)
+
+
+def _format(table: pa.Table) -> str:
+    rows = table.to_pylist()
+    if not rows:
+        return "(no runs)"
+    columns = table.column_names
+    cells = [[("-" if value is None else f"{value:,.3f}" if isinstance(value, float) else str(value))
+              for value in (row[c] for c in columns)] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.rjust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def benchmark(days: int = 120, runs_per_day: int = 400) -> Dict[str, float]:
+    """Time a quarter-long trend query and a filtered recommendation scan over synthetic runs"""
+    import random
+
+    store = AnalyticsStore(tempfile.mkdtemp(prefix="analytics_bench_"))
+    rng = random.Random(0)
+    platforms = ["financial", "collaborate", "investment_workflow"]
+    start_day = date.today() - timedelta(days=days)
+    try:
+        for offset in range(days):
+            day = start_day + timedelta(days=offset)
+            for platform in platforms:
+                runs, recs = [], []
+                for n in range(runs_per_day // len(platforms)):
+                    stamp = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(seconds=n * 60)
+                    run = RunRecord(platform, timestamp=stamp, symbols=["AAPL", "MSFT"], investment_amount=1e6,
+                                    quality=rng.uniform(0.6, 0.95), iterations=rng.randint(1, 3),
+                                    duration_s=rng.uniform(20, 300), model_calls=rng.randint(5, 40),
+                                    total_tokens=rng.randint(20_000, 400_000), cost_usd=rng.uniform(0.05, 3.0),
+                                    degraded=rng.random() < 0.1)
+                    row = asdict(run)
+                    row.pop("platform")
+                    runs.append(row)
+                    recs += [{"run_id": run.run_id, "timestamp": stamp, "symbol": s,
+                              "action": rng.choice(["BUY", "HOLD", "SELL"]), "target_price": 100.0,
+                              "allocation_pct": 50.0} for s in run.symbols]
+                store._write("runs", runs, day.isoformat(), platform, "compacted")
+                store._write("recommendations", recs, day.isoformat(), platform, "compacted")
+
+        quarter_start = (date.today() - timedelta(days=90)).isoformat()
+        timings = {"runs": days * (runs_per_day // len(platforms)) * len(platforms)}
+        started = time.perf_counter()
+        store.trend(quarter_start, by="week")
+        timings["trend_ms"] = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        store.scan("recommendations", quarter_start, platforms=["financial"], columns=["timestamp", "action"],
+                   filter=ds.field("symbol") == "AAPL")
+        timings["recommendation_scan_ms"] = (time.perf_counter() - started) * 1000
+        return timings
+    finally:
+        shutil.rmtree(store.root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the run history of all platforms")
+    parser.add_argument("command", choices=["trend", "runs", "recommendations", "compact", "bench"])
+    parser.add_argument("--since", help="first date, YYYY-MM-DD (default: 90 days ago)")
+    parser.add_argument("--until", help="last date, YYYY-MM-DD")
+    parser.add_argument("--by", choices=["day", "week", "month"], default="week")
+    parser.add_argument("--platform", action="append", help="only these platforms")
+    parser.add_argument("--symbol", help="recommendations: only this symbol")
+    parser.add_argument("--root", default=DEFAULT_ANALYTICS_DIR)
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.root)
+    since = args.since or (date.today() - timedelta(days=90)).isoformat()
+    if args.command == "trend":
+        print(f"📈 Quality vs Cost by {args.by} since {since}")
+        print("=" * 60)
+        print(_format(store.trend(since, args.until, args.by, args.platform)))
+    elif args.command == "runs":
+        print(_format(store.scan("runs", since, args.until, args.platform, columns=[
+            "timestamp", "platform", "symbols", "quality", "iterations", "total_tokens", "cost_usd", "duration_s"])))
+    elif args.command == "recommendations":
+        print(_format(store.scan("recommendations", since, args.until, args.platform,
+                                 columns=["timestamp", "platform", "symbol", "action", "target_price", "allocation_pct"],
+                                 filter=ds.field("symbol") == args.symbol.upper() if args.symbol else None)))
+    elif args.command == "compact":
+        removed = store.compact("runs") + store.compact("recommendations")
+        print(f"🗜️ Compacted partitions, {removed} files removed")
+    else:
+        print("⏱️ Analytics Store: synthetic run history")
+        print("=" * 60)
+        timings = benchmark()
+        print(f"{timings['runs']:,} runs over 120 days")
+        print(f"Quarterly quality/cost trend by week:   {timings['trend_ms']:7.1f} ms")
+        print(f"One symbol's calls on one platform:     {timings['recommendation_scan_ms']:7.1f} ms")
@@ -0,0 +1,194 @@
+"""
+Run Budgets - Shared Platform Infrastructure
+Per-run limits on tokens, dollars and wall-clock seconds, enforced on every
+model call made while the budget is active. As a budget runs low the run
+degrades instead of failing: cheaper models, trimmed contexts, no further
+tool calls. Callers get a best-effort result plus a note about the budget.
+"""
+
+import contextvars
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agno.models.message import Message
+
+# USD per million tokens (input, output); unknown models are priced like gpt-4o
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+DEFAULT_PRICE = MODEL_PRICES["gpt-4o"]
+
+# Model each id is swapped for once a run is degraded
+CHEAPER_MODELS = {
+    "gpt-4o": "gpt-4o-mini",
+    "gpt-4.1": "gpt-4.1-mini",
+}
+
+WRAP_UP_INSTRUCTION = (
+    "The run budget for this analysis is nearly exhausted. Do not call any tools or delegate further. "
+    "Reply now with your best-effort final answer based only on the information already gathered, "
+    "and state briefly which parts are incomplete."
+)
+
+_current_budget: contextvars.ContextVar[Optional["RunBudget"]] = contextvars.ContextVar("run_budget", default=None)
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a model call is attempted after a run has overrun its hard limit"""
+
+
+@dataclass
+class PartialResponse:
+    """Best-effort result of a run stopped by its budget, shaped like a run response for callers that read `.content`"""
+    content: str
+
+
+def call_cost(model_id: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model_id, DEFAULT_PRICE)
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class RunBudget:
+    """Token, dollar and wall-clock limits for one run; any of them may be None
+
+    Levels, by the largest fraction used of any limit:
+    - below `degrade_at`: normal
+    - from `degrade_at`: degraded. Cheaper models are used, long messages are
+      trimmed to `max_message_chars`, and workflows skip optional iterations.
+    - from 1.0: exhausted. Every model call is told to give its final answer
+      without tools, so the run winds down instead of stopping mid-way.
+    - from `hard_limit`: `BudgetExceeded` is raised for any further call.
+
+    The clock starts on the first `activate()`.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_dollars: Optional[float] = None,
+                 max_seconds: Optional[float] = None, degrade_at: float = 0.6, hard_limit: float = 1.25,
+                 max_message_chars: int = 6000):
+        self.max_tokens = max_tokens
+        self.max_dollars = max_dollars
+        self.max_seconds = max_seconds
+        self.degrade_at = degrade_at
+        self.hard_limit = hard_limit
+        self.max_message_chars = max_message_chars
+        self.tokens = 0
+        self.dollars = 0.0
+        self.calls = 0
+        self.started_at: Optional[float] = None
+        self.events: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self) -> Iterator["RunBudget"]:
+        """Apply this budget to every model call made inside the block"""
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        token = _current_budget.set(self)
+        try:
+            yield self
+        finally:
+            _current_budget.reset(token)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+    def used_fraction(self) -> float:
+        """Largest fraction used across the configured limits"""
+        fractions = [0.0]
+        if self.max_tokens:
+            fractions.append(self.tokens / self.max_tokens)
+        if self.max_dollars:
+            fractions.append(self.dollars / self.max_dollars)
+        if self.max_seconds:
+            fractions.append(self.elapsed / self.max_seconds)
+        return max(fractions)
+
+    @property
+    def degraded(self) -> bool:
+        return self.used_fraction() >= self.degrade_at
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used_fraction() >= 1.0
+
+    def check(self):
+        if self.used_fraction() >= self.hard_limit:
+            raise BudgetExceeded(f"Run budget exceeded: {self.usage_summary()}")
+
+    def record(self, model_id: str, input_tokens: int, output_tokens: int):
+        with self._lock:
+            self.calls += 1
+            self.tokens += input_tokens + output_tokens
+            self.dollars += call_cost(model_id, input_tokens, output_tokens)
+
+    def note_event(self, event: str, count: int = 1):
+        with self._lock:
+            self.events[event] += count
+
+    def trim_messages(self, messages: List[Message]) -> List[Message]:
+        """Copies of `messages` with any content over `max_message_chars` cut down to its head and tail
+
+        Messages are never dropped, so tool calls stay paired with their results.
+        """
+        limit = self.max_message_chars
+        trimmed = []
+        changed = False
+        for message in messages:
+            content = message.content
+            if isinstance(content, str) and len(content) > limit and message.role != "system":
+                cut = len(content) - limit
+                content = (f"{content[:limit * 2 // 3]}\n[... {cut:,} characters trimmed to fit the run budget ...]\n"
+                           f"{content[-limit // 3:]}")
+                message = message.model_copy(update={"content": content})
+                changed = True
+            trimmed.append(message)
+        if changed:
+            self.note_event("trimmed_contexts")
+        return trimmed
+
+    def usage_summary(self) -> str:
+        parts = [f"{self.tokens:,}" + (f" / {self.max_tokens:,} tokens" if self.max_tokens else " tokens"),
+                 f"${self.dollars:.2f}" + (f" / ${self.max_dollars:.2f}" if self.max_dollars else ""),
+                 f"{self.elapsed:.0f}s" + (f" / {self.max_seconds:.0f}s" if self.max_seconds else "")]
+        return " · ".join(parts)
+
+    def note(self) -> Optional[str]:
+        """Markdown note for the result if the run had to degrade, else None"""
+        if not self.events:
+            return None
+        descriptions = {
+            "downgraded_calls": "{} calls switched to a cheaper model",
+            "trimmed_contexts": "{} calls sent with trimmed context",
+            "forced_final_answers": "{} calls told to answer without further tool calls",
+            "skipped_iterations": "{} improvement iterations skipped",
+            "skipped_stages": "{} stages skipped",
+            "stopped_early": "stopped at the hard limit, partial results shown",
+        }
+        steps = [descriptions.get(event, event + ": {}").format(count) for event, count in self.events.items()]
+        return (f"> 💸 **Run budget**: {self.usage_summary()}. "
+                f"The run was degraded to stay within budget" + (f" ({'; '.join(steps)})" if steps else "")
+                + ", so this is a best-effort result.")
+
+
+def current_budget() -> Optional[RunBudget]:
+    return _current_budget.get()
+
+
+def wrap_up_message() -> Message:
+    return Message(role="user", content=WRAP_UP_INSTRUCTION)
+
+
+def partial_team_result(team: Any) -> str:
+    """What the members of an interrupted team run had already delivered"""
+    run_response = getattr(team, "run_response", None)
+    sections = [f"### {response.agent_name or 'Team member'}\n{response.content}"
+                for response in getattr(run_response, "member_responses", None) or [] if response.content]
+    return "\n\n".join(sections) or "_No results were completed within the run budget._"
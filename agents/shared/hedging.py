@@ -0,0 +1,323 @@
+"""
+Hedged Requests - Shared Platform Infrastructure
+A model call still running past its model's latency percentile gets a
+duplicate; whichever answers first wins and the other is cancelled. Hedges
+are capped per model, and the tokens they cost are accounted per model.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+# Calls a model must complete before it is hedged; below that its percentile is noise
+MIN_SAMPLES = 20
+
+
+@dataclass
+class HedgePolicy:
+    """When to hedge: past the `percentile` latency of the model's last `window` calls
+
+    `max_hedge_rate` caps hedges per call (0.05 = at most one call in 20 gets a
+    duplicate), so a slow provider does not double its own load.
+    `min_delay` keeps fast models from being hedged on sub-second jitter.
+    """
+    percentile: float = 95.0
+    max_hedge_rate: float = 0.05
+    min_delay: float = 1.0
+    window: int = 200
+    min_samples: int = MIN_SAMPLES
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        """Defaults overridden by the AGENT_HEDGE_POLICY env var, e.g. '{"percentile": 90}'"""
+        return cls(**json.loads(os.getenv("AGENT_HEDGE_POLICY") or "{}"))
+
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    capped: int = 0
+    extra_tokens: int = 0
+    tokens: int = 0
+
+
+@dataclass
+class RaceOutcome:
+    """The winning attempt's result, plus the losing attempt's task if the call was hedged"""
+    result: Any
+    hedged: bool = False
+    hedge_won: bool = False
+    loser: Optional[asyncio.Task] = None
+
+
+@dataclass
+class _ModelState:
+    latencies: Deque[float]
+    credit: float = 0.0
+    stats: HedgeStats = field(default_factory=HedgeStats)
+
+
+async def _in_context(context: contextvars.Context, coro: Awaitable) -> Any:
+    # Run budget, rate-limit priority and trace span follow the call onto the hedging loop
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+class Hedger:
+    """Per-model latency thresholds, hedge credit and accounting for hedged calls
+
+    Each call adds `max_hedge_rate` credit to its model (up to 2) and a hedge
+    spends 1. Latencies are measured from the first attempt, so a hedged call
+    records how long the caller waited. Synchronous callers run their races on
+    one background event loop, where losing attempts can really be cancelled.
+    """
+
+    def __init__(self, policy: Optional[HedgePolicy] = None):
+        self.policy = policy or HedgePolicy.from_env()
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def configure(self, **policy):
+        """Change the policy, e.g. `configure(percentile=90)`; recorded latencies are kept"""
+        with self._lock:
+            self.policy = HedgePolicy(**{**self.policy.__dict__, **policy})
+
+    def reset(self):
+        with self._lock:
+            self._models = {}
+
+    def _state(self, model_id: str) -> _ModelState:
+        with self._lock:
+            if model_id not in self._models:
+                self._models[model_id] = _ModelState(latencies=deque(maxlen=self.policy.window))
+            return self._models[model_id]
+
+    def delay(self, model_id: str) -> Optional[float]:
+        """Seconds after which a call to the model is hedged; None while too few calls are recorded"""
+        state = self._state(model_id)
+        with self._lock:
+            latencies = sorted(state.latencies)
+        if len(latencies) < self.policy.min_samples:
+            return None
+        index = min(int(len(latencies) * self.policy.percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.policy.min_delay)
+
+    def record(self, model_id: str, seconds: float):
+        state = self._state(model_id)
+        with self._lock:
+            state.latencies.append(seconds)
+
+    def note_tokens(self, model_id: str, tokens: int, extra: bool = False):
+        """Tokens a call used; `extra` for a losing attempt's tokens"""
+        state = self._state(model_id)
+        with self._lock:
+            state.stats.tokens += tokens
+            if extra:
+                state.stats.extra_tokens += tokens
+
+    def _take_credit(self, state: _ModelState) -> bool:
+        with self._lock:
+            if state.credit < 1:
+                state.stats.capped += 1
+                return False
+            state.credit -= 1
+            state.stats.hedged += 1
+            return True
+
+    async def race(self, model_id: str, attempt: Callable[[], Awaitable[Any]]) -> RaceOutcome:
+        """Run `attempt()`, and once it passes the model's threshold a second one; first success wins
+
+        A failed attempt does not end the race while the other is still running.
+        """
+        state = self._state(model_id)
+        with self._lock:
+            state.stats.calls += 1
+            state.credit = min(state.credit + self.policy.max_hedge_rate, 2.0)
+        delay = self.delay(model_id)
+        started = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._take_credit(state):
+                    tasks.append(asyncio.ensure_future(attempt()))
+            winner, pending = None, set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in tasks if task in done and task.exception() is None), None)
+            if winner is None:
+                raise primary.exception()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.record(model_id, time.monotonic() - started)
+        hedge_won = winner is not primary
+        if hedge_won:
+            with self._lock:
+                state.stats.hedge_wins += 1
+        loser = next((task for task in tasks if task is not winner), None)
+        return RaceOutcome(winner.result(), hedged=len(tasks) > 1, hedge_won=hedge_won, loser=loser)
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="hedged-calls", daemon=True).start()
+            return self._loop
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Run a coroutine from synchronous code on the hedging loop and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), self._event_loop())
+        return future.result()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per model: calls, hedge rate, how often the hedge won, threshold and extra tokens spent"""
+        report = {}
+        for model_id in sorted(self._models):
+            delay = self.delay(model_id)
+            with self._lock:
+                stats = HedgeStats(**self._models[model_id].stats.__dict__)
+            report[model_id] = {
+                **stats.__dict__,
+                "hedge_rate": round(stats.hedged / stats.calls, 4) if stats.calls else 0.0,
+                "hedge_win_rate": round(stats.hedge_wins / stats.hedged, 4) if stats.hedged else 0.0,
+                "extra_token_share": round(stats.extra_tokens / stats.tokens, 4) if stats.tokens else 0.0,
+                "threshold_s": round(delay, 3) if delay is not None else None,
+            }
+        return report
+
+    def summary(self) -> str:
+        report = self.report().values()
+        calls, hedged = sum(r["calls"] for r in report), sum(r["hedged"] for r in report)
+        tokens, extra = sum(r["tokens"] for r in report), sum(r["extra_tokens"] for r in report)
+        return (f"🏁 Hedging: {hedged} of {calls} model calls hedged ({sum(r['hedge_wins'] for r in report)} won by "
+                f"the hedge), {extra:,} extra tokens ({extra / tokens if tokens else 0:.1%})")
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """The hedger shared by every model in this process"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
+
+
+def _reset_after_fork():
+    # The hedging loop's thread does not survive a fork
+    global _hedger
+    _hedger = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": max(values)}
+
+
+def benchmark(runs: int = 100, stages: int = 6, threads: int = 4, tail_rate: float = 0.03,
+              median: float = 0.05, sigma: float = 0.5, tail_factor: float = 20.0) -> Dict[str, Dict[str, Any]]:
+    """Sequential stage calls against a mock model with stragglers, without and with hedging
+
+    Each run makes `stages` model calls one after another, like the investment
+    workflow. A share `tail_rate` of calls is `tail_factor` times slower.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from agno.models.message import Message
+
+    from .load_test import LatencyModel, _lift_rate_limits, mock_model_server
+    from .models import ManagedOpenAIChat
+    # The hedger the models use, also when this file runs as __main__
+    from .hedging import get_hedger
+
+    results = {}
+    latency = LatencyModel(median=median, sigma=sigma, tail_rate=tail_rate, tail_factor=tail_factor)
+    environ = dict(os.environ)
+    with mock_model_server(latency) as (url, counters):
+        os.environ.update({"OPENAI_BASE_URL": url, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "mock"})
+        try:
+            _lift_rate_limits()
+            for mode in ("single call", "hedged"):
+                hedger = get_hedger()
+                hedger.reset()
+                # Low floor so the threshold is the mock model's percentile, not the production minimum
+                hedger.configure(min_delay=median)
+                model = ManagedOpenAIChat(id="gpt-4o-mini", hedge=mode == "hedged")
+                sent_before = counters.requests.value
+                call_latencies: List[float] = []
+
+                def run(_):
+                    started = time.perf_counter()
+                    for _ in range(stages):
+                        call_started = time.perf_counter()
+                        model.invoke([Message(role="user", content="Summarize the market research.")])
+                        call_latencies.append(time.perf_counter() - call_started)
+                    return time.perf_counter() - started
+
+                # Warm-up runs so the threshold rests on recorded latencies
+                warmup = -(-MIN_SAMPLES // stages)
+                with ThreadPoolExecutor(threads) as executor:
+                    list(executor.map(run, range(warmup)))
+                    call_latencies.clear()
+                    sent_before = counters.requests.value
+                    run_latencies = list(executor.map(run, range(runs)))
+                stats = hedger.report().get("gpt-4o-mini", {})
+                results[mode] = {
+                    "run": _percentiles(run_latencies),
+                    "call": _percentiles(call_latencies),
+                    "requests": counters.requests.value - sent_before,
+                    "hedge_rate": stats.get("hedge_rate", 0.0),
+                    "hedge_win_rate": stats.get("hedge_win_rate", 0.0),
+                    "extra_token_share": stats.get("extra_token_share", 0.0),
+                }
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure hedged model calls against a heavy-tailed mock model")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--stages", type=int, default=6, help="sequential model calls per run")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--median", type=float, default=0.05, help="mock model median latency in seconds")
+    parser.add_argument("--tail-rate", type=float, default=0.03, help="share of calls that straggle")
+    parser.add_argument("--tail-factor", type=float, default=20.0, help="how much slower a straggler is")
+    args = parser.parse_args()
+
+    print(f"🏁 Hedged Requests: {args.runs} runs of {args.stages} sequential calls, "
+          f"{args.tail_rate:.0%} stragglers at {args.tail_factor:.0f}x")
+    print("=" * 60)
+    results = benchmark(args.runs, args.stages, args.threads, args.tail_rate, args.median,
+                        tail_factor=args.tail_factor)
+    print(f"{'':<13}{'run p50':>9}{'run p99':>9}{'call p99':>10}{'max':>8}{'hedged':>8}{'won':>6}{'extra tok':>11}")
+    for mode, result in results.items():
+        run, call = result["run"], result["call"]
+        print(f"{mode:<13}{run['p50']:>8.2f}s{run['p99']:>8.2f}s{call['p99']:>9.2f}s{call['max']:>7.2f}s"
+              f"{result['hedge_rate']:>8.1%}{result['hedge_win_rate']:>6.0%}{result['extra_token_share']:>11.1%}")
@@ -0,0 +1,319 @@
+"""
+HTTP Pool - Shared Platform Infrastructure
+One keep-alive connection pool per process for every model client, plus a
+pooled requests session for tool libraries built on requests. Every pooled
+request is metered, so connection reuse and connect time can be reported.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+@dataclass
+class PoolSettings:
+    """Connection pool limits; the defaults match the OpenAI client's own
+
+    `keepalive_expiry` stays below the idle timeout of common load balancers,
+    so a pooled connection is not reused just as the server drops it.
+    """
+    max_connections: int = 1000
+    max_keepalive_connections: int = 100
+    keepalive_expiry: float = 15.0
+    connect_timeout: float = 5.0
+    timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        """Defaults overridden by the AGENT_HTTP_POOL env var, e.g. '{"max_keepalive_connections": 200}'"""
+        return cls(**json.loads(os.getenv("AGENT_HTTP_POOL") or "{}"))
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections,
+                            keepalive_expiry=self.keepalive_expiry)
+
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    new_connections: int = 0
+    connect_seconds: float = 0.0
+
+
+@dataclass
+class PoolStats:
+    """Requests and newly opened connections per host"""
+    hosts: Dict[str, HostStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, host: str, new_connection: bool, connect_seconds: float = 0.0):
+        with self._lock:
+            stats = self.hosts.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.new_connections += new_connection
+            stats.connect_seconds += connect_seconds
+
+    def report(self) -> Dict[str, Any]:
+        """Totals plus per-host reuse rate and connect time (TCP + TLS) per new connection and per request"""
+        with self._lock:
+            hosts = {host: HostStats(**stats.__dict__) for host, stats in self.hosts.items()}
+        total = HostStats(sum(s.requests for s in hosts.values()), sum(s.new_connections for s in hosts.values()),
+                          sum(s.connect_seconds for s in hosts.values()))
+        return {"total": _describe(total), "hosts": {host: _describe(stats) for host, stats in sorted(hosts.items())}}
+
+
+def _describe(stats: HostStats) -> Dict[str, float]:
+    return {
+        "requests": stats.requests,
+        "new_connections": stats.new_connections,
+        "reuse_rate": round(1 - stats.new_connections / stats.requests, 4) if stats.requests else 0.0,
+        "connect_ms": round(stats.connect_seconds * 1000 / max(stats.new_connections, 1), 3),
+        "connect_ms_per_request": round(stats.connect_seconds * 1000 / max(stats.requests, 1), 3),
+    }
+
+
+class _Timings:
+    """httpcore trace callback collecting how long connection setup took for one request"""
+
+    def __init__(self):
+        self.started: Dict[str, float] = {}
+        self.connected = False
+        self.connect_seconds = 0.0
+
+    def event(self, name: str):
+        step, _, phase = name.rpartition(".")
+        if step not in ("connection.connect_tcp", "connection.start_tls", "connection.connect_unix_socket"):
+            return
+        if phase == "started":
+            self.started[step] = time.perf_counter()
+        elif phase == "complete":
+            self.connected = True
+            self.connect_seconds += time.perf_counter() - self.started.pop(step, time.perf_counter())
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    """HTTPTransport recording for each request whether it opened a new connection"""
+
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        timings = _Timings()
+        request.extensions["trace"] = lambda name, info: timings.event(name)
+        try:
+            return super().handle_request(request)
+        finally:
+            self.stats.record(request.url.host, timings.connected, timings.connect_seconds)
+
+
+class AsyncMeteredTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timings = _Timings()
+
+        async def trace(name, info):
+            timings.event(name)
+
+        request.extensions["trace"] = trace
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.stats.record(request.url.host, timings.connected, timings.connect_seconds)
+
+
+class HttpClients:
+    """Process-wide registry of pooled HTTP clients
+
+    `client()` is one thread-safe httpx.Client for every model in the process.
+    httpx async pools are bound to their event loop, so `async_client()` keeps
+    one client per running loop. `requests_session()` is a pooled session for
+    tool libraries built on requests, such as arxiv.
+    """
+
+    def __init__(self, settings: Optional[PoolSettings] = None):
+        self.settings = settings or PoolSettings.from_env()
+        self.stats = PoolStats()
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary())
+        self._session = None
+
+    def configure(self, **settings):
+        """Change pool limits, e.g. `configure(max_keepalive_connections=200)`; clients are rebuilt on next use
+
+        Clients already handed out keep working until their users let go of them.
+        """
+        with self._lock:
+            self.settings = PoolSettings(**{**self.settings.__dict__, **settings})
+            self._client, self._session = None, None
+            self._async_clients = weakref.WeakKeyDictionary()
+
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                transport = MeteredTransport(self.stats, limits=self.settings.limits())
+                self._client = httpx.Client(transport=transport, timeout=self.settings.timeouts())
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_clients:
+                transport = AsyncMeteredTransport(self.stats, limits=self.settings.limits())
+                self._async_clients[loop] = httpx.AsyncClient(transport=transport, timeout=self.settings.timeouts())
+            return self._async_clients[loop]
+
+    def requests_session(self):
+        import requests
+
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=32,
+                                                        pool_maxsize=self.settings.max_keepalive_connections)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def session_stats(self) -> Dict[str, Dict[str, float]]:
+        """Requests and new connections of the requests session, per host (urllib3 does not time connects)"""
+        report = {}
+        session = self._session
+        for adapter in dict(session.adapters).values() if session else []:
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None and pool.num_requests:
+                    report[pool.host] = {
+                        "requests": pool.num_requests,
+                        "new_connections": pool.num_connections,
+                        "reuse_rate": round(1 - pool.num_connections / pool.num_requests, 4),
+                    }
+        return report
+
+    def reset_stats(self):
+        self.stats = PoolStats()
+        with self._lock:
+            for transport in self._transports():
+                transport.stats = self.stats
+
+    def _transports(self):
+        clients = ([self._client] if self._client else []) + list(self._async_clients.values())
+        return [client._transport for client in clients]
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            if self._session is not None:
+                self._session.close()
+            self._client, self._session = None, None
+            self._async_clients = weakref.WeakKeyDictionary()
+
+
+_default_clients: Optional[HttpClients] = None
+_default_lock = threading.Lock()
+
+
+def get_http_clients() -> HttpClients:
+    """The pooled clients shared by every model and tool in this process"""
+    global _default_clients
+    with _default_lock:
+        if _default_clients is None:
+            _default_clients = HttpClients()
+        return _default_clients
+
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared with a forked child
+    global _default_clients
+    _default_clients = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def share_tool_sessions(tool: Any) -> Any:
+    """Point a tool's own HTTP session at the shared pool where the library allows it
+
+    ArxivTools gets the pooled requests session. yfinance already keeps one
+    session per process, and DuckDuckGo searches open a client per search
+    inside the ddgs library, so those are left as they are.
+    """
+    client = getattr(tool, "client", None)
+    if type(client).__module__.split(".")[0] == "arxiv" and hasattr(client, "_session"):
+        client._session = get_http_clients().requests_session()
+    return tool
+
+
+def benchmark(requests_per_thread: int = 50, threads: int = 8) -> Dict[str, Dict[str, float]]:
+    """Chat completions against a local stub server with a client per call (agno's default) vs the shared pool"""
+    from openai import OpenAI
+
+    from .load_test import LatencyModel, mock_model_server, open_fds, rss_mb
+
+    results = {}
+    with mock_model_server(LatencyModel(median=0.005, sigma=0.3)) as (url, counters):
+        body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "ping"}]}
+        for mode in ("per-call client", "shared pool"):
+            clients = HttpClients()
+            gc.collect()
+            rss_before, peak_fds = rss_mb(), open_fds() or 0
+
+            def call(_):
+                nonlocal peak_fds
+                if mode == "shared pool":
+                    http_client = clients.client()
+                else:
+                    http_client = httpx.Client(transport=MeteredTransport(clients.stats))
+                OpenAI(base_url=url, api_key="stub", http_client=http_client).chat.completions.create(**body)
+                peak_fds = max(peak_fds, open_fds() or 0)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as executor:
+                list(executor.map(call, range(requests_per_thread * threads)))
+            elapsed = time.perf_counter() - start
+            results[mode] = {
+                **clients.stats.report()["total"],
+                "requests_per_s": round(requests_per_thread * threads / elapsed, 1),
+                "peak_open_fds": peak_fds,
+                "rss_growth_mb": round(rss_mb() - rss_before, 1),
+            }
+            clients.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure connection reuse of the shared HTTP pool")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--requests", type=int, default=50, help="requests per thread")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"🔌 HTTP Pool: {args.requests * args.threads} chat completions from {args.threads} threads, local stub server")
+    print("=" * 60)
+    results = benchmark(args.requests, args.threads)
+    print(f"{'client':<18}{'req/s':>8}{'reuse':>8}{'connects':>10}{'connect':>10}{'fds':>6}{'RSS':>9}")
+    for mode, result in results.items():
+        print(f"{mode:<18}{result['requests_per_s']:>8.1f}{result['reuse_rate']:>8.1%}{result['new_connections']:>10}"
+              f"{result['connect_ms']:>8.2f}ms{result['peak_open_fds']:>6}{result['rss_growth_mb']:>7.1f}MB")
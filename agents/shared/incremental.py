@@ -0,0 +1,309 @@
+"""
+Incremental Re-analysis - Shared Platform Infrastructure
+Reruns only the stages whose inputs changed. Fresh per-symbol inputs (price,
+fundamentals, news headlines) are compared with those recorded at the last
+run; per-symbol stages of unchanged symbols and aggregate stages whose
+upstream results are unchanged are reused, and every decision is reported.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .budget import PartialResponse
+
+# A price move below this fraction since the last recorded price does not invalidate a symbol
+PRICE_MOVE_THRESHOLD = 0.01
+# Relative change below which a numeric fundamental counts as unchanged
+FUNDAMENTAL_TOLERANCE = 0.02
+# Fields of yfinance's `info` that feed the analyses; market cap is left out because it moves with price
+FUNDAMENTAL_FIELDS = (
+    "trailingPE", "forwardPE", "priceToBook", "beta", "dividendYield", "profitMargins", "returnOnEquity",
+    "revenueGrowth", "earningsGrowth", "debtToEquity", "recommendationKey", "targetMeanPrice",
+)
+MAX_HEADLINES = 10
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def fetch_headlines(symbol: str, ticker=None) -> List[str]:
+    """Latest news headlines for a symbol from Yahoo Finance, newest first"""
+    if ticker is None:
+        import yfinance as yf
+        ticker = yf.Ticker(symbol)
+    headlines = []
+    for item in (ticker.news or [])[:MAX_HEADLINES]:
+        # Newer yfinance versions nest the article under "content"
+        title = item.get("title") or (item.get("content") or {}).get("title")
+        if title:
+            headlines.append(title)
+    return headlines
+
+
+def fetch_symbol_inputs(symbol: str) -> Dict[str, Any]:
+    """Latest price, selected fundamentals and news headlines for a symbol from Yahoo Finance"""
+    import yfinance as yf
+
+    ticker = yf.Ticker(symbol)
+    info = ticker.info or {}
+    price = info.get("regularMarketPrice") or info.get("currentPrice") or ticker.fast_info.get("last_price")
+    return {
+        "price": round(float(price), 4) if price else None,
+        "fundamentals": {key: info.get(key) for key in FUNDAMENTAL_FIELDS if info.get(key) is not None},
+        "headlines": fetch_headlines(symbol, ticker),
+    }
+
+
+def compare_inputs(previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> List[str]:
+    """Reasons a symbol's analysis is out of date; empty if the changes are within tolerance"""
+    if previous is None:
+        return ["no inputs recorded for a previous run"]
+    if current is None:
+        return ["fresh inputs unavailable"]
+
+    reasons = []
+    old_price, new_price = previous.get("price"), current.get("price")
+    if old_price and new_price:
+        move = new_price / old_price - 1
+        if abs(move) >= PRICE_MOVE_THRESHOLD:
+            reasons.append(f"price moved {move:+.1%} ({old_price:,.2f} → {new_price:,.2f})")
+    elif old_price != new_price:
+        reasons.append("price became available" if new_price else "price unavailable")
+
+    old_fundamentals, new_fundamentals = previous.get("fundamentals", {}), current.get("fundamentals", {})
+    changed = []
+    for key in sorted(set(old_fundamentals) | set(new_fundamentals)):
+        old, new = old_fundamentals.get(key), new_fundamentals.get(key)
+        if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+            if abs(new - old) > FUNDAMENTAL_TOLERANCE * max(abs(old), 1e-9):
+                changed.append(key)
+        elif old != new:
+            changed.append(key)
+    if changed:
+        reasons.append(f"fundamentals changed: {', '.join(changed)}")
+
+    new_headlines = [h for h in current.get("headlines", []) if h not in set(previous.get("headlines", []))]
+    if new_headlines:
+        reasons.append(f"{len(new_headlines)} new headline{'s' if len(new_headlines) > 1 else ''}: "
+                       f"'{new_headlines[0][:80]}'" + (" ..." if len(new_headlines) > 1 else ""))
+    return reasons
+
+
+@dataclass
+class StageOutcome:
+    """Whether one stage was recomputed in a run, and why"""
+    stage: str
+    recomputed: bool
+    reason: str
+    symbol: Optional[str] = None
+
+
+@dataclass
+class IncrementalReport:
+    """Per-stage decisions of one incremental run"""
+    symbol_changes: Dict[str, List[str]] = field(default_factory=dict)
+    outcomes: List[StageOutcome] = field(default_factory=list)
+
+    @property
+    def recomputed(self) -> List[StageOutcome]:
+        return [o for o in self.outcomes if o.recomputed]
+
+    @property
+    def reused(self) -> List[StageOutcome]:
+        return [o for o in self.outcomes if not o.recomputed]
+
+    def summary(self) -> str:
+        lines = [f"♻️ Incremental run: {len(self.recomputed)} of {len(self.outcomes)} stages recomputed, "
+                 f"{len(self.reused)} reused"]
+        for outcome in self.outcomes:
+            marker = "🔁" if outcome.recomputed else "✅"
+            lines.append(f"  {marker} {outcome.stage} - {outcome.reason}")
+        return "\n".join(lines)
+
+    def note(self) -> str:
+        """Markdown note for the top of a result"""
+        changed = [f"{symbol} ({'; '.join(reasons)})" for symbol, reasons in self.symbol_changes.items() if reasons]
+        return (f"> ♻️ **Incremental update**: {len(self.recomputed)} of {len(self.outcomes)} stages recomputed. "
+                + (f"Changed since the last run: {', '.join(changed)}." if changed
+                   else "No symbol inputs changed since the last run."))
+
+
+@dataclass
+class IncrementalResult:
+    """Result of an incremental run, shaped like a run response for callers that read `.content`"""
+    content: str
+    report: IncrementalReport
+
+
+class IncrementalStore:
+    """Recorded symbol inputs and stage results in a platform database
+
+    `namespace` separates platforms sharing a file. Per-symbol stage results
+    are shared by every basket containing the symbol.
+    """
+
+    def __init__(self, db_file: str, namespace: str, table_prefix: str = "incremental"):
+        self.db_file = db_file
+        self.namespace = namespace
+        self.inputs_table = f"{table_prefix}_inputs"
+        self.stages_table = f"{table_prefix}_stages"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.inputs_table} (namespace TEXT, symbol TEXT, "
+                         "inputs TEXT, recorded_at REAL, PRIMARY KEY (namespace, symbol))")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.stages_table} (namespace TEXT, stage TEXT, "
+                         "fingerprint TEXT, content TEXT, computed_at REAL, meta TEXT, PRIMARY KEY (namespace, stage))")
+            # Tables created before stage metadata was stored lack the column
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.stages_table})")}
+            if "meta" not in columns:
+                conn.execute(f"ALTER TABLE {self.stages_table} ADD COLUMN meta TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load_inputs(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        symbols = list(symbols)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT symbol, inputs FROM {self.inputs_table} WHERE namespace = ? "
+                f"AND symbol IN ({', '.join('?' * len(symbols))})", (self.namespace, *symbols)
+            ).fetchall()
+        return {symbol: json.loads(inputs) for symbol, inputs in rows}
+
+    def save_inputs(self, inputs: Dict[str, Dict[str, Any]]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {self.inputs_table} VALUES (?, ?, ?, ?)",
+                             [(self.namespace, symbol, json.dumps(value), now) for symbol, value in inputs.items()])
+
+    def load_stage(self, stage: str) -> Optional[tuple]:
+        """(fingerprint, content, computed_at, meta) of a stage's last stored result"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT fingerprint, content, computed_at, meta FROM {self.stages_table} "
+                               "WHERE namespace = ? AND stage = ?", (self.namespace, stage)).fetchone()
+        if row is None:
+            return None
+        return (*row[:3], json.loads(row[3]) if row[3] else {})
+
+    def save_stage(self, stage: str, fingerprint: str, content: str, meta: Optional[Dict[str, Any]] = None):
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.stages_table} "
+                         "(namespace, stage, fingerprint, content, computed_at, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                         (self.namespace, stage, fingerprint, content, time.time(), json.dumps(meta or {})))
+
+
+class IncrementalRun:
+    """One run that reuses every stage whose inputs are unchanged
+
+        run = IncrementalRun(store, symbols)
+        for symbol in symbols:
+            run.stage(f"research:{symbol}", lambda: agent.run(...), symbol=symbol)
+        run.stage("portfolio", lambda: team.run(...), depends_on=[...], params={"amount": amount})
+        run.finish()
+        print(run.report.summary())
+
+    A per-symbol stage is fingerprinted by the symbol's inputs: the recorded
+    ones while fresh inputs are within tolerance, otherwise the fresh ones. An
+    aggregate stage is fingerprinted by the results of the stages it depends
+    on. A stage whose fingerprint matches its stored result is reused. Budget
+    partial results are never stored, so they are recomputed next time.
+    `meta` captures figures that describe a computed result (e.g. a quality
+    score); `meta(name)` returns them whether the stage ran or was reused.
+    """
+
+    def __init__(self, store: IncrementalStore, symbols: List[str],
+                 fetch_inputs: Callable[[str], Dict[str, Any]] = fetch_symbol_inputs):
+        self.store = store
+        self.symbols = list(symbols)
+        self.report = IncrementalReport()
+        self._results: Dict[str, str] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._recomputed: set = set()
+
+        previous = store.load_inputs(self.symbols)
+        with ThreadPoolExecutor(max_workers=min(len(self.symbols), 8) or 1) as pool:
+            fresh = dict(zip(self.symbols, pool.map(lambda symbol: self._fetch(fetch_inputs, symbol), self.symbols)))
+
+        # Inputs each symbol's stages are keyed on; small moves keep the recorded inputs
+        self.inputs: Dict[str, Dict[str, Any]] = {}
+        for symbol in self.symbols:
+            reasons = compare_inputs(previous.get(symbol), fresh[symbol])
+            self.report.symbol_changes[symbol] = reasons
+            # Without fresh inputs nothing can be verified, so the symbol's stages always rerun
+            self.inputs[symbol] = fresh[symbol] if reasons else previous[symbol]
+
+    @staticmethod
+    def _fetch(fetch_inputs: Callable[[str], Dict[str, Any]], symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            return fetch_inputs(symbol)
+        except Exception:
+            return None
+
+    def stage(self, name: str, compute: Callable[[], Any], symbol: Optional[str] = None,
+              depends_on: Iterable[str] = (), params: Optional[Dict[str, Any]] = None,
+              meta: Optional[Callable[[], Dict[str, Any]]] = None) -> str:
+        """Stored result of the stage if still valid, else `compute()`'s (a string or a run response)
+
+        `meta`, called after `compute()`, returns JSON-serializable figures stored with the result.
+        """
+        depends_on = list(depends_on)
+        fingerprint = _digest({
+            "inputs": self.inputs.get(symbol) if symbol else None,
+            "upstream": {dep: _digest(self._results[dep]) for dep in depends_on},
+            "params": params or {},
+        })
+        stored = self.store.load_stage(name)
+        verifiable = not symbol or self.inputs.get(symbol) is not None
+        if verifiable and stored and stored[0] == fingerprint:
+            age = (time.time() - stored[2]) / 3600
+            # A recomputed upstream stage that produced the same result does not invalidate this one
+            unchanged = "upstream results unchanged" if any(dep in self._recomputed for dep in depends_on) \
+                else "inputs unchanged"
+            self._results[name] = stored[1]
+            self._meta[name] = stored[3]
+            self.report.outcomes.append(StageOutcome(name, False, f"reused, {unchanged} ({age:.1f}h old)", symbol))
+            return stored[1]
+
+        changed_upstream = [dep for dep in depends_on if dep in self._recomputed]
+        if symbol and self.report.symbol_changes.get(symbol):
+            reason = "; ".join(self.report.symbol_changes[symbol])
+        elif changed_upstream:
+            reason = f"upstream changed: {', '.join(changed_upstream)}"
+        elif stored is None:
+            reason = "no previous result"
+        else:
+            reason = "parameters changed"
+
+        response = compute()
+        content = response if isinstance(response, str) else str(getattr(response, "content", response))
+        self._meta[name] = meta() if meta else {}
+        if not isinstance(response, PartialResponse):
+            self.store.save_stage(name, fingerprint, content, self._meta[name])
+        self._results[name] = content
+        self._recomputed.add(name)
+        self.report.outcomes.append(StageOutcome(name, True, reason, symbol))
+        return content
+
+    def result(self, name: str) -> str:
+        return self._results[name]
+
+    def meta(self, name: str) -> Dict[str, Any]:
+        return self._meta.get(name, {})
+
+    def finish(self):
+        """Record the inputs this run's stages were keyed on, as the baseline for the next run"""
+        self.store.save_inputs({symbol: inputs for symbol, inputs in self.inputs.items() if inputs is not None})
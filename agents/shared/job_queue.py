@@ -0,0 +1,211 @@
+"""
+Job Queue - Shared Platform Infrastructure
+A durable local job queue in SQLite. Jobs survive restarts, are leased to one
+worker at a time with a visibility timeout, retried with backoff when they fail
+and keep their result or last error once finished.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_QUEUE_DB = os.getenv(
+    "JOB_QUEUE_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jobs.db")
+)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    """One row of the queue"""
+    id: int
+    platform: str
+    params: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    priority: int
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    worker: Optional[str]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class JobQueue:
+    """SQLite-backed job queue shared by every process on the machine
+
+    `claim` leases the next visible job to a worker for `visibility_timeout`
+    seconds. A worker that dies or stops heartbeating loses its lease, and the
+    job becomes visible to others again. Failed attempts are retried after
+    `retry_delay * 2 ** (attempts - 1)` seconds until `max_attempts` is used up.
+    """
+
+    def __init__(self, db_file: str = DEFAULT_QUEUE_DB, visibility_timeout: float = 300.0, retry_delay: float = 5.0):
+        self.db_file = db_file
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, platform TEXT, params TEXT, "
+                "status TEXT, attempts INTEGER DEFAULT 0, max_attempts INTEGER, priority INTEGER DEFAULT 0, "
+                "created_at REAL, visible_at REAL, started_at REAL, finished_at REAL, worker TEXT, "
+                "result TEXT, error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at, priority)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, platform: str, params: Optional[Dict[str, Any]] = None, max_attempts: int = 3,
+                priority: int = 0, delay: float = 0.0) -> int:
+        """Add a job and return its id; higher `priority` jobs are claimed first"""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "INSERT INTO jobs (platform, params, status, max_attempts, priority, created_at, visible_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, json.dumps(params or {}), QUEUED, max_attempts, priority, now, now + delay),
+            ).lastrowid
+
+    def enqueue_many(self, jobs: List[Dict[str, Any]], max_attempts: int = 3) -> List[int]:
+        """Add `{"platform": ..., "params": ...}` jobs in one transaction"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = [conn.execute(
+                "INSERT INTO jobs (platform, params, status, max_attempts, priority, created_at, visible_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["platform"], json.dumps(job.get("params") or {}), QUEUED,
+                 job.get("max_attempts", max_attempts), job.get("priority", 0), now, now),
+            ).lastrowid for job in jobs]
+            conn.execute("COMMIT")
+        return ids
+
+    def claim(self, worker: str, platforms: Optional[List[str]] = None) -> Optional[Job]:
+        """Lease the next visible job to `worker`, or return None if there is none"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Leases that ran out on their last attempt will not be retried
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = COALESCE(error, 'visibility timeout expired') "
+                "WHERE status = ? AND visible_at <= ? AND attempts >= max_attempts",
+                (FAILED, now, RUNNING, now),
+            )
+            query = ("SELECT id FROM jobs WHERE status IN (?, ?) AND visible_at <= ?"
+                     + (f" AND platform IN ({', '.join('?' * len(platforms))})" if platforms else "")
+                     + " ORDER BY priority DESC, id LIMIT 1")
+            row = conn.execute(query, (QUEUED, RUNNING, now, *(platforms or []))).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, visible_at = ?, started_at = ?, worker = ? "
+                "WHERE id = ?",
+                (RUNNING, now + self.visibility_timeout, now, worker, row[0]),
+            )
+            conn.execute("COMMIT")
+        return self.get(row[0])
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend `worker`'s lease on a job; False if the lease has been lost"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET visible_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (time.time() + self.visibility_timeout, job_id, RUNNING, worker),
+            ).rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: Dict[str, Any]) -> bool:
+        """Store a job's result; ignored (False) if `worker` no longer holds the lease"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = NULL "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (DONE, time.time(), json.dumps(result), job_id, RUNNING, worker),
+            ).rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> Optional[str]:
+        """Record a failed attempt; the job is requeued with backoff or, out of attempts, marked failed"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND worker = ?",
+                               (job_id, RUNNING, worker)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                status, visible_at = FAILED, now
+            else:
+                status, visible_at = QUEUED, now + self.retry_delay * 2 ** (attempts - 1)
+            conn.execute(
+                "UPDATE jobs SET status = ?, visible_at = ?, finished_at = ?, error = ? WHERE id = ?",
+                (status, visible_at, now if status == FAILED else None, error, job_id),
+            )
+            conn.execute("COMMIT")
+        return status
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, platform, params, status, attempts, max_attempts, priority, created_at, started_at, "
+                "finished_at, worker, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(row[0], row[1], json.loads(row[2]), *row[3:11],
+                   json.loads(row[11]) if row[11] else None, row[12])
+
+    def pending(self) -> int:
+        """Jobs not yet done or failed"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def wait(self, job_ids: List[int], timeout: Optional[float] = None, poll_interval: float = 0.2) -> List[Job]:
+        """Block until the given jobs are done or failed, then return them"""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            jobs = [self.get(job_id) for job_id in job_ids]
+            if all(job.status in (DONE, FAILED) for job in jobs):
+                return jobs
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(f"{sum(job.status not in (DONE, FAILED) for job in jobs)} jobs still pending")
+            time.sleep(poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by platform and status, plus mean run time of finished jobs"""
+        with self._connect() as conn:
+            counts = conn.execute("SELECT platform, status, COUNT(*) FROM jobs GROUP BY platform, status").fetchall()
+            mean = conn.execute("SELECT AVG(finished_at - started_at) FROM jobs WHERE status = ?", (DONE,)).fetchone()[0]
+        by_platform: Dict[str, Dict[str, int]] = {}
+        for platform, status, count in counts:
+            by_platform.setdefault(platform, {})[status] = count
+        return {"platforms": by_platform, "mean_run_seconds": mean or 0.0}
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than `older_than` seconds"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                (DONE, FAILED, time.time() - older_than)).rowcount
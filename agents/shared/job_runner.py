@@ -0,0 +1,202 @@
+"""
+Job Runner - Shared Platform Infrastructure
+Runs queued jobs for any platform across a pool of worker processes. Each
+worker claims one job at a time from the shared `JobQueue`, heartbeats its
+lease while the job runs and stores the result, or the error for a retry.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from .job_queue import DEFAULT_QUEUE_DB, DONE, JobQueue
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Platform name -> (platform directory, module, entry point); job params are the entry point's keyword arguments
+PLATFORMS: Dict[str, tuple] = {
+    "financial": ("financial_intelligence", "financial_intelligence", "analyze_portfolio"),
+    "collaborate": ("financial_intelligence", "collaborate_demo", "collaborative_investment_analysis"),
+    "research": ("research_assistant", "research_assistant", "conduct_literature_review"),
+    "content": ("content_intelligence", "content_intelligence", "analyze_content"),
+    "investment_workflow": ("investment_workflow", "investment_workflow", "run_investment_workflow"),
+    "probe": (None, "shared.job_runner", "cpu_probe"),
+}
+
+
+def cpu_probe(rounds: int = 200_000, payload: str = "probe") -> str:
+    """CPU-bound stand-in for a platform job, used to measure how the runner scales"""
+    digest = payload.encode("utf-8")
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+
+def _entry_point(platform: str):
+    """Import a platform's entry point, running from its directory as the scripts expect"""
+    if platform not in PLATFORMS:
+        raise ValueError(f"Unknown platform '{platform}', expected one of: {', '.join(PLATFORMS)}")
+    directory, module_name, function = PLATFORMS[platform]
+    if directory:
+        platform_dir = os.path.join(AGENTS_DIR, directory)
+        if platform_dir not in sys.path:
+            sys.path.insert(0, platform_dir)
+        # Platform databases are relative paths next to each script
+        os.chdir(platform_dir)
+    return getattr(importlib.import_module(module_name), function)
+
+
+def _result_payload(result: Any) -> Dict[str, Any]:
+    """JSON-safe summary of whatever a platform entry point returned"""
+    content = getattr(result, "content", result)
+    payload = {"content": content if isinstance(content, (str, type(None))) else str(content)}
+    for attr in ("run_id", "converged", "total_tokens"):
+        value = getattr(result, attr, None)
+        if value is not None:
+            payload[attr] = value
+    return payload
+
+
+def run_job(platform: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return _result_payload(_entry_point(platform)(**params))
+
+
+def _heartbeat(queue: JobQueue, job_id: int, worker: str, stop: threading.Event):
+    while not stop.wait(queue.visibility_timeout / 3):
+        if not queue.heartbeat(job_id, worker):
+            return
+
+
+def worker_loop(db_file: str, worker: str, visibility_timeout: float, retry_delay: float, drain: bool,
+                poll_interval: float = 0.5, platforms: Optional[List[str]] = None, log_file: Optional[str] = None):
+    """Claim and run jobs until stopped, or until the queue is empty when `drain` is set"""
+    if log_file:
+        # Platforms print progress freely; keep each worker's output in its own log
+        sys.stdout = sys.stderr = open(log_file, "a", buffering=1, encoding="utf-8")
+    queue = JobQueue(db_file, visibility_timeout=visibility_timeout, retry_delay=retry_delay)
+    while True:
+        job = queue.claim(worker, platforms)
+        if job is None:
+            if drain and queue.pending() == 0:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        print(f"▶️ [{worker}] job {job.id} ({job.platform}) attempt {job.attempts}/{job.max_attempts}")
+        stop = threading.Event()
+        threading.Thread(target=_heartbeat, args=(queue, job.id, worker, stop), daemon=True).start()
+        try:
+            result = run_job(job.platform, job.params)
+        except Exception:
+            status = queue.fail(job.id, worker, traceback.format_exc(limit=5))
+            print(f"❌ [{worker}] job {job.id} failed ({status or 'lease lost'})")
+        else:
+            stored = queue.complete(job.id, worker, result)
+            print(f"✅ [{worker}] job {job.id} done" + ("" if stored else " (lease lost, result discarded)"))
+        finally:
+            stop.set()
+
+
+def run_workers(db_file: str = DEFAULT_QUEUE_DB, workers: Optional[int] = None, visibility_timeout: float = 300.0,
+                retry_delay: float = 5.0, drain: bool = False, platforms: Optional[List[str]] = None,
+                log_dir: Optional[str] = None) -> float:
+    """Start `workers` processes (default: one per CPU core) and wait for them; returns elapsed seconds"""
+    workers = workers or os.cpu_count() or 1
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    # Spawned workers start clean instead of inheriting this process's threads and connections
+    ctx = multiprocessing.get_context("spawn")
+    host = socket.gethostname()
+    processes = [ctx.Process(
+        target=worker_loop,
+        args=(db_file, f"{host}-{os.getpid()}-w{number}", visibility_timeout, retry_delay, drain),
+        kwargs={"platforms": platforms,
+                "log_file": os.path.join(log_dir, f"worker-{number}.log") if log_dir else None},
+    ) for number in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Jobs in flight lose their lease and are picked up again after the visibility timeout
+        for process in processes:
+            process.terminate()
+    return time.perf_counter() - start
+
+
+def benchmark(worker_counts: List[int], jobs: int = 64, rounds: int = 200_000) -> Dict[int, float]:
+    """Drain `jobs` CPU-bound probe jobs with each worker count; returns jobs per second"""
+    import tempfile
+
+    results = {}
+    for count in worker_counts:
+        db_file = os.path.join(tempfile.mkdtemp(), "jobs.db")
+        JobQueue(db_file).enqueue_many([{"platform": "probe", "params": {"rounds": rounds, "payload": str(n)}}
+                                        for n in range(jobs)])
+        elapsed = run_workers(db_file, workers=count, drain=True, log_dir=os.path.dirname(db_file))
+        results[count] = jobs / elapsed
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durable job queue and worker pool for all platforms")
+    parser.add_argument("command", choices=["enqueue", "work", "status", "result", "bench"])
+    parser.add_argument("args", nargs="*", help="enqueue: PLATFORM [PARAMS_JSON]; result: JOB_ID")
+    parser.add_argument("--db", default=DEFAULT_QUEUE_DB)
+    parser.add_argument("--workers", type=int, nargs="+", help="worker processes (default: CPU cores)")
+    parser.add_argument("--platform", action="append", help="work: only claim jobs for these platforms")
+    parser.add_argument("--drain", action="store_true", help="work: exit once the queue is empty")
+    parser.add_argument("--visibility-timeout", type=float, default=300.0)
+    parser.add_argument("--retry-delay", type=float, default=5.0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--log-dir", default=os.path.join(AGENTS_DIR, "job_logs"))
+    parser.add_argument("--jobs", type=int, default=64, help="bench: probe jobs per worker count")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db) if args.command != "bench" else None
+    if args.command == "enqueue":
+        if not args.args:
+            raise SystemExit(f"enqueue needs a platform: {', '.join(PLATFORMS)}")
+        params = json.loads(args.args[1]) if len(args.args) > 1 else {}
+        print(f"📥 Queued job {queue.enqueue(args.args[0], params, max_attempts=args.max_attempts)}")
+    elif args.command == "work":
+        workers = args.workers[0] if args.workers else None
+        print(f"🏭 Starting {workers or os.cpu_count()} workers on {args.db} (logs in {args.log_dir})")
+        print("=" * 60)
+        elapsed = run_workers(args.db, workers, args.visibility_timeout, args.retry_delay, args.drain,
+                              args.platform, args.log_dir)
+        print(f"🏁 Workers stopped after {elapsed:.1f}s")
+    elif args.command == "status":
+        stats = queue.stats()
+        print(f"📋 Job Queue - {args.db}")
+        print("=" * 60)
+        for platform, counts in sorted(stats["platforms"].items()):
+            print(f"{platform:<20} " + "  ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+        print(f"Mean run time of finished jobs: {stats['mean_run_seconds']:.1f}s")
+    elif args.command == "result":
+        job = queue.get(int(args.args[0])) if args.args else None
+        if job is None:
+            raise SystemExit("No such job")
+        print(f"Job {job.id} ({job.platform}): {job.status}, {job.attempts}/{job.max_attempts} attempts")
+        if job.status == DONE:
+            print(job.result["content"])
+        elif job.error:
+            print(job.error)
+    else:
+        counts = args.workers or sorted({1, 2, max((os.cpu_count() or 1) // 2, 1), os.cpu_count() or 1})
+        print(f"⏱️ Runner Throughput: {args.jobs} CPU-bound probe jobs")
+        print("=" * 60)
+        results = benchmark(counts, jobs=args.jobs)
+        for count, throughput in results.items():
+            print(f"{count:>3} workers  {throughput:8.1f} jobs/s  {throughput / results[counts[0]]:5.2f}x")
@@ -0,0 +1,579 @@
+"""
+Load Test - Shared Platform Infrastructure
+Drives a platform entry point at increasing Poisson arrival rates against a
+local OpenAI-compatible mock model with log-normal latency, and reports
+latency percentiles, throughput, errors, memory and connections per rate until
+the platform saturates. Results are appended to a JSONL file so versions can
+be compared.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .http_pool import get_http_clients
+from .job_runner import AGENTS_DIR, PLATFORMS
+from .platform_factory import stub_completion
+
+DEFAULT_RESULTS_FILE = os.getenv("LOAD_RESULTS_FILE", os.path.join(AGENTS_DIR, "load_results.jsonl"))
+
+SYMBOLS = ["AAPL", "MSFT", "GOOGL", "NVDA", "AMZN", "META", "TSLA", "JPM", "V", "UNH"]
+
+CONTENT_SAMPLES = [
+    ("Video Title: Product launch keynote\nDuration: 4:10 minutes\nTRANSCRIPT: Today we are announcing...", "video"),
+    ("Podcast episode, audio only. Host and guest discuss remote work and productivity.", "audio"),
+    ("Blog post: Ten tips for better sleep. Consistent schedules, less caffeine, darker rooms.", "text"),
+    ("Instagram carousel, 5 images of a summer clothing line with captions and hashtags.", "image"),
+]
+
+# Keyword arguments for one request to each platform
+WORKLOADS: Dict[str, Callable[[random.Random], Dict[str, Any]]] = {
+    "financial": lambda rng: {
+        "symbols": rng.sample(SYMBOLS, 3),
+        "investment_amount": rng.choice([50_000, 100_000, 250_000]),
+        "use_cache": False,
+    },
+    "content": lambda rng: dict(zip(("content_description", "content_type"), rng.choice(CONTENT_SAMPLES))),
+}
+
+
+@dataclass
+class LatencyModel:
+    """Log-normal model latency: `median` seconds, spread `sigma`, capped at `max_seconds`
+
+    The default has a p99 about four times the median, like a hosted chat model.
+    A share `tail_rate` of calls straggle, `tail_factor` times slower.
+    """
+    median: float = 0.8
+    sigma: float = 0.6
+    max_seconds: float = 30.0
+    tail_rate: float = 0.0
+    tail_factor: float = 10.0
+
+    def sample(self, rng: random.Random) -> float:
+        seconds = self.median * math.exp(rng.gauss(0.0, self.sigma))
+        if self.tail_rate and rng.random() < self.tail_rate:
+            seconds *= self.tail_factor
+        return min(seconds, self.max_seconds)
+
+
+class ServerCounters:
+    """Mock server counters shared with the load generator's process"""
+
+    def __init__(self, context=multiprocessing):
+        self.open = context.Value("i", 0)
+        self.peak = context.Value("i", 0)
+        self.requests = context.Value("i", 0)
+        self.failures = context.Value("i", 0)
+
+    def opened(self):
+        with self.open.get_lock():
+            self.open.value += 1
+            self.peak.value = max(self.peak.value, self.open.value)
+
+    def closed(self):
+        with self.open.get_lock():
+            self.open.value -= 1
+
+    def reset_peak(self):
+        with self.open.get_lock():
+            self.peak.value = self.open.value
+
+    def count(self, counter):
+        with counter.get_lock():
+            counter.value += 1
+
+
+class _MockModelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling shows up in the counters
+
+    def setup(self):
+        super().setup()
+        self.server.counters.opened()
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            self.server.counters.closed()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        server.counters.count(server.counters.requests)
+        time.sleep(server.latency.sample(server.rng))
+        if server.rng.random() < server.error_rate:
+            server.counters.count(server.counters.failures)
+            status, payload = 500, {"error": {"message": "Injected mock model failure", "type": "server_error"}}
+        else:
+            status, payload = 200, stub_completion(body, _member_id(body))
+        data = json.dumps(payload).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the call, e.g. the losing half of a hedged request
+            self.close_connection = True
+
+
+def _member_id(body: Dict[str, Any]) -> Optional[str]:
+    """First member listed in a team leader's system message, the target of its delegation"""
+    for message in body.get("messages", []):
+        if message.get("role") in ("system", "developer") and isinstance(message.get("content"), str):
+            match = re.search(r"- ID: (\S+)", message["content"])
+            if match:
+                return match.group(1)
+    return None
+
+
+class MockModelServer(ThreadingHTTPServer):
+    """OpenAI-compatible chat completions endpoint answering with `stub_completion` after a sampled latency"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency: LatencyModel, error_rate: float = 0.0, port: int = 0, seed: int = 0,
+                 counters: Optional[ServerCounters] = None):
+        super().__init__(("127.0.0.1", port), _MockModelHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.counters = counters or ServerCounters()
+
+
+def _serve(latency: LatencyModel, error_rate: float, seed: int, counters: ServerCounters, ready):
+    server = MockModelServer(latency, error_rate, seed=seed, counters=counters)
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+@contextlib.contextmanager
+def mock_model_server(latency: LatencyModel, error_rate: float = 0.0,
+                      seed: int = 0) -> Iterator[Tuple[str, ServerCounters]]:
+    """Run a `MockModelServer` in its own process; yields its base URL and counters
+
+    A separate process keeps the mock's request handling from competing with
+    the platform under test for the GIL.
+    """
+    context = multiprocessing.get_context("spawn")
+    counters = ServerCounters(context)
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_serve, args=(latency, error_rate, seed, counters, sender), daemon=True)
+    process.start()
+    try:
+        if not receiver.poll(30):
+            raise RuntimeError("Mock model server did not start")
+        yield f"http://127.0.0.1:{receiver.recv()}/v1", counters
+    finally:
+        process.terminate()
+        process.join()
+
+
+def rss_mb() -> float:
+    """Resident memory of this process; the lifetime peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def open_fds() -> Optional[int]:
+    """Open file descriptors of this process (sockets, SQLite files, logs), where /proc is available"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+@dataclass
+class StepResult:
+    """One arrival rate held for `duration` seconds"""
+    rate: float
+    duration: float
+    sent: int
+    completed: int
+    errors: int
+    timeouts: int
+    p50_s: float
+    p95_s: float
+    p99_s: float
+    max_s: float
+    throughput: float
+    peak_in_flight: int
+    peak_rss_mb: float
+    rss_growth_mb: float
+    peak_open_fds: Optional[int]
+    peak_model_connections: int
+    model_requests: int
+    limiter_wait_s: float
+    connection_reuse: float
+    connect_ms: float
+    error_types: Dict[str, int] = field(default_factory=dict)
+    saturated: str = ""
+
+    @property
+    def error_rate(self) -> float:
+        return (self.errors + self.timeouts) / max(self.sent, 1)
+
+    def summary(self) -> str:
+        flag = f"  ⚠️ {self.saturated}" if self.saturated else ""
+        return (f"{self.rate:>7.2f}/s {self.sent:>6} {self.throughput:>8.2f}/s "
+                f"{self.p50_s:>7.2f}s {self.p95_s:>7.2f}s {self.p99_s:>7.2f}s {self.error_rate:>6.1%} "
+                f"{self.peak_rss_mb:>7.0f}MB {self.peak_model_connections:>6} {self.connection_reuse:>6.1%}{flag}")
+
+
+STEP_HEADER = f"{'rate':>9} {'sent':>6} {'through':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6} {'RSS':>9} {'conns':>6} {'reuse':>6}"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _lift_rate_limits():
+    """Fresh process limiter; without provider limits the platform itself is what saturates"""
+    from . import rate_limiter
+
+    limits = {
+        model_id: rate_limiter.ModelLimits(rpm=1e9, tpm=1e12, max_concurrency=4096, initial_concurrency=4096)
+        for model_id in rate_limiter.DEFAULT_LIMITS
+    }
+    rate_limiter._default_limiter = rate_limiter.RateLimiter(limits)
+
+
+def _limiter_wait() -> float:
+    from .rate_limiter import get_rate_limiter
+
+    stats = get_rate_limiter().stats().values()
+    requests = sum(s["requests"] for s in stats)
+    return sum(s["mean_wait_s"] * s["requests"] for s in stats) / requests if requests else 0.0
+
+
+def run_step(entry: Callable[..., Any], workload: Callable[[random.Random], Dict[str, Any]], rate: float,
+             duration: float, rng: random.Random, counters: Optional[ServerCounters] = None,
+             timeout: float = 120.0, max_in_flight: int = 512, provider_limits: bool = False) -> StepResult:
+    """Open-loop load: Poisson arrivals at `rate` per second for `duration` seconds
+
+    Latency is measured from each request's scheduled arrival, so time spent
+    waiting for a free worker counts (no coordinated omission). Requests still
+    running `timeout` seconds after the last arrival count as timeouts.
+    """
+    if not provider_limits:
+        _lift_rate_limits()
+    if counters:
+        counters.reset_peak()
+    get_http_clients().reset_stats()
+    model_requests = counters.requests.value if counters else 0
+    lock = threading.Lock()
+    latencies: List[Tuple[float, float]] = []
+    error_types: Counter = Counter()
+    in_flight = peak_in_flight = 0
+    samples = {"rss": rss_mb(), "fds": open_fds() or 0}
+    rss_start = samples["rss"]
+
+    def call(scheduled: float, params: Dict[str, Any]):
+        nonlocal in_flight, peak_in_flight
+        with lock:
+            in_flight += 1
+            peak_in_flight = max(peak_in_flight, in_flight)
+        try:
+            entry(**params)
+        except Exception as error:
+            with lock:
+                error_types[f"{type(error).__name__}: {str(error)[:80]}"] += 1
+            return
+        finally:
+            with lock:
+                in_flight -= 1
+        with lock:
+            latencies.append((scheduled - start, time.perf_counter() - scheduled))
+
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.1):
+            samples["rss"] = max(samples["rss"], rss_mb())
+            samples["fds"] = max(samples["fds"], open_fds() or 0)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load")
+    futures = []
+    start = next_arrival = time.perf_counter()
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start >= duration:
+            break
+        time.sleep(max(0.0, next_arrival - time.perf_counter()))
+        futures.append(executor.submit(call, next_arrival, workload(rng)))
+    _, pending = wait(futures, timeout=max(0.0, start + duration + timeout - time.perf_counter()))
+    finished = time.perf_counter()
+    stop.set()
+    sampler.join()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    pool = get_http_clients().stats.report()["total"]
+    with lock:
+        values = [latency for _, latency in latencies]
+        result = StepResult(
+            rate=rate, duration=duration, sent=len(futures), completed=len(values),
+            errors=sum(error_types.values()), timeouts=len(pending),
+            p50_s=_percentile(values, 0.50), p95_s=_percentile(values, 0.95), p99_s=_percentile(values, 0.99),
+            max_s=max(values, default=0.0), throughput=len(values) / max(finished - start, 1e-9),
+            peak_in_flight=peak_in_flight, peak_rss_mb=samples["rss"], rss_growth_mb=rss_mb() - rss_start,
+            peak_open_fds=samples["fds"] or None,
+            peak_model_connections=counters.peak.value if counters else 0,
+            model_requests=(counters.requests.value - model_requests) if counters else 0,
+            limiter_wait_s=_limiter_wait(), connection_reuse=pool["reuse_rate"], connect_ms=pool["connect_ms"],
+            error_types=dict(error_types.most_common(5)),
+        )
+    result.saturated = _saturation(result, sorted(latencies))
+    return result
+
+
+def _saturation(step: StepResult, latencies: List[Tuple[float, float]], max_error_rate: float = 0.01) -> str:
+    """Why a step shows the platform saturated, or "" if it kept up"""
+    if step.timeouts:
+        return f"{step.timeouts} requests timed out"
+    if step.error_rate > max_error_rate:
+        return f"error rate {step.error_rate:.1%}"
+    # A growing backlog shows as latency climbing over the step: late arrivals wait behind earlier ones
+    third = len(latencies) // 3
+    if third >= 5:
+        early = _percentile([latency for _, latency in latencies[:third]], 0.5)
+        late = _percentile([latency for _, latency in latencies[-third:]], 0.5)
+        if late > 2 * early:
+            return f"backlog growing (median {early:.2f}s → {late:.2f}s)"
+    return ""
+
+
+@dataclass
+class LoadTestResult:
+    platform: str
+    version: str
+    label: str
+    timestamp: str
+    profile: str
+    latency: Dict[str, float]
+    model_error_rate: float
+    slo_p95_s: float
+    steps: List[StepResult]
+    saturation_rate: Optional[float] = None
+    saturation_reason: str = ""
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def code_version() -> str:
+    """Commit of the tree under test, marked dirty when there are uncommitted changes"""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=AGENTS_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def geometric_rates(start: float, growth: float, maximum: float) -> List[float]:
+    rates, rate = [], start
+    while rate <= maximum * (1 + 1e-9):
+        rates.append(round(rate, 3))
+        rate *= growth
+    return rates
+
+
+def _platform_entry(platform: str) -> Callable[..., Any]:
+    directory, module_name, function = PLATFORMS[platform]
+    if directory:
+        platform_dir = os.path.join(AGENTS_DIR, directory)
+        if platform_dir not in sys.path:
+            sys.path.insert(0, platform_dir)
+    return getattr(importlib.import_module(module_name), function)
+
+
+def run_load_test(platform: str, rates: List[float], duration: float = 30.0, latency: Optional[LatencyModel] = None,
+                  model_error_rate: float = 0.0, slo_p95_s: Optional[float] = None, profile: str = "production",
+                  timeout: float = 120.0, max_in_flight: int = 512, provider_limits: bool = False,
+                  label: str = "", seed: int = 0,
+                  on_step: Optional[Callable[[StepResult], None]] = None) -> LoadTestResult:
+    """Step through `rates` until the platform saturates; the saturation point is the last rate it kept up with
+
+    A step is saturated when requests time out, more than 1% fail, p95 latency
+    exceeds `slo_p95_s` (default: 3x the first step's p95), or latency climbs
+    over the step. Platform databases, analytics and traces go to a temporary
+    directory, news comes from the synthetic local source, and the platform's
+    own output is discarded.
+    """
+    if platform not in WORKLOADS:
+        raise ValueError(f"No workload for '{platform}', expected one of: {', '.join(WORKLOADS)}")
+    from . import analytics_store, tracing
+
+    latency = latency or LatencyModel()
+    rng = random.Random(seed)
+    result = LoadTestResult(platform, code_version(), label, datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                            profile, asdict(latency), model_error_rate, slo_p95_s or 0.0, [])
+    cwd, environ = os.getcwd(), dict(os.environ)
+    with tempfile.TemporaryDirectory() as workdir, mock_model_server(latency, model_error_rate, seed) as (url, counters):
+        os.environ.update({"OPENAI_BASE_URL": url, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "mock",
+                           "AGENT_PROFILE": profile, "AGENT_ANALYTICS_DIR": os.path.join(workdir, "analytics"),
+                           # Local synthetic stories: no news service calls, but ingestion cost stays in the steps
+                           "AGENT_NEWS": "synthetic"})
+        analytics_store._store = analytics_store.AnalyticsStore(os.path.join(workdir, "analytics"))
+        tracing._tracer = tracing.Tracer(trace_file=os.path.join(workdir, "traces.jsonl"))
+        # Platform databases are relative paths, so they are created in the temporary directory
+        os.chdir(workdir)
+        try:
+            entry = _platform_entry(platform)
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                # Warm-up: imports, database creation and the first connections stay out of the steps
+                if not provider_limits:
+                    _lift_rate_limits()
+                entry(**WORKLOADS[platform](rng))
+            for rate in rates:
+                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                    step = run_step(entry, WORKLOADS[platform], rate, duration, rng, counters,
+                                    timeout, max_in_flight, provider_limits)
+                if not result.steps and not slo_p95_s:
+                    result.slo_p95_s = round(3 * step.p95_s, 3)
+                if not step.saturated and step.p95_s > result.slo_p95_s:
+                    step.saturated = f"p95 {step.p95_s:.2f}s over SLO {result.slo_p95_s:.2f}s"
+                result.steps.append(step)
+                if on_step:
+                    on_step(step)
+                if step.saturated:
+                    result.saturation_reason = step.saturated
+                    break
+                result.saturation_rate = rate
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+            analytics_store._store = None
+            tracing._tracer = None
+    return result
+
+
+def save_result(result: LoadTestResult, results_file: str = DEFAULT_RESULTS_FILE):
+    with open(results_file, "a") as handle:
+        handle.write(result.to_json() + "\n")
+
+
+def load_results(results_file: str = DEFAULT_RESULTS_FILE, platform: Optional[str] = None) -> List[Dict[str, Any]]:
+    if not os.path.exists(results_file):
+        return []
+    with open(results_file) as handle:
+        results = [json.loads(line) for line in handle if line.strip()]
+    return [r for r in results if platform is None or r["platform"] == platform]
+
+
+def _healthiest(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The step at the saturation point"""
+    return next((s for s in reversed(result["steps"]) if not s["saturated"]), None)
+
+
+def compare(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'when':<20} {'version':<16} {'label':<12} {'saturates':>10} {'p95 there':>10} "
+             f"{'peak RSS':>9} {'conns':>6}"]
+    for result in results:
+        step = _healthiest(result)
+        saturation = f"{result['saturation_rate']:.2f}/s" if result["saturation_rate"] is not None else "<first"
+        if result["saturation_rate"] is not None and not result["saturation_reason"]:
+            saturation = f">{result['saturation_rate']:.2f}/s"
+        peak_rss = max((s["peak_rss_mb"] for s in result["steps"]), default=0.0)
+        lines.append(
+            f"{result['timestamp'][:19]:<20} {result['version'][:16]:<16} {result['label'][:12]:<12} {saturation:>10} "
+            f"{(step['p95_s'] if step else 0.0):>9.2f}s {peak_rss:>7.0f}MB "
+            f"{max((s['peak_model_connections'] for s in result['steps']), default=0):>6}"
+        )
+    rated = [r for r in results if r["saturation_rate"] and r["platform"] == results[-1]["platform"]]
+    if len(rated) > 1:
+        before, after = rated[-2], rated[-1]
+        change = after["saturation_rate"] / before["saturation_rate"] - 1
+        lines.append(f"💡 {after['version']} saturates at {change:+.0%} the rate of {before['version']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a platform against a local mock model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="step up the arrival rate until the platform saturates")
+    run_parser.add_argument("platform", choices=sorted(WORKLOADS))
+    run_parser.add_argument("--rates", type=float, nargs="+", help="arrival rates (requests/s) to step through")
+    run_parser.add_argument("--start-rate", type=float, default=0.5)
+    run_parser.add_argument("--growth", type=float, default=1.5)
+    run_parser.add_argument("--max-rate", type=float, default=64.0)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="seconds per rate")
+    run_parser.add_argument("--model-median", type=float, default=0.8, help="median mock model latency (s)")
+    run_parser.add_argument("--model-sigma", type=float, default=0.6, help="log-normal spread of mock latency")
+    run_parser.add_argument("--model-error-rate", type=float, default=0.0, help="share of mock calls failing with 500")
+    run_parser.add_argument("--slo", type=float, help="p95 latency bound (s); default 3x the first step's p95")
+    run_parser.add_argument("--profile", default="production")
+    run_parser.add_argument("--timeout", type=float, default=120.0)
+    run_parser.add_argument("--provider-limits", action="store_true",
+                            help="keep the configured rate limits instead of lifting them")
+    run_parser.add_argument("--label", default="", help="stored with the result, e.g. a branch or change name")
+    run_parser.add_argument("--results", default=DEFAULT_RESULTS_FILE)
+    run_parser.add_argument("--no-save", action="store_true")
+    compare_parser = subparsers.add_parser("compare", help="saturation points of stored runs")
+    compare_parser.add_argument("platform", nargs="?")
+    compare_parser.add_argument("--last", type=int, default=10)
+    compare_parser.add_argument("--results", default=DEFAULT_RESULTS_FILE)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        rates = args.rates or geometric_rates(args.start_rate, args.growth, args.max_rate)
+        latency = LatencyModel(median=args.model_median, sigma=args.model_sigma)
+        print(f"🔥 Load Test: {args.platform} ({args.duration:.0f}s per rate, mock model median "
+              f"{latency.median:.2f}s, sigma {latency.sigma:.2f})")
+        print("=" * 60)
+        print(STEP_HEADER)
+        result = run_load_test(args.platform, rates, args.duration, latency, args.model_error_rate, args.slo,
+                               args.profile, args.timeout, provider_limits=args.provider_limits, label=args.label,
+                               on_step=lambda step: print(step.summary(), flush=True))
+        for step in result.steps:
+            for error, count in step.error_types.items():
+                print(f"   ❌ {count}x {error}")
+        print("=" * 60)
+        if result.saturation_reason:
+            healthy = f"{result.saturation_rate:.2f} req/s" if result.saturation_rate else "below the first rate"
+            print(f"🎯 Saturation point: {healthy} ({result.saturation_reason} at the next rate)")
+        else:
+            print(f"🎯 Kept up with every rate up to {result.saturation_rate:.2f} req/s")
+        if not args.no_save:
+            save_result(result, args.results)
+            print(f"💾 Saved as {result.version} to {args.results}")
+    elif args.command == "compare":
+        results = load_results(args.results, args.platform)[-args.last:]
+        if not results:
+            raise SystemExit(f"No load test results in {args.results}")
+        print(f"📈 Load Test History - {args.platform or 'all platforms'}")
+        print("=" * 60)
+        print(compare(results))
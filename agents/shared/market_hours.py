@@ -0,0 +1,64 @@
+"""
+Market Hours - Shared Platform Infrastructure
+US equity session times used to size cache TTLs: market-derived answers go
+stale quickly while the exchange is open and not at all while it is closed.
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+# Exchange holidays are not modelled: a holiday looks like a trading day, which
+# only means cached entries are refreshed more often than needed that day.
+
+
+def _market_now(now: Optional[datetime]) -> datetime:
+    now = now or datetime.now(MARKET_TZ)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=MARKET_TZ)
+    return now.astimezone(MARKET_TZ)
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """True during the regular Monday-Friday session"""
+    now = _market_now(now)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def next_market_open(now: Optional[datetime] = None) -> datetime:
+    """Start of the next regular session (strictly after `now` if the market is open)"""
+    now = _market_now(now)
+    candidate = now.replace(hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def next_market_close(now: Optional[datetime] = None) -> datetime:
+    """End of the current session, or of the next one if the market is closed"""
+    now = _market_now(now)
+    if is_market_open(now):
+        return now.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute, second=0, microsecond=0)
+    opens = next_market_open(now)
+    return opens.replace(hour=MARKET_CLOSE.hour, minute=MARKET_CLOSE.minute)
+
+
+def market_ttl(now: Optional[datetime] = None, open_ttl: float = 900.0, min_ttl: float = 60.0) -> float:
+    """Seconds a market-derived result stays fresh
+
+    While the market is open this is `open_ttl`, cut off at the closing bell.
+    While it is closed, prices do not move, so a result stays valid until the
+    next open. Anything computed after hours is then reused all night and weekend.
+    """
+    now = _market_now(now)
+    # Timestamps, not aware-datetime subtraction: within one ZoneInfo that ignores a DST change
+    if is_market_open(now):
+        until_close = next_market_close(now).timestamp() - now.timestamp()
+        return max(min(open_ttl, until_close), min_ttl)
+    return max(next_market_open(now).timestamp() - now.timestamp(), min_ttl)
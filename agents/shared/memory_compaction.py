@@ -0,0 +1,377 @@
+"""
+Memory Compaction - Shared Platform Infrastructure
+Keeps long-lived sessions bounded: once a session's stored history crosses a
+token threshold, older turns are folded into hierarchical summaries and the
+raw runs move to an archive table for audit.
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from agno.storage.sqlite import SqliteStorage
+from agno.utils.log import logger
+from sqlalchemy import text
+
+# (transcript, level) -> summary text
+Summarizer = Callable[[str, int], str]
+
+SUMMARY_RUN_PREFIX = "compacted-L"
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count (~4 characters per token), good enough for thresholds and trends"""
+    if value is None:
+        return 0
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    return (len(value) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def history_tokens(runs: List[Dict[str, Any]]) -> int:
+    """Estimate the tokens a session's stored runs add to a prompt when replayed as history"""
+    total = 0
+    for run in runs:
+        for message in run.get("messages") or []:
+            # System prompts are sent once and history copies were already counted in their own run
+            if message.get("role") == "system" or message.get("from_history"):
+                continue
+            total += estimate_tokens(message.get("content"))
+    return total
+
+
+def summary_level(run: Dict[str, Any]) -> int:
+    """0 for a raw run, otherwise the level of the summary it holds"""
+    run_id = str(run.get("run_id") or "")
+    if not run_id.startswith(SUMMARY_RUN_PREFIX):
+        return 0
+    return int(run_id[len(SUMMARY_RUN_PREFIX):].split("-", 1)[0])
+
+
+def render_turns(runs: List[Dict[str, Any]]) -> str:
+    """Flatten runs into a plain transcript for summarization"""
+    lines = []
+    for run in runs:
+        if summary_level(run):
+            lines.append(f"SUMMARY: {run.get('content', '').strip()}")
+            continue
+        for message in run.get("messages") or []:
+            if message.get("role") in ("system", "tool") or message.get("from_history"):
+                continue
+            content = message.get("content")
+            if not content:
+                continue
+            if not isinstance(content, str):
+                content = json.dumps(content, default=str)
+            lines.append(f"{message['role'].upper()}: {content.strip()}")
+    return "\n\n".join(lines)
+
+
+def extractive_summary(transcript: str, level: int = 1, max_chars_per_turn: int = 280) -> str:
+    """Keep the opening of every turn; used when no model is available"""
+    budget = max(max_chars_per_turn // level, 80)
+    digest = []
+    for turn in transcript.split("\n\n"):
+        turn = " ".join(turn.split())
+        digest.append(turn if len(turn) <= budget else turn[:budget].rsplit(" ", 1)[0] + " ...")
+    return "\n".join(digest)
+
+
+class AgentSummarizer:
+    """Summarizes turns with a small model, falling back to an extractive digest"""
+
+    def __init__(self, model_id: str = "gpt-4o-mini", max_words: int = 250):
+        self.model_id = model_id
+        self.max_words = max_words
+        self._agent = None
+
+    def _get_agent(self):
+        if self._agent is None:
+            from agno.agent import Agent
+
+            from .models import ManagedOpenAIChat
+            from .rate_limiter import PRIORITY_BATCH
+
+            self._agent = Agent(
+                name="Memory Compactor",
+                role="Condense earlier conversation turns into a faithful running summary",
+                model=ManagedOpenAIChat(id=self.model_id, priority=PRIORITY_BATCH),
+                instructions=[
+                    "Summarize the conversation so that the team can continue the work without the original turns",
+                    "Keep every decision, number, ticker, paper, recommendation and open question",
+                    "Drop pleasantries, repetition and intermediate reasoning",
+                    "Write plain prose or terse bullet points, never invent facts",
+                ],
+                markdown=False,
+            )
+        return self._agent
+
+    def __call__(self, transcript: str, level: int) -> str:
+        scope = "earlier turns" if level == 1 else "earlier summaries, in chronological order"
+        prompt = f"Summarize these {scope} in at most {self.max_words} words:\n\n{transcript}"
+        try:
+            response = self._get_agent().run(prompt)
+            if response.content:
+                return str(response.content).strip()
+        except Exception as e:
+            logger.warning(f"Summarizer model failed, using extractive summary: {e}")
+        return extractive_summary(transcript, level)
+
+
+@dataclass
+class CompactionReport:
+    """Compression and prompt-size history for one session"""
+    session_id: str
+    upserts: int = 0
+    compactions: int = 0
+    raw_tokens: int = 0
+    stored_tokens: int = 0
+    archived_runs: int = 0
+    summaries: Dict[int, int] = field(default_factory=dict)
+    trend: List[int] = field(default_factory=list)
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.raw_tokens / self.stored_tokens if self.stored_tokens else 1.0
+
+    def summary(self) -> str:
+        levels = ", ".join(f"L{level}: {count}" for level, count in sorted(self.summaries.items())) or "none"
+        trend = " → ".join(str(t) for t in self.trend[-8:]) or "n/a"
+        return (
+            f"Session {self.session_id}: {self.raw_tokens} raw → {self.stored_tokens} stored tokens "
+            f"({self.compression_ratio:.1f}x) | {self.archived_runs} runs archived | "
+            f"summaries {levels} | {self.compactions}/{self.upserts} saves compacted | prompt trend {trend}"
+        )
+
+
+class CompactingSqliteStorage(SqliteStorage):
+    """SqliteStorage that compacts session history before it is written
+
+    When the estimated history of a session exceeds `max_history_tokens`, runs
+    older than the last `keep_recent_runs` are folded in chunks of `chunk_runs`
+    into level-1 summaries. Whenever more than `fanout` summaries of one level
+    pile up, they are merged into a summary one level higher, so the stored
+    history stays roughly logarithmic in the length of the session.
+
+    Summaries are stored as ordinary runs, so agno replays them as history like
+    any other turn. Their ids derive from the runs they replace, which lets a
+    team that still holds the full history in memory save again without paying
+    for another summarization. Replaced runs go to `<table>_archive`, summaries to
+    `<table>_summaries` and one prompt-size sample per save to `<table>_compaction`.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        db_file: Optional[str] = None,
+        max_history_tokens: int = 6000,
+        keep_recent_runs: int = 4,
+        chunk_runs: int = 4,
+        fanout: int = 4,
+        summarizer: Optional[Summarizer] = None,
+        **kwargs,
+    ):
+        super().__init__(table_name=table_name, db_file=db_file, **kwargs)
+        self.max_history_tokens = max_history_tokens
+        self.keep_recent_runs = keep_recent_runs
+        self.chunk_runs = max(chunk_runs, 2)
+        self.fanout = max(fanout, 2)
+        self.summarizer = summarizer or AgentSummarizer()
+
+        self.archive_table = f"{table_name}_archive"
+        self.summary_table = f"{table_name}_summaries"
+        self.stats_table = f"{table_name}_compaction"
+        self._create_compaction_tables()
+
+    def _create_compaction_tables(self):
+        with self.db_engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.archive_table} ("
+                "session_id TEXT NOT NULL, run_id TEXT NOT NULL, summary_id TEXT, level INTEGER, "
+                "tokens INTEGER, archived_at INTEGER, run_json TEXT, PRIMARY KEY (session_id, run_id))"
+            ))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.summary_table} ("
+                "session_id TEXT NOT NULL, summary_id TEXT NOT NULL, level INTEGER, source_run_ids TEXT, "
+                "summary TEXT, source_tokens INTEGER, summary_tokens INTEGER, latency_s REAL, created_at INTEGER, "
+                "PRIMARY KEY (session_id, summary_id))"
+            ))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.stats_table} ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, recorded_at REAL, "
+                "runs_in INTEGER, runs_out INTEGER, tokens_in INTEGER, tokens_out INTEGER, compacted INTEGER)"
+            ))
+
+    def upsert(self, session, create_and_retry: bool = True):
+        memory = session.memory if isinstance(session.memory, dict) else None
+        runs = memory.get("runs") if memory else None
+        if isinstance(runs, list) and runs:
+            try:
+                session.memory = {**memory, "runs": self.compact_runs(session.session_id, runs)}
+            except Exception as e:
+                # Saving the full history is always better than losing the session
+                logger.warning(f"Memory compaction skipped for session {session.session_id}: {e}")
+        return super().upsert(session, create_and_retry=create_and_retry)
+
+    def compact_runs(self, session_id: str, runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the runs to store for a session, compacted if they are over budget"""
+        tokens_in = history_tokens(runs)
+        if tokens_in <= self.max_history_tokens:
+            self._record(session_id, len(runs), len(runs), tokens_in, tokens_in, compacted=False)
+            return runs
+
+        # Level 1: fold full chunks of raw runs outside the recent window. Chunks are
+        # counted from the start of the raw runs so their boundaries never move.
+        cutoff = max(len(runs) - self.keep_recent_runs, 0)
+        items, chunk = [], []
+        for run in runs[:cutoff]:
+            if summary_level(run):
+                items.append(run)
+                continue
+            chunk.append(run)
+            if len(chunk) == self.chunk_runs:
+                items.append(self._summarize(session_id, chunk, level=1))
+                chunk = []
+        items.extend(chunk)
+        items.extend(runs[cutoff:])
+
+        # Higher levels: merge the oldest `fanout` summaries of a level once there are too many
+        level = 1
+        while any(summary_level(r) == level for r in items):
+            positions = [i for i, r in enumerate(items) if summary_level(r) == level]
+            if len(positions) <= self.fanout:
+                level += 1
+                continue
+            first, last = positions[0], positions[self.fanout - 1]
+            merged = self._summarize(session_id, items[first:last + 1], level=level + 1)
+            items = items[:first] + [merged] + items[last + 1:]
+
+        tokens_out = history_tokens(items)
+        self._record(session_id, len(runs), len(items), tokens_in, tokens_out, compacted=True)
+        return items
+
+    def _summarize(self, session_id: str, runs: List[Dict[str, Any]], level: int) -> Dict[str, Any]:
+        source_ids = [str(r.get("run_id")) for r in runs]
+        digest = hashlib.sha1("|".join(source_ids).encode("utf-8")).hexdigest()[:16]
+        summary_id = f"{SUMMARY_RUN_PREFIX}{level}-{digest}"
+
+        with self.db_engine.connect() as conn:
+            cached = conn.execute(
+                text(f"SELECT summary FROM {self.summary_table} WHERE session_id = :s AND summary_id = :i"),
+                {"s": session_id, "i": summary_id},
+            ).scalar()
+
+        if cached is None:
+            transcript = render_turns(runs)
+            started = time.perf_counter()
+            cached = self.summarizer(transcript, level)
+            latency = time.perf_counter() - started
+            now = int(time.time())
+            with self.db_engine.begin() as conn:
+                conn.execute(
+                    text(f"INSERT OR REPLACE INTO {self.summary_table} VALUES (:s, :i, :l, :src, :sum, :st, :sut, :lat, :t)"),
+                    {"s": session_id, "i": summary_id, "l": level, "src": json.dumps(source_ids), "sum": cached,
+                     "st": history_tokens(runs), "sut": estimate_tokens(cached), "lat": round(latency, 3), "t": now},
+                )
+                for run in runs:
+                    conn.execute(
+                        text(f"INSERT OR IGNORE INTO {self.archive_table} VALUES (:s, :r, :i, :l, :tok, :t, :j)"),
+                        {"s": session_id, "r": str(run.get("run_id")), "i": summary_id, "l": summary_level(run),
+                         "tok": history_tokens([run]), "t": now, "j": json.dumps(run, default=str)},
+                    )
+            logger.debug(f"Compacted {len(runs)} runs of session {session_id} into {summary_id}")
+
+        return self._summary_run(runs, summary_id, cached)
+
+    @staticmethod
+    def _summary_run(runs: List[Dict[str, Any]], summary_id: str, summary: str) -> Dict[str, Any]:
+        """Build a run dict shaped like the runs it replaces so agno reloads it unchanged"""
+        latest = runs[-1]
+        run = {
+            key: latest[key]
+            for key in ("session_id", "team_id", "team_name", "agent_id", "agent_name", "model", "model_provider")
+            if key in latest
+        }
+        run.update({
+            "run_id": summary_id,
+            "status": "COMPLETED",
+            "content": summary,
+            "content_type": "str",
+            "created_at": runs[0].get("created_at", int(time.time())),
+            "messages": [
+                {"role": "user", "content": f"Summarize our conversation so far ({len(runs)} earlier entries)."},
+                {"role": "assistant", "content": summary},
+            ],
+        })
+        return run
+
+    def _record(self, session_id: str, runs_in: int, runs_out: int, tokens_in: int, tokens_out: int,
+                compacted: bool):
+        with self.db_engine.begin() as conn:
+            conn.execute(
+                text(f"INSERT INTO {self.stats_table} (session_id, recorded_at, runs_in, runs_out, tokens_in, "
+                     "tokens_out, compacted) VALUES (:s, :t, :ri, :ro, :ti, :to, :c)"),
+                {"s": session_id, "t": time.time(), "ri": runs_in, "ro": runs_out,
+                 "ti": tokens_in, "to": tokens_out, "c": int(compacted)},
+            )
+
+    def archived_runs(self, session_id: str) -> List[Dict[str, Any]]:
+        """Raw runs replaced by summaries, oldest first, for audit"""
+        with self.db_engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT run_json FROM {self.archive_table} WHERE session_id = :s AND level = 0 "
+                     "ORDER BY archived_at, rowid"),
+                {"s": session_id},
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def compaction_report(self, session_id: str) -> CompactionReport:
+        """Compression ratio and stored prompt-size trend for a session"""
+        report = CompactionReport(session_id=session_id)
+        with self.db_engine.connect() as conn:
+            samples = conn.execute(
+                text(f"SELECT tokens_out, compacted FROM {self.stats_table} WHERE session_id = :s ORDER BY id"),
+                {"s": session_id},
+            ).fetchall()
+            archived = conn.execute(
+                text(f"SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM {self.archive_table} "
+                     "WHERE session_id = :s AND level = 0"),
+                {"s": session_id},
+            ).fetchone()
+            levels = conn.execute(
+                text(f"SELECT level, COUNT(*) FROM {self.summary_table} WHERE session_id = :s GROUP BY level"),
+                {"s": session_id},
+            ).fetchall()
+
+        report.upserts = len(samples)
+        report.compactions = sum(compacted for _, compacted in samples)
+        report.trend = [tokens for tokens, _ in samples]
+        report.archived_runs, archived_tokens = archived
+        report.summaries = {level: count for level, count in levels}
+
+        session = self.read(session_id)
+        runs = (session.memory or {}).get("runs", []) if session else []
+        report.stored_tokens = history_tokens(runs)
+        report.raw_tokens = archived_tokens + history_tokens([r for r in runs if not summary_level(r)])
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show memory compaction statistics for stored sessions")
+    parser.add_argument("db_file", help="SQLite file used by the platform, e.g. research_assistant.db")
+    parser.add_argument("table_name", help="Session table, e.g. research_sessions")
+    parser.add_argument("session_ids", nargs="*", help="Sessions to report on (default: all)")
+    parser.add_argument("--mode", default="team", choices=["agent", "team"])
+    args = parser.parse_args()
+
+    storage = CompactingSqliteStorage(table_name=args.table_name, db_file=args.db_file, mode=args.mode)
+    session_ids = args.session_ids or [s.session_id for s in storage.get_all_sessions()]
+
+    print(f"🗜️ Memory Compaction Report - {args.db_file}:{args.table_name}")
+    print("=" * 60)
+    for session_id in session_ids:
+        print(storage.compaction_report(session_id).summary())
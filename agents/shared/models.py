@@ -0,0 +1,331 @@
+"""
+Managed Models - Shared Platform Infrastructure
+`ManagedOpenAIChat` is the OpenAIChat every platform agent uses. Each provider
+call goes through the shared rate limiter, throttled calls are retried after
+the limiter has backed off, every call is recorded as a trace span, and usage
+is charged to the active run budget. Models created with `hedge=True` send a
+duplicate request when a call runs unusually long (see `shared/hedging.py`).
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from agno.exceptions import ModelProviderError
+from agno.models.message import Message
+from agno.models.openai import OpenAIChat
+from openai import AsyncOpenAI, OpenAI
+
+from .budget import CHEAPER_MODELS, current_budget, wrap_up_message
+from .hedging import get_hedger
+from .http_pool import get_http_clients
+from .rate_limiter import get_rate_limiter
+from .tracing import get_tracer
+
+# Completion allowance reserved up front when the model has no max_tokens set;
+# the difference is settled against real usage when the call returns
+DEFAULT_COMPLETION_ESTIMATE = 1000
+
+
+def estimate_prompt_tokens(messages: List[Message]) -> int:
+    """Prompt tokens, at ~4 characters each"""
+    chars = 0
+    for message in messages:
+        content = message.content
+        chars += len(content) if isinstance(content, str) else len(json.dumps(content, default=str))
+        if message.tool_calls:
+            chars += len(json.dumps(message.tool_calls, default=str))
+    return chars // 4
+
+
+def estimate_request_tokens(messages: List[Message], max_completion: Optional[int] = None) -> int:
+    """Prompt tokens plus the completion allowance"""
+    return estimate_prompt_tokens(messages) + (max_completion or DEFAULT_COMPLETION_ESTIMATE)
+
+
+def throttle_details(error: Exception) -> Optional[float]:
+    """For a retryable 429, the provider's retry-after in seconds (0.0 if it sent none); None otherwise"""
+    if not isinstance(error, ModelProviderError) or error.status_code != 429:
+        return None
+    # Exhausted credit is also a 429, but waiting will not fix it
+    if "quota" in str(error.message).lower():
+        return None
+    response = getattr(error.__cause__, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return 0.0
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def _record_usage(span: Any, response: Any):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span.set(input_tokens=getattr(usage, "prompt_tokens", None),
+                 output_tokens=getattr(usage, "completion_tokens", None),
+                 total_tokens=getattr(usage, "total_tokens", None))
+
+
+@dataclass
+class ManagedOpenAIChat(OpenAIChat):
+    """OpenAIChat whose calls are admitted by the shared `RateLimiter`
+
+    The OpenAI client's own retries are disabled (`max_retries=0`) so 429s reach
+    the limiter. It lowers the model's concurrency, holds the whole queue if the
+    provider sent retry-after, and retries the call after a jittered backoff.
+    `priority` overrides the ambient `rate_limit_priority()` for this model.
+
+    Inside an active `RunBudget`, usage is charged to the budget. Once the
+    budget is degraded, calls go to the cheaper model with trimmed context;
+    once it is exhausted, they are told to answer without further tool calls.
+
+    Unless an `http_client` is given, calls go through the process-wide
+    connection pool from `get_http_clients()` rather than a new client per call.
+
+    With `hedge`, a non-streaming call still running past the model's latency
+    percentile gets a duplicate request, and the first answer wins. The loser
+    is cancelled and its prompt tokens are charged to the budget. Degraded
+    runs are not hedged.
+    """
+
+    max_retries: Optional[int] = 0
+    priority: Optional[int] = None
+    max_throttle_retries: int = 6
+    hedge: bool = False
+
+    def get_client(self) -> OpenAI:
+        if self.http_client is not None:
+            return super().get_client()
+        http_client = get_http_clients().client()
+        # agno asks for a client on every call; keep one per model for as long as the pool is unchanged
+        cached = self.__dict__.get("_pooled_client")
+        if cached is None or cached._client is not http_client:
+            cached = OpenAI(**self._get_client_params(), http_client=http_client)
+            self.__dict__["_pooled_client"] = cached
+        return cached
+
+    def get_async_client(self) -> AsyncOpenAI:
+        if self.http_client is not None:
+            return super().get_async_client()
+        return AsyncOpenAI(**self._get_client_params(), http_client=get_http_clients().async_client())
+
+    def _backoff(self, attempt: int) -> float:
+        return min(0.25 * 2 ** attempt, 30) * (0.5 + random.random())
+
+    def _cheaper(self) -> "ManagedOpenAIChat":
+        cheaper_id = CHEAPER_MODELS.get(self.id)
+        if cheaper_id is None:
+            return self
+        cache = self.__dict__.setdefault("_cheaper_models", {})
+        if cheaper_id not in cache:
+            cache[cheaper_id] = replace(self, id=cheaper_id)
+        return cache[cheaper_id]
+
+    def _plan_call(self, messages: List[Message], kwargs: dict) -> Tuple["ManagedOpenAIChat", List[Message], dict]:
+        """Model, messages and request arguments for one call under the active run budget"""
+        budget = current_budget()
+        if budget is None or not budget.degraded:
+            return self, messages, kwargs
+        budget.check()
+        target = self._cheaper()
+        if target is not self:
+            budget.note_event("downgraded_calls")
+        messages = budget.trim_messages(messages)
+        if budget.exhausted:
+            messages = messages + [wrap_up_message()]
+            if kwargs.get("tools"):
+                kwargs = {**kwargs, "tool_choice": "none"}
+            budget.note_event("forced_final_answers")
+        return target, messages, kwargs
+
+    def _charge(self, model_id: str, response: Any, estimated_tokens: int):
+        budget = current_budget()
+        if budget is None:
+            return
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            budget.record(model_id, usage.prompt_tokens or 0, usage.completion_tokens or 0)
+        else:
+            # Streams carry no usage; charge the estimate
+            budget.record(model_id, estimated_tokens, 0)
+
+    def _hedged(self) -> bool:
+        budget = current_budget()
+        return self.hedge and (budget is None or not budget.degraded)
+
+    async def _hedged_ainvoke(self, span: Any, messages: List[Message], *args, **kwargs) -> Any:
+        """Race `_ainvoke` against a late duplicate and account for the attempt that lost"""
+        hedger = get_hedger()
+        outcome = await hedger.race(self.id, lambda: self._ainvoke(span, messages, *args, **kwargs))
+        hedger.note_tokens(self.id, _usage_tokens(outcome.result) or 0)
+        if outcome.hedged:
+            span.set(hedged=True, hedge_won=outcome.hedge_won)
+            loser = outcome.loser
+            if loser.cancelled():
+                # The provider has already processed the prompt of a cancelled request
+                extra = estimate_prompt_tokens(messages)
+                self._charge(self.id, None, extra)
+            elif loser.exception() is None:
+                # Finished together with the winner; `_ainvoke` already charged it
+                extra = _usage_tokens(loser.result()) or 0
+            else:
+                extra = 0
+            hedger.note_tokens(self.id, extra, extra=True)
+        return outcome.result
+
+    def invoke(self, messages: List[Message], *args, **kwargs) -> Any:
+        model, messages, kwargs = self._plan_call(messages, kwargs)
+        with get_tracer().span(f"model:{model.id}", "model", messages=len(messages)) as span:
+            if model._hedged():
+                return get_hedger().run(model._hedged_ainvoke(span, messages, *args, **kwargs))
+            return model._invoke(span, messages, *args, **kwargs)
+
+    def _invoke(self, span: Any, messages: List[Message], *args, **kwargs) -> Any:
+        limiter = get_rate_limiter()
+        tokens = estimate_request_tokens(messages, self.max_tokens or self.max_completion_tokens)
+        waited = 0.0
+        for attempt in range(self.max_throttle_retries + 1):
+            permit = limiter.acquire(self.id, tokens, self.priority)
+            waited += permit.waited
+            span.set(queue_wait=round(waited, 3), throttled=attempt)
+            try:
+                response = super().invoke(messages, *args, **kwargs)
+            except Exception as e:
+                retry_after = throttle_details(e)
+                if retry_after is None or attempt == self.max_throttle_retries:
+                    limiter.release(permit, error=True, throttled=retry_after is not None)
+                    raise
+                limiter.release(permit, throttled=True, retry_after=retry_after)
+                time.sleep(self._backoff(attempt))
+                continue
+            limiter.release(permit, used_tokens=_usage_tokens(response))
+            _record_usage(span, response)
+            self._charge(self.id, response, tokens)
+            return response
+
+    async def ainvoke(self, messages: List[Message], *args, **kwargs) -> Any:
+        model, messages, kwargs = self._plan_call(messages, kwargs)
+        with get_tracer().span(f"model:{model.id}", "model", messages=len(messages)) as span:
+            if model._hedged():
+                return await model._hedged_ainvoke(span, messages, *args, **kwargs)
+            return await model._ainvoke(span, messages, *args, **kwargs)
+
+    async def _acquire_async(self, limiter: Any, tokens: int) -> Any:
+        acquiring = asyncio.ensure_future(limiter.acquire_async(self.id, tokens, self.priority))
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The permit is still granted in its worker thread; hand it back once it is
+            acquiring.add_done_callback(
+                lambda done: done.cancelled() or done.exception() or limiter.release(done.result(), cancelled=True))
+            raise
+
+    async def _ainvoke(self, span: Any, messages: List[Message], *args, **kwargs) -> Any:
+        limiter = get_rate_limiter()
+        tokens = estimate_request_tokens(messages, self.max_tokens or self.max_completion_tokens)
+        waited = 0.0
+        for attempt in range(self.max_throttle_retries + 1):
+            permit = await self._acquire_async(limiter, tokens)
+            waited += permit.waited
+            span.set(queue_wait=round(waited, 3), throttled=attempt)
+            try:
+                response = await super().ainvoke(messages, *args, **kwargs)
+            except asyncio.CancelledError:
+                limiter.release(permit, cancelled=True)
+                raise
+            except Exception as e:
+                retry_after = throttle_details(e)
+                if retry_after is None or attempt == self.max_throttle_retries:
+                    limiter.release(permit, error=True, throttled=retry_after is not None)
+                    raise
+                limiter.release(permit, throttled=True, retry_after=retry_after)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            limiter.release(permit, used_tokens=_usage_tokens(response))
+            _record_usage(span, response)
+            self._charge(self.id, response, tokens)
+            return response
+
+    def invoke_stream(self, messages: List[Message], *args, **kwargs) -> Iterator[Any]:
+        model, messages, kwargs = self._plan_call(messages, kwargs)
+        yield from model._invoke_stream(messages, *args, **kwargs)
+
+    def _invoke_stream(self, messages: List[Message], *args, **kwargs) -> Iterator[Any]:
+        # A stream holds its slot until the last chunk; a throttle can only surface before the first one
+        with get_tracer().span(f"model:{self.id}", "model", activate=False, messages=len(messages),
+                               stream=True) as span:
+            limiter = get_rate_limiter()
+            tokens = estimate_request_tokens(messages, self.max_tokens or self.max_completion_tokens)
+            for attempt in range(self.max_throttle_retries + 1):
+                permit = limiter.acquire(self.id, tokens, self.priority)
+                span.set(queue_wait=round(permit.waited, 3), throttled=attempt)
+                started = False
+                try:
+                    for chunk in super().invoke_stream(messages, *args, **kwargs):
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    retry_after = throttle_details(e)
+                    if started or retry_after is None or attempt == self.max_throttle_retries:
+                        limiter.release(permit, error=True, throttled=retry_after is not None)
+                        raise
+                    limiter.release(permit, throttled=True, retry_after=retry_after)
+                    time.sleep(self._backoff(attempt))
+                    continue
+                except BaseException:
+                    # Abandoned by the consumer or cancelled mid-stream: hand the slot back
+                    limiter.release(permit, cancelled=True)
+                    if started:
+                        self._charge(self.id, None, tokens)
+                    raise
+                limiter.release(permit)
+                self._charge(self.id, None, tokens)
+                return
+
+    async def ainvoke_stream(self, messages: List[Message], *args, **kwargs) -> AsyncIterator[Any]:
+        model, messages, kwargs = self._plan_call(messages, kwargs)
+        async for chunk in model._ainvoke_stream(messages, *args, **kwargs):
+            yield chunk
+
+    async def _ainvoke_stream(self, messages: List[Message], *args, **kwargs) -> AsyncIterator[Any]:
+        with get_tracer().span(f"model:{self.id}", "model", activate=False, messages=len(messages),
+                               stream=True) as span:
+            limiter = get_rate_limiter()
+            tokens = estimate_request_tokens(messages, self.max_tokens or self.max_completion_tokens)
+            for attempt in range(self.max_throttle_retries + 1):
+                permit = await self._acquire_async(limiter, tokens)
+                span.set(queue_wait=round(permit.waited, 3), throttled=attempt)
+                started = False
+                try:
+                    async for chunk in super().ainvoke_stream(messages, *args, **kwargs):
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    retry_after = throttle_details(e)
+                    if started or retry_after is None or attempt == self.max_throttle_retries:
+                        limiter.release(permit, error=True, throttled=retry_after is not None)
+                        raise
+                    limiter.release(permit, throttled=True, retry_after=retry_after)
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                except BaseException:
+                    # Abandoned by the consumer or cancelled mid-stream: hand the slot back
+                    limiter.release(permit, cancelled=True)
+                    if started:
+                        self._charge(self.id, None, tokens)
+                    raise
+                limiter.release(permit)
+                self._charge(self.id, None, tokens)
+                return
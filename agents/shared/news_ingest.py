@@ -0,0 +1,462 @@
+"""
+News Ingestion - Shared Platform Infrastructure
+Fetches per-symbol news incrementally (only stories newer than each symbol's
+cursor), drops syndicated copies of the same story, scores sentiment for the
+whole batch with a finance lexicon and keeps a rolling per-symbol sentiment
+series. Agents get a compact sentiment brief instead of re-reading articles.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Stories requested per symbol and fetch
+NEWS_FETCH_COUNT = 20
+# A story published up to this long before the cursor is still taken if unseen (feeds index late)
+LATE_ARRIVAL = 6 * 3600
+# How far back the first fetch of a symbol reaches
+BACKFILL = 7 * 86400
+# Stories are kept this long for the sentiment series
+RETENTION = 30 * 86400
+# Syndicated copies are looked for among a symbol's stories from this window
+DEDUP_WINDOW = 3 * 86400
+# Token-set Jaccard similarity above which two headlines are the same story
+DUPLICATE_SIMILARITY = 0.6
+
+WORD_PATTERN = re.compile(r"[a-z][a-z'\-]*|\d+(?:\.\d+)?%?")
+# Trailing source names that syndicators append ("Title - Reuters", "Title | Investing.com")
+SOURCE_SUFFIX = re.compile(r"\s+[|\-–—]\s+[^|\-–—]{1,40}$")
+STOPWORDS = {
+    "a", "an", "and", "as", "at", "by", "for", "from", "in", "inc", "is", "it", "its", "of", "on", "or",
+    "says", "the", "to", "with", "after", "amid", "over", "this", "that", "what", "why", "how", "s",
+}
+
+POSITIVE_WORDS = {
+    "beat", "beats", "boost", "boosts", "breakthrough", "bullish", "buyback", "climb", "climbs", "gain", "gains",
+    "growth", "high", "higher", "jump", "jumps", "optimistic", "outperform", "outperforms", "profit",
+    "profitable", "rally", "rallies", "rebound", "rebounds", "record", "rise", "rises", "soar", "soars",
+    "strong", "stronger", "surge", "surges", "tops", "upbeat", "upgrade", "upgraded", "upgrades", "win", "wins",
+    "approval", "approved", "expands", "exceeds",
+}
+NEGATIVE_WORDS = {
+    "bankruptcy", "bearish", "concern", "concerns", "crash", "decline", "declines", "default", "delay",
+    "delayed", "downgrade", "downgraded", "downgrades", "drop", "drops", "fall", "falls", "fined", "fraud",
+    "halt", "halted", "investigation", "lawsuit", "layoffs", "loss", "losses", "low", "lower", "miss",
+    "misses", "missed", "plunge", "plunges", "probe", "recall", "selloff", "shortfall", "sink", "sinks",
+    "slump", "slumps", "slowdown", "sued", "tumble", "tumbles", "underperform", "warning", "warns", "weak",
+    "weaker",
+}
+# Multi-word signals the single-word lexicon would miss or get wrong
+PHRASES = [
+    (re.compile(r"\b(raises|raised|lifts|boosts) (its )?(guidance|outlook|forecast)"), 2.0),
+    (re.compile(r"\b(cuts|cut|lowers|lowered|slashes) (its )?(guidance|outlook|forecast)"), -2.0),
+    (re.compile(r"\bprice target (raised|increased|boosted)|\braises price target"), 1.0),
+    (re.compile(r"\bprice target (cut|lowered|reduced)|\b(cuts|lowers) price target"), -1.0),
+    (re.compile(r"\b(beats|tops|exceeds) (\w+ )?(estimates|expectations|forecasts)"), 1.0),
+    (re.compile(r"\b(misses|missed|falls short of) (\w+ )?(estimates|expectations|forecasts)"), -1.0),
+]
+NEGATORS = {"not", "no", "never", "without", "fails", "unlikely"}
+NEGATION_WINDOW = 3
+
+
+def normalize_headline(title: str) -> str:
+    """Lower-case a headline and strip the source suffix and punctuation"""
+    title = SOURCE_SUFFIX.sub("", (title or "").strip())
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s%.]", " ", title.lower())).strip()
+
+
+def headline_tokens(title: str) -> frozenset:
+    return frozenset(t for t in WORD_PATTERN.findall(normalize_headline(title)) if t not in STOPWORDS)
+
+
+def score_headlines(texts: Sequence[str]) -> np.ndarray:
+    """Lexicon sentiment in [-1, 1] for every text in one vectorized pass
+
+    Tokens of the whole batch are flattened into shared arrays tagged with
+    their text index and summed with `np.bincount`. Polarity flips within a
+    few words after a negator, and guidance, price-target and estimate
+    phrases add their own weight. Few sentiment hits pull the score to 0.
+    """
+    n_texts = len(texts)
+    if n_texts == 0:
+        return np.zeros(0)
+    lowered = [(text or "").lower() for text in texts]
+    tokens: List[str] = []
+    text_ids: List[int] = []
+    for i, text in enumerate(lowered):
+        words = WORD_PATTERN.findall(text)
+        tokens.extend(words)
+        text_ids.extend([i] * len(words))
+    ids = np.asarray(text_ids, dtype=np.int64)
+    polarity = np.fromiter(((t in POSITIVE_WORDS) - (t in NEGATIVE_WORDS) for t in tokens),
+                           dtype=np.float64, count=len(tokens))
+
+    negators = np.flatnonzero(np.fromiter((t in NEGATORS for t in tokens), dtype=bool, count=len(tokens)))
+    for offset in range(1, NEGATION_WINDOW + 1):
+        targets = negators + offset
+        targets = targets[targets < len(tokens)]
+        polarity[targets[ids[targets] == ids[targets - offset]]] *= -1
+
+    total = np.bincount(ids, weights=polarity, minlength=n_texts)
+    hits = np.bincount(ids, weights=np.abs(polarity), minlength=n_texts)
+    for pattern, weight in PHRASES:
+        matches = np.fromiter((len(pattern.findall(text)) for text in lowered), dtype=np.float64, count=n_texts)
+        total += weight * matches
+        hits += abs(weight) * matches
+    return np.clip(total / (hits + 1), -1.0, 1.0)
+
+
+@dataclass
+class NewsItem:
+    """One story about a symbol"""
+    symbol: str
+    item_id: str
+    title: str
+    published_at: float
+    publisher: str = ""
+    url: str = ""
+    summary: str = ""
+
+
+def _timestamp(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def fetch_news_items(symbol: str, count: int = NEWS_FETCH_COUNT) -> List[NewsItem]:
+    """Latest stories for a symbol from Yahoo Finance (which cannot filter by date; the cursor does that)"""
+    import yfinance as yf
+
+    items = []
+    for raw in yf.Ticker(symbol).get_news(count=count) or []:
+        # Newer yfinance versions nest the article under "content"
+        content = raw.get("content") or raw
+        title = content.get("title")
+        if not title:
+            continue
+        # An undated story cannot be placed against the cursor; stamping it "now" would skip later stories
+        published = _timestamp(content.get("pubDate") or content.get("providerPublishTime"))
+        if published is None:
+            continue
+        url = (content.get("canonicalUrl") or {}).get("url") or content.get("link") or ""
+        item_id = raw.get("id") or raw.get("uuid") or hashlib.sha1(f"{title}|{url}".encode("utf-8")).hexdigest()
+        items.append(NewsItem(
+            symbol=symbol, item_id=str(item_id), title=title, published_at=published,
+            publisher=(content.get("provider") or {}).get("displayName") or content.get("publisher") or "",
+            url=url, summary=content.get("summary") or "",
+        ))
+    return items
+
+
+SYNTHETIC_HEADLINES = [
+    "{symbol} beats estimates as revenue growth tops expectations",
+    "{symbol} shares slip after analyst downgrade",
+    "{symbol} raises guidance on strong demand",
+    "{symbol} faces probe over supply chain disclosures",
+    "{symbol} announces buyback and dividend increase",
+    "{symbol} trades flat ahead of product event",
+]
+# A synthetic story is published every this many seconds
+SYNTHETIC_INTERVAL = 900
+
+
+def synthetic_news_items(symbol: str, count: int = 5, now: Optional[float] = None) -> List[NewsItem]:
+    """Deterministic local stories for load tests and offline runs, no network
+
+    Stories sit on a fixed grid, so repeated fetches overlap like a real feed
+    and exercise the cursor, dedup and scoring paths.
+    """
+    latest = int((now or time.time()) // SYNTHETIC_INTERVAL) * SYNTHETIC_INTERVAL
+    items = []
+    for i in range(count):
+        published = latest - i * SYNTHETIC_INTERVAL
+        slot = published // SYNTHETIC_INTERVAL
+        title = SYNTHETIC_HEADLINES[(slot + sum(map(ord, symbol))) % len(SYNTHETIC_HEADLINES)]
+        items.append(NewsItem(symbol=symbol, item_id=f"synthetic-{symbol}-{slot}",
+                              title=title.format(symbol=symbol),
+                              published_at=float(published), publisher="Synthetic"))
+    return items
+
+
+def default_fetch() -> Optional[Callable[[str], List[NewsItem]]]:
+    """News source chosen by AGENT_NEWS: "yahoo" (default), "synthetic", or "0"/"off" for no fetching"""
+    source = os.getenv("AGENT_NEWS", "yahoo").lower()
+    if source in ("0", "false", "no", "off"):
+        return None
+    if source == "synthetic":
+        return synthetic_news_items
+    return fetch_news_items
+
+
+@dataclass
+class IngestReport:
+    """What one ingestion pass found, per symbol"""
+    fetched: Dict[str, int] = field(default_factory=dict)
+    new: Dict[str, int] = field(default_factory=dict)
+    duplicates: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def summary(self) -> str:
+        line = (f"📰 News: {sum(self.new.values())} new stories for {len(self.new)} symbols, "
+                f"{sum(self.duplicates.values())} syndicated copies dropped, "
+                f"{sum(self.fetched.values())} fetched in {self.seconds:.1f}s")
+        if self.errors:
+            line += f"; unavailable for {', '.join(sorted(self.errors))}"
+        return line
+
+
+@dataclass
+class SentimentSnapshot:
+    """A symbol's recent news sentiment, compact enough for a prompt"""
+    symbol: str
+    stories_24h: int = 0
+    sentiment_24h: Optional[float] = None
+    stories_7d: int = 0
+    sentiment_7d: Optional[float] = None
+    copies_7d: int = 0
+    most_positive: Optional[Tuple[str, float]] = None
+    most_negative: Optional[Tuple[str, float]] = None
+    unavailable: bool = False
+
+    @property
+    def trend(self) -> Optional[float]:
+        if self.sentiment_24h is None or self.sentiment_7d is None:
+            return None
+        return self.sentiment_24h - self.sentiment_7d
+
+    def line(self) -> str:
+        if not self.stories_7d:
+            return f"- {self.symbol}: no stories in the last 7 days" + (" (news feed unavailable)" if self.unavailable else "")
+        recent = (f"24h {self.sentiment_24h:+.2f} over {self.stories_24h} stories"
+                  if self.stories_24h else "no stories in the last 24h")
+        trend = self.trend
+        direction = "" if trend is None else (", improving" if trend > 0.1 else ", worsening" if trend < -0.1 else ", steady")
+        text = (f"- {self.symbol}: {recent} (7d {self.sentiment_7d:+.2f} over {self.stories_7d} stories, "
+                f"{self.copies_7d} syndicated copies{direction}).")
+        if self.most_positive and self.most_positive[1] > 0:
+            text += f' Most positive: "{self.most_positive[0]}" ({self.most_positive[1]:+.2f}).'
+        if self.most_negative and self.most_negative[1] < 0:
+            text += f' Most negative: "{self.most_negative[0]}" ({self.most_negative[1]:+.2f}).'
+        return text
+
+
+class NewsIngestor:
+    """Incremental news store with per-symbol cursors in a platform database
+
+    Each `ingest()` fetches every symbol's latest stories in parallel, keeps
+    those newer than the symbol's cursor (or published within `LATE_ARRIVAL`
+    of it and not seen yet), marks syndicated copies of stories already held,
+    scores the rest in one batch and advances the cursors. Without a `fetch`,
+    the AGENT_NEWS source is looked up on every pass; when that is off,
+    `brief()` shows stored stories only.
+    `scorer` is any callable from a list of texts to scores in [-1, 1], e.g. a
+    local model.
+    """
+
+    def __init__(self, db_file: str, fetch: Optional[Callable[[str], List[NewsItem]]] = None,
+                 scorer: Callable[[Sequence[str]], np.ndarray] = score_headlines, table_prefix: str = "news",
+                 max_workers: int = 8):
+        self.db_file = db_file
+        self._fetch_override = fetch
+        self.scorer = scorer
+        self.max_workers = max_workers
+        self.items_table = f"{table_prefix}_items"
+        self.cursors_table = f"{table_prefix}_cursors"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.items_table} (symbol TEXT, item_id TEXT, "
+                         "published_at REAL, fetched_at REAL, title TEXT, publisher TEXT, url TEXT, "
+                         "duplicate_of TEXT, sentiment REAL, copies INTEGER DEFAULT 0, "
+                         "PRIMARY KEY (symbol, item_id))")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.items_table}_published "
+                         f"ON {self.items_table} (symbol, published_at)")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.cursors_table} (symbol TEXT PRIMARY KEY, "
+                         "published_at REAL, checked_at REAL)")
+
+    @property
+    def fetch(self) -> Optional[Callable[[str], List[NewsItem]]]:
+        return self._fetch_override or default_fetch()
+
+    @fetch.setter
+    def fetch(self, fetch: Optional[Callable[[str], List[NewsItem]]]):
+        self._fetch_override = fetch
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _fetch(fetch: Callable[[str], List[NewsItem]], symbol: str) -> Tuple[str, Optional[List[NewsItem]], Optional[str]]:
+        try:
+            return symbol, fetch(symbol), None
+        except Exception as error:
+            return symbol, None, f"{type(error).__name__}: {error}"
+
+    def ingest(self, symbols: Sequence[str], now: Optional[float] = None) -> IngestReport:
+        start = time.perf_counter()
+        now = now or time.time()
+        report = IngestReport()
+        fetch = self.fetch
+        if fetch is None:
+            return report
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(symbols), 1))) as executor:
+            fetched = list(executor.map(lambda symbol: self._fetch(fetch, symbol), symbols))
+
+        with self._connect() as conn:
+            cursors = dict(conn.execute(f"SELECT symbol, published_at FROM {self.cursors_table}").fetchall())
+            fresh: List[NewsItem] = []
+            copies: List[Tuple[str, str, NewsItem]] = []
+            advanced = {}
+            for symbol, items, error in fetched:
+                if error:
+                    report.errors[symbol] = error
+                    continue
+                report.fetched[symbol] = len(items)
+                cursor = cursors.get(symbol, now - BACKFILL - LATE_ARRIVAL)
+                known = {row[0]: headline_tokens(row[1]) for row in conn.execute(
+                    f"SELECT item_id, title FROM {self.items_table} WHERE symbol = ? AND published_at >= ? "
+                    "AND duplicate_of IS NULL", (symbol, now - DEDUP_WINDOW))}
+                seen = {row[0] for row in conn.execute(
+                    f"SELECT item_id FROM {self.items_table} WHERE symbol = ? AND published_at >= ?",
+                    (symbol, cursor - LATE_ARRIVAL))}
+                report.new[symbol], report.duplicates[symbol] = 0, 0
+                for item in sorted(items, key=lambda item: item.published_at):
+                    if item.item_id in seen or item.published_at < cursor - LATE_ARRIVAL:
+                        continue
+                    seen.add(item.item_id)
+                    tokens = headline_tokens(item.title)
+                    original = _find_original(tokens, known)
+                    if original:
+                        copies.append((symbol, original, item))
+                        report.duplicates[symbol] += 1
+                        continue
+                    known[item.item_id] = tokens
+                    fresh.append(item)
+                    report.new[symbol] += 1
+                advanced[symbol] = max([cursor] + [item.published_at for item in items])
+
+            # One scoring call for every new story of every symbol
+            scores = self.scorer([f"{item.title}. {item.summary}" for item in fresh]) if fresh else []
+            conn.executemany(f"INSERT OR IGNORE INTO {self.items_table} VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, 0)", [
+                (item.symbol, item.item_id, item.published_at, now, item.title, item.publisher, item.url, float(score))
+                for item, score in zip(fresh, scores)
+            ])
+            conn.executemany(f"INSERT OR IGNORE INTO {self.items_table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, 0)", [
+                (symbol, item.item_id, item.published_at, now, item.title, item.publisher, item.url, original)
+                for symbol, original, item in copies
+            ])
+            conn.executemany(f"UPDATE {self.items_table} SET copies = copies + 1 WHERE symbol = ? AND item_id = ?",
+                             [(symbol, original) for symbol, original, _ in copies])
+            conn.executemany(f"INSERT OR REPLACE INTO {self.cursors_table} VALUES (?, ?, ?)",
+                             [(symbol, cursor, now) for symbol, cursor in advanced.items()])
+            conn.execute(f"DELETE FROM {self.items_table} WHERE published_at < ?", (now - RETENTION,))
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def snapshot(self, symbols: Sequence[str], now: Optional[float] = None,
+                 unavailable: Sequence[str] = ()) -> Dict[str, SentimentSnapshot]:
+        now = now or time.time()
+        snapshots = {}
+        with self._connect() as conn:
+            for symbol in symbols:
+                rows = conn.execute(f"SELECT title, published_at, sentiment, copies FROM {self.items_table} "
+                                    "WHERE symbol = ? AND published_at >= ? AND duplicate_of IS NULL",
+                                    (symbol, now - 7 * 86400)).fetchall()
+                snapshot = SentimentSnapshot(symbol, unavailable=symbol in unavailable)
+                if rows:
+                    scores = np.array([row[2] for row in rows])
+                    recent = np.array([row[1] >= now - 86400 for row in rows])
+                    snapshot.stories_7d, snapshot.sentiment_7d = len(rows), float(scores.mean())
+                    snapshot.copies_7d = sum(row[3] for row in rows)
+                    if recent.any():
+                        snapshot.stories_24h, snapshot.sentiment_24h = int(recent.sum()), float(scores[recent].mean())
+                    snapshot.most_positive = (rows[scores.argmax()][0], float(scores.max()))
+                    snapshot.most_negative = (rows[scores.argmin()][0], float(scores.min()))
+                snapshots[symbol] = snapshot
+        return snapshots
+
+    def series(self, symbol: str, days: int = 30, freq: str = "D", halflife: str = "3D", now: Optional[float] = None):
+        """Stories, mean sentiment and a time-decayed sentiment per period for one symbol (a pandas DataFrame)"""
+        import pandas as pd
+
+        now = now or time.time()
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT published_at, sentiment FROM {self.items_table} WHERE symbol = ? "
+                                "AND published_at >= ? AND duplicate_of IS NULL ORDER BY published_at",
+                                (symbol, now - days * 86400)).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=["stories", "sentiment", "decayed"])
+        scores = pd.Series([row[1] for row in rows],
+                           index=pd.to_datetime([row[0] for row in rows], unit="s", utc=True))
+        decayed = scores.ewm(halflife=pd.Timedelta(halflife), times=scores.index).mean()
+        frame = pd.DataFrame({
+            "stories": scores.resample(freq).count(),
+            "sentiment": scores.resample(freq).mean(),
+            "decayed": decayed.resample(freq).last(),
+        })
+        frame["decayed"] = frame["decayed"].ffill()
+        return frame
+
+    def brief(self, symbols: Sequence[str], refresh: bool = True) -> str:
+        """Ingest new stories, then summarize each symbol's sentiment for an agent prompt"""
+        unavailable = []
+        if refresh and self.fetch is not None:
+            report = self.ingest(symbols)
+            print(report.summary())
+            unavailable = list(report.errors)
+        snapshots = self.snapshot(symbols, unavailable=unavailable)
+        return "\n".join(
+            ["News sentiment from deduplicated headlines, lexicon-scored from -1 (bearish) to +1 (bullish):"]
+            + [snapshots[symbol].line() for symbol in symbols]
+        )
+
+
+def _find_original(tokens: frozenset, known: Dict[str, frozenset]) -> Optional[str]:
+    """Id of a held story this headline syndicates, if any"""
+    if len(tokens) < 3:
+        return None
+    for item_id, other in known.items():
+        if len(other) >= 3 and len(tokens & other) / len(tokens | other) >= DUPLICATE_SIMILARITY:
+            return item_id
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest news and show per-symbol sentiment")
+    parser.add_argument("db", help="platform database, e.g. financial_intelligence/financial_intelligence.db")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--no-refresh", action="store_true", help="show stored sentiment without fetching")
+    parser.add_argument("--series", action="store_true", help="also print each symbol's daily series")
+    args = parser.parse_args()
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    ingestor = NewsIngestor(args.db)
+    print(f"📰 News Sentiment - {args.db}")
+    print("=" * 60)
+    print(ingestor.brief(symbols, refresh=not args.no_refresh))
+    if args.series:
+        for symbol in symbols:
+            print(f"\n{symbol}")
+            print(ingestor.series(symbol).round(3).to_string())
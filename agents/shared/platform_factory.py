@@ -0,0 +1,317 @@
+"""
+Platform Factory - Shared Platform Infrastructure
+Builds agents, teams and storage from a declarative TOML spec per platform.
+A profile decides how chatty the result is: "development" keeps debug logging
+and tool-call echo, "production" turns them off, skips per-run telemetry and
+tunes the SQLite storage. Tool classes are only imported when a spec uses them.
+"""
+
+import argparse
+import contextlib
+import copy
+import importlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+from sqlalchemy import event
+
+from .http_pool import share_tool_sessions
+from .memory_compaction import CompactingSqliteStorage
+from .models import ManagedOpenAIChat
+from .tracing import instrument
+
+DEFAULT_PROFILE = "development"
+
+# agno's default model for a team leader
+DEFAULT_TEAM_MODEL = "gpt-4o"
+# Loggers a profile's log_level applies to
+AGNO_LOGGERS = ("agno", "agno-team", "agno-workflow")
+
+# Settings applied to everything a spec builds; a spec may override any of them under [profiles.<name>]
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "development": {
+        "log_level": None,
+        "team": {"debug_mode": True, "show_tool_calls": True, "markdown": True},
+        "agent": {"show_tool_calls": True, "markdown": True},
+        "storage": {},
+    },
+    "production": {
+        "log_level": "WARNING",
+        "team": {"debug_mode": False, "show_tool_calls": False, "markdown": True, "telemetry": False},
+        "agent": {"debug_mode": False, "show_tool_calls": False, "markdown": True, "telemetry": False},
+        "storage": {
+            # WAL lets readers and the writer proceed together; NORMAL syncs at checkpoints only
+            "pragmas": {"journal_mode": "WAL", "synchronous": "NORMAL", "temp_store": "MEMORY"},
+        },
+    },
+}
+
+# Tool type -> "module:Class", imported on first use. Specs add platform-local tools under [tools].
+TOOL_REGISTRY: Dict[str, str] = {
+    "yfinance": "agno.tools.yfinance:YFinanceTools",
+    "reasoning": "agno.tools.reasoning:ReasoningTools",
+    "arxiv": "agno.tools.arxiv:ArxivTools",
+    "duckduckgo": "agno.tools.duckduckgo:DuckDuckGoTools",
+    "cached_search": ".search_cache:CachedSearchTools",
+}
+
+
+def active_profile() -> str:
+    """Profile named by the AGENT_PROFILE environment variable"""
+    return os.getenv("AGENT_PROFILE", DEFAULT_PROFILE)
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _import(target: str) -> Any:
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name, package=__package__), attr)
+
+
+def _apply_pragmas(storage: CompactingSqliteStorage, pragmas: Dict[str, Any]):
+    """Run the PRAGMAs on every new connection of the storage's engine"""
+
+    @event.listens_for(storage.db_engine, "connect")
+    def set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    # Connections opened while the storage created its tables predate the listener
+    storage.db_engine.dispose()
+
+
+class PlatformFactory:
+    """Builds one platform's agents, team and storage from its TOML spec
+
+        factory = PlatformFactory.for_script(__file__)
+        team = factory.build_team()
+
+    `context` values are substituted into `{placeholders}` in instructions.
+    `model_kwargs` are passed to every model built, e.g. a custom http_client.
+    """
+
+    def __init__(self, spec_file: str, profile: Optional[str] = None, db_dir: Optional[str] = None,
+                 model_kwargs: Optional[Dict[str, Any]] = None):
+        self.spec_file = os.path.abspath(spec_file)
+        with open(self.spec_file, "rb") as f:
+            self.spec = tomllib.load(f)
+        self.profile_name = profile or active_profile()
+        profiles = _merge(PROFILES, self.spec.get("profiles", {}))
+        if self.profile_name not in profiles:
+            raise ValueError(f"Unknown profile '{self.profile_name}', expected one of: {', '.join(profiles)}")
+        self.profile = profiles[self.profile_name]
+        self.db_dir = db_dir
+        self.model_kwargs = model_kwargs or {}
+        self.tools = {**TOOL_REGISTRY, **self.spec.get("tools", {})}
+        self._storage = None
+
+        # Platform-local tool modules live next to the spec
+        spec_dir = os.path.dirname(self.spec_file)
+        if spec_dir not in sys.path:
+            sys.path.append(spec_dir)
+        if self.profile.get("log_level"):
+            level = getattr(logging, self.profile["log_level"])
+            for name in AGNO_LOGGERS:
+                logging.getLogger(name).setLevel(level)
+
+    @classmethod
+    def for_script(cls, script_file: str, **kwargs) -> "PlatformFactory":
+        """Factory for the spec named after a platform script, e.g. financial_intelligence.toml"""
+        return cls(os.path.splitext(os.path.abspath(script_file))[0] + ".toml", **kwargs)
+
+    def model(self, spec: Any) -> ManagedOpenAIChat:
+        """A model from an id or a table such as `{ id = "gpt-4o", hedge = true }`, under the profile's model settings"""
+        settings = {"id": spec} if isinstance(spec, str) else dict(spec)
+        return ManagedOpenAIChat(**{**self.profile.get("model", {}), **settings, **self.model_kwargs})
+
+    def tool(self, spec: Dict[str, Any]) -> Any:
+        settings = dict(spec)
+        tool_type = settings.pop("type")
+        if tool_type not in self.tools:
+            raise ValueError(f"Unknown tool type '{tool_type}' in {self.spec_file}")
+        # Inline tables with a type are tools themselves, e.g. the sources of a merged search
+        for key, value in settings.items():
+            if isinstance(value, dict) and "type" in value:
+                settings[key] = self.tool(value)
+        return share_tool_sessions(_import(self.tools[tool_type])(**settings))
+
+    def storage(self) -> CompactingSqliteStorage:
+        """The platform's storage, shared by the team and any agents that ask for it"""
+        if self._storage is None:
+            settings = _merge(self.spec["storage"], self.profile.get("storage", {}))
+            pragmas = settings.pop("pragmas", None)
+            if self.db_dir:
+                settings["db_file"] = os.path.join(self.db_dir, os.path.basename(settings["db_file"]))
+            self._storage = CompactingSqliteStorage(**settings)
+            if pragmas:
+                _apply_pragmas(self._storage, pragmas)
+        return self._storage
+
+    def _instructions(self, instructions: List[str], context: Optional[Dict[str, Any]]) -> List[str]:
+        return [line.format(**context) for line in instructions] if context else list(instructions)
+
+    def build_agent(self, key: str, context: Optional[Dict[str, Any]] = None):
+        from agno.agent import Agent
+
+        spec = dict(self.spec["agents"][key])
+        settings = {**self.profile.get("agent", {}), **spec.pop("settings", {})}
+        if spec.pop("storage", False):
+            settings["storage"] = self.storage()
+        return Agent(
+            name=spec.pop("name"),
+            role=spec.pop("role", None),
+            model=self.model(spec.pop("model")),
+            tools=[self.tool(tool) for tool in spec.pop("tools", [])],
+            instructions=self._instructions(spec.pop("instructions", []), context),
+            **settings,
+            **spec,
+        )
+
+    def build_team(self, members: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None):
+        """The platform team with the given member keys (default: all of [team].members), instrumented for tracing"""
+        from agno.team import Team
+
+        spec = dict(self.spec["team"])
+        member_keys = members if members is not None else spec.pop("members")
+        spec.pop("members", None)
+        settings = {**self.profile.get("team", {}), **spec.pop("settings", {})}
+        # Without a model of its own the leader would get agno's plain OpenAIChat, outside the
+        # rate limiter, budgets and the shared connection pool
+        spec["model"] = self.model(spec.get("model", DEFAULT_TEAM_MODEL))
+        team = Team(
+            name=spec.pop("name"),
+            members=[self.build_agent(key, context) for key in member_keys],
+            instructions=self._instructions(spec.pop("instructions", []), context),
+            storage=self.storage(),
+            **settings,
+            **spec,
+        )
+        # Team, member, model and tool spans for every run (see shared/tracing.py)
+        return instrument(team)
+
+
+def stub_completion(body: Dict[str, Any], member_id: Optional[str] = None) -> Dict[str, Any]:
+    """OpenAI chat completion for a request body: leaders delegate once to `member_id` (or all members),
+    everyone else answers"""
+    names = [tool["function"]["name"] for tool in body.get("tools", [])]
+    message = {"role": "assistant", "content": "Stub analysis: no material change, HOLD."}
+    if body["messages"][-1]["role"] != "tool":
+        delegate = next((name for name in names if name in ("transfer_task_to_member", "run_member_agents")), None)
+        if delegate:
+            arguments = {"task_description": "Analyze the request", "expected_output": "A short report"}
+            if delegate == "transfer_task_to_member":
+                arguments["member_id"] = member_id
+            message = {"role": "assistant", "content": None, "tool_calls": [
+                {"id": "call_stub", "type": "function", "function": {"name": delegate, "arguments": json.dumps(arguments)}}
+            ]}
+    return {
+        "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+        "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 500, "completion_tokens": 50, "total_tokens": 550},
+    }
+
+
+def _stub_transport(delay: float, member_id: str):
+    """httpx transport answering every call with `stub_completion` after `delay` seconds"""
+    import httpx
+
+    def handler(request):
+        body = json.loads(request.content)
+        time.sleep(delay)
+        return httpx.Response(200, json=stub_completion(body, member_id))
+
+    return httpx.MockTransport(handler)
+
+
+def benchmark(spec_file: str, profiles: List[str], runs: int = 5, model_delay: float = 0.0) -> Dict[str, Dict[str, float]]:
+    """Build and run the spec's team under each profile against a stub model; returns per-profile timings
+
+    With the default `model_delay` of 0 the stub answers instantly, so a run's
+    time is the platform's own overhead: logging, tool-call echo, telemetry,
+    storage and tracing.
+    """
+    import httpx
+    from agno.utils.string import url_safe_string
+
+    from . import tracing
+
+    results = {}
+    # Building a factory sets the agno log levels; each profile starts from, and the caller gets back, its own
+    levels = {name: logging.getLogger(name).level for name in AGNO_LOGGERS}
+    for profile in profiles:
+        with tempfile.TemporaryDirectory() as workdir:
+            tracing._tracer = tracing.Tracer(trace_file=os.path.join(workdir, "traces.jsonl"))
+            # An untimed build first, so neither profile pays for importing agno and the tools
+            PlatformFactory(spec_file, profile=profile, db_dir=workdir).build_team()
+            start = time.perf_counter()
+            factory = PlatformFactory(spec_file, profile=profile, db_dir=workdir)
+            lead = factory.spec["agents"][factory.spec["team"]["members"][0]]["name"]
+            transport = _stub_transport(model_delay, url_safe_string(lead))
+            factory.model_kwargs = {"http_client": httpx.Client(transport=transport)}
+            team = factory.build_team()
+            build_seconds = time.perf_counter() - start
+
+            timings, output_chars = [], 0
+            for number in range(runs + 1):
+                buffer = io.StringIO()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+                    team.run(f"Benchmark request {number}", session_id=f"bench-{number}")
+                # The first run warms imports and connections, so it is left out
+                if number:
+                    timings.append(time.perf_counter() - start)
+                    output_chars += len(buffer.getvalue())
+            results[profile] = {
+                "build_ms": build_seconds * 1000,
+                "run_ms": statistics.median(timings) * 1000,
+                "log_kb": output_chars / runs / 1024,
+            }
+        for name, level in levels.items():
+            logging.getLogger(name).setLevel(level)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-run overhead of platform profiles")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("spec", help="platform spec, e.g. financial_intelligence/financial_intelligence.toml")
+    parser.add_argument("--profiles", nargs="+", default=["development", "production"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model-delay", type=float, default=0.0, help="seconds each stub model call takes")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    print(f"⏱️ Profile Overhead: {os.path.basename(args.spec)} ({args.runs} runs, stub model)")
+    print("=" * 60)
+    results = benchmark(args.spec, args.profiles, runs=args.runs, model_delay=args.model_delay)
+    print(f"{'profile':<14}{'build':>10}{'per run':>12}{'log/run':>12}")
+    for profile, result in results.items():
+        print(f"{profile:<14}{result['build_ms']:>8.0f}ms{result['run_ms']:>10.0f}ms{result['log_kb']:>10.1f}KB")
+    if len(results) > 1:
+        baseline, *others = results
+        for profile in others:
+            saved = results[baseline]["run_ms"] - results[profile]["run_ms"]
+            print(f"💡 {profile} saves {saved:.0f}ms per run "
+                  f"({saved / results[baseline]['run_ms']:.0%}) over {baseline}")
@@ -0,0 +1,377 @@
+"""
+Rate Limiter - Shared Platform Infrastructure
+Coordinates model calls across every agent in a process (and optionally across
+processes) with per-model request and token buckets, AIMD concurrency control
+driven by throttling responses, and priority ordering of queued calls.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agno.utils.log import logger
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BATCH = 10
+
+
+@dataclass
+class ModelLimits:
+    """Provider limits for one model id: requests and tokens per minute, concurrency bounds"""
+    rpm: float
+    tpm: float
+    max_concurrency: int = 16
+    min_concurrency: int = 1
+    initial_concurrency: int = 4
+
+
+# OpenAI tier-1 limits; override with configure_limits() or the MODEL_RATE_LIMITS env var, e.g.
+# MODEL_RATE_LIMITS='{"gpt-4o": {"rpm": 5000, "tpm": 800000, "max_concurrency": 64}}'
+DEFAULT_LIMITS: Dict[str, ModelLimits] = {
+    "gpt-4o": ModelLimits(rpm=500, tpm=30_000),
+    "gpt-4o-mini": ModelLimits(rpm=500, tpm=200_000),
+}
+FALLBACK_LIMITS = ModelLimits(rpm=500, tpm=30_000)
+
+
+def _limits_from_env() -> Dict[str, ModelLimits]:
+    raw = os.getenv("MODEL_RATE_LIMITS")
+    if not raw:
+        return {}
+    return {model_id: ModelLimits(**values) for model_id, values in json.loads(raw).items()}
+
+
+_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("rate_limit_priority", default=None)
+
+
+@contextmanager
+def rate_limit_priority(priority: int) -> Iterator[None]:
+    """Run model calls made inside this block (and tasks started from it) at `priority`"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(default: int = PRIORITY_NORMAL) -> int:
+    value = _priority.get()
+    return default if value is None else value
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit
+
+    Every successful call raises the limit by `increase / limit`, i.e. roughly
+    +`increase` per window of calls. A throttled call multiplies it by
+    `decrease`, but only if the call was admitted after the previous decrease.
+    A burst of 429s from one overload therefore halves concurrency once.
+    """
+
+    def __init__(self, limits: ModelLimits, increase: float = 1.0, decrease: float = 0.5):
+        self.limit = float(limits.initial_concurrency)
+        self.min_limit = float(limits.min_concurrency)
+        self.max_limit = float(limits.max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self._last_decrease = float("-inf")
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+
+    def on_throttle(self, granted_at: float) -> bool:
+        """Back off for a throttled call admitted at `granted_at`; True if the limit was lowered"""
+        if granted_at <= self._last_decrease:
+            return False
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self._last_decrease = time.monotonic()
+        return True
+
+    @property
+    def slots(self) -> int:
+        return max(int(self.limit), 1)
+
+
+class LocalBuckets:
+    """In-process request and token buckets, refilled continuously at the per-minute rate"""
+
+    def __init__(self):
+        self._state: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._paused: Dict[str, float] = {}
+
+    def _level(self, key: Tuple[str, str], capacity: float, now: float) -> float:
+        level, updated = self._state.get(key, (capacity, now))
+        return min(capacity, level + (now - updated) * capacity / 60.0)
+
+    def take(self, model_id: str, limits: ModelLimits, tokens: float) -> float:
+        """Consume one request and `tokens`, or return the seconds to wait before they are available"""
+        now = time.time()
+        pause = self._paused.get(model_id, 0.0) - now
+        if pause > 0:
+            return pause
+        requests = self._level((model_id, "requests"), limits.rpm, now)
+        budget = self._level((model_id, "tokens"), limits.tpm, now)
+        wait = max((1 - requests) * 60.0 / limits.rpm, (tokens - budget) * 60.0 / limits.tpm, 0.0)
+        if wait > 0:
+            return wait
+        self._state[(model_id, "requests")] = (requests - 1, now)
+        self._state[(model_id, "tokens")] = (budget - tokens, now)
+        return 0.0
+
+    def adjust(self, model_id: str, limits: ModelLimits, tokens: float):
+        """Charge (or refund, if negative) tokens after the real usage is known"""
+        now = time.time()
+        key = (model_id, "tokens")
+        self._state[key] = (self._level(key, limits.tpm, now) - tokens, now)
+
+    def pause(self, model_id: str, seconds: float):
+        self._paused[model_id] = max(self._paused.get(model_id, 0.0), time.time() + seconds)
+
+
+class SqliteBuckets:
+    """Buckets kept in a SQLite file so every process on the machine draws from the same budget"""
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_buckets (model_id TEXT, kind TEXT, level REAL, "
+                         "updated_at REAL, PRIMARY KEY (model_id, kind))")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _level(conn, model_id: str, kind: str, capacity: float, now: float) -> float:
+        row = conn.execute("SELECT level, updated_at FROM rate_buckets WHERE model_id = ? AND kind = ?",
+                           (model_id, kind)).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (now - row[1]) * capacity / 60.0)
+
+    @staticmethod
+    def _store(conn, model_id: str, kind: str, level: float, now: float):
+        conn.execute("INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?, ?)", (model_id, kind, level, now))
+
+    def take(self, model_id: str, limits: ModelLimits, tokens: float) -> float:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT level FROM rate_buckets WHERE model_id = ? AND kind = 'pause'",
+                                   (model_id,)).fetchone()
+                if row and row[0] > now:
+                    return row[0] - now
+                requests = self._level(conn, model_id, "requests", limits.rpm, now)
+                budget = self._level(conn, model_id, "tokens", limits.tpm, now)
+                wait = max((1 - requests) * 60.0 / limits.rpm, (tokens - budget) * 60.0 / limits.tpm, 0.0)
+                if wait <= 0:
+                    self._store(conn, model_id, "requests", requests - 1, now)
+                    self._store(conn, model_id, "tokens", budget - tokens, now)
+                return wait
+            finally:
+                conn.execute("COMMIT")
+
+    def adjust(self, model_id: str, limits: ModelLimits, tokens: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._store(conn, model_id, "tokens", self._level(conn, model_id, "tokens", limits.tpm, now) - tokens, now)
+            conn.execute("COMMIT")
+
+    def pause(self, model_id: str, seconds: float):
+        until = time.time() + seconds
+        with self._connect() as conn:
+            conn.execute("INSERT INTO rate_buckets VALUES (?, 'pause', ?, ?) ON CONFLICT (model_id, kind) "
+                         "DO UPDATE SET level = MAX(level, excluded.level)", (model_id, until, time.time()))
+
+
+@dataclass
+class Permit:
+    """A granted model call; hand it back to `RateLimiter.release` when the call ends"""
+    model_id: str
+    tokens: float
+    priority: int
+    granted_at: float = field(default_factory=time.monotonic)
+    waited: float = 0.0
+
+
+@dataclass
+class ModelStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    tokens: int = 0
+    wait_seconds: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.concurrency = AIMDController(limits)
+        self.in_flight = 0
+        self.waiters: List[Tuple[int, int]] = []
+        self.cond = threading.Condition()
+        self.stats = ModelStats()
+
+
+class RateLimiter:
+    """Process-wide limiter for model calls, one queue per model id
+
+    A call is admitted when it is at the head of the priority queue, the AIMD
+    concurrency limit has a free slot, and the request and token buckets can
+    cover it. Pass `db_file` (or set `RATE_LIMIT_DB`) to share the buckets with
+    other processes; the concurrency limit always adapts per process.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None, db_file: Optional[str] = None):
+        self.limits = {**DEFAULT_LIMITS, **_limits_from_env(), **(limits or {})}
+        db_file = db_file or os.getenv("RATE_LIMIT_DB")
+        self.buckets = SqliteBuckets(db_file) if db_file else LocalBuckets()
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def configure(self, model_id: str, **limits):
+        """Set limits for a model id, e.g. `configure("gpt-4o", rpm=5000, tpm=800000)`"""
+        current = self.limits.get(model_id, FALLBACK_LIMITS)
+        self.limits[model_id] = ModelLimits(**{**current.__dict__, **limits})
+        with self._lock:
+            state = self._models.get(model_id)
+        if state is not None:
+            # Updated in place: permits still out and queued callers belong to this state
+            with state.cond:
+                state.limits = self.limits[model_id]
+                state.concurrency = AIMDController(state.limits)
+                state.cond.notify_all()
+
+    def _state(self, model_id: str) -> _ModelState:
+        with self._lock:
+            if model_id not in self._models:
+                self._models[model_id] = _ModelState(self.limits.get(model_id, FALLBACK_LIMITS))
+            return self._models[model_id]
+
+    def acquire(self, model_id: str, tokens: float, priority: Optional[int] = None) -> Permit:
+        """Block until the call may start"""
+        state = self._state(model_id)
+        priority = current_priority() if priority is None else priority
+        # A request larger than the whole bucket would never fit; let it through with the bucket in debt
+        tokens = min(tokens, state.limits.tpm)
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+
+        with state.cond:
+            heapq.heappush(state.waiters, entry)
+            try:
+                while True:
+                    timeout = 0.5
+                    if state.waiters[0] == entry and state.in_flight < state.concurrency.slots:
+                        wait = self.buckets.take(model_id, state.limits, tokens)
+                        if wait <= 0:
+                            heapq.heappop(state.waiters)
+                            state.in_flight += 1
+                            waited = time.monotonic() - started
+                            state.stats.wait_seconds += waited
+                            state.cond.notify_all()
+                            return Permit(model_id, tokens, priority, waited=waited)
+                        timeout = min(wait, 5.0)
+                    state.cond.wait(timeout)
+            except BaseException:
+                if entry in state.waiters:
+                    state.waiters.remove(entry)
+                    heapq.heapify(state.waiters)
+                    state.cond.notify_all()
+                raise
+
+    async def acquire_async(self, model_id: str, tokens: float, priority: Optional[int] = None) -> Permit:
+        """`acquire` without blocking the event loop"""
+        priority = current_priority() if priority is None else priority
+        return await asyncio.to_thread(self.acquire, model_id, tokens, priority)
+
+    def release(self, permit: Permit, used_tokens: Optional[int] = None, throttled: bool = False,
+                retry_after: Optional[float] = None, error: bool = False, cancelled: bool = False):
+        """Return a permit, reporting real usage and whether the provider throttled the call
+
+        A `cancelled` call (e.g. the losing half of a hedged call) only frees its slot.
+        """
+        state = self._state(permit.model_id)
+        if used_tokens is not None:
+            self.buckets.adjust(permit.model_id, state.limits, used_tokens - permit.tokens)
+        if throttled and retry_after:
+            # The provider said when its window resets: hold every queued call for this model until then
+            self.buckets.pause(permit.model_id, retry_after)
+        with state.cond:
+            state.in_flight -= 1
+            state.stats.requests += 1
+            if throttled:
+                state.stats.throttled += 1
+                if state.concurrency.on_throttle(permit.granted_at):
+                    logger.warning(f"{permit.model_id} throttled; concurrency limit now {state.concurrency.limit:.1f}")
+            elif error:
+                state.stats.errors += 1
+            elif not cancelled:
+                state.stats.tokens += used_tokens or 0
+                state.concurrency.on_success()
+            state.cond.notify_all()
+
+    @contextmanager
+    def limit(self, model_id: str, tokens: float, priority: Optional[int] = None) -> Iterator[Permit]:
+        """Hold a permit for the duration of a block; exceptions count as errors"""
+        permit = self.acquire(model_id, tokens, priority)
+        try:
+            yield permit
+        except BaseException:
+            self.release(permit, error=True)
+            raise
+        else:
+            self.release(permit)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        with self._lock:
+            states = dict(self._models)
+        for model_id, state in states.items():
+            elapsed = max(time.monotonic() - state.stats.started_at, 1e-9)
+            report[model_id] = {
+                "requests": state.stats.requests,
+                "throttled": state.stats.throttled,
+                "errors": state.stats.errors,
+                "tokens": state.stats.tokens,
+                "requests_per_min": round(state.stats.requests * 60 / elapsed, 1),
+                "tokens_per_min": round(state.stats.tokens * 60 / elapsed, 1),
+                "mean_wait_s": round(state.stats.wait_seconds / max(state.stats.requests, 1), 3),
+                "concurrency_limit": round(state.concurrency.limit, 2),
+                "in_flight": state.in_flight,
+                "queued": len(state.waiters),
+            }
+        return report
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """The limiter shared by every managed model in this process"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,278 @@
+"""
+Request Cache - Shared Platform Infrastructure
+Caches whole analyses under canonical request keys so equivalent requests
+(reordered symbols, different casing, near-identical topics) reuse a prior
+result instead of running the team again.
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is", "of", "on", "or",
+    "the", "to", "with", "within", "using", "based", "towards", "via",
+}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def canonical_symbols(symbols: Iterable[str]) -> List[str]:
+    """Upper-cased, de-duplicated and sorted, so any ordering of a basket maps to one key"""
+    return sorted({s.strip().upper() for s in symbols if s and s.strip()})
+
+
+def canonical_text(value: str) -> str:
+    """Lower-cased words without punctuation or repeated whitespace"""
+    return " ".join(TOKEN_PATTERN.findall((value or "").lower()))
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if len(word) > 4 and word.endswith("s") else word
+
+
+def content_terms(value: str) -> frozenset:
+    """Content words of a text: stopwords dropped, plurals folded, hyphenated words split
+
+    Two phrasings of the same topic have the same terms; a topic with one
+    word swapped ("code review" vs "code generation", "with" vs "without")
+    does not, however close their embeddings are.
+    """
+    return frozenset(_singular(w) for w in TOKEN_PATTERN.findall((value or "").lower()) if w not in STOPWORDS)
+
+
+def request_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Stable key for a request: parameters are serialized with sorted keys"""
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{namespace}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+class HashingEmbedder:
+    """Local text embedding from hashed word, bigram and character n-gram features
+
+    Needs no model download or API call, which is enough to recognise the same
+    topic phrased slightly differently ("multi-agent systems in AI research" vs
+    "multi agent systems for AI research").
+    """
+
+    def __init__(self, dim: int = 1024, char_ngram: int = 4):
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        words = [_singular(w) for w in TOKEN_PATTERN.findall((text or "").lower()) if w not in STOPWORDS]
+        features = [(f"w:{w}", 1.0) for w in words]
+        features += [(f"b:{a}_{b}", 1.0) for a, b in zip(words, words[1:])]
+        n = self.char_ngram
+        for w in words:
+            padded = f"#{w}#"
+            features += [(f"c:{padded[i:i + n]}", 0.5) for i in range(max(len(padded) - n + 1, 1))]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            # The sign bit keeps colliding features from always adding up
+            vector[h % self.dim] += weight if (h >> 31) & 1 else -weight
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+@dataclass
+class CachedResponse:
+    """A cached analysis, shaped like a run response for callers that read `.content`"""
+    content: str
+    key: str
+    params: Dict[str, Any]
+    created_at: float
+    expires_at: float
+    similarity: float = 1.0
+    note: Optional[str] = None
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+
+class RequestCache:
+    """SQLite-backed cache of finished analyses with per-entry TTLs
+
+    Entries live in `table_name` of an existing platform database. Each one
+    records its canonical parameters, an optional `group` (e.g. the symbol set)
+    for finding related entries, and an optional embedding for similarity lookup.
+    """
+
+    def __init__(self, db_file: str = "request_cache.db", table_name: str = "request_cache",
+                 embedder: Optional[HashingEmbedder] = None):
+        self.db_file = db_file
+        self.table_name = table_name
+        self.embedder = embedder or HashingEmbedder()
+        with self._connect() as conn:
+            # WAL lets dashboard readers hit the cache while an analysis is being written
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, group_key TEXT, params TEXT, content TEXT, "
+                "embedding BLOB, created_at REAL, expires_at REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table_name}_group ON {table_name} (namespace, group_key)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _row_to_response(self, row, similarity: float = 1.0) -> CachedResponse:
+        key, params, content, created_at, expires_at = row
+        return CachedResponse(content=content, key=key, params=json.loads(params), created_at=created_at,
+                              expires_at=expires_at, similarity=similarity)
+
+    def record_hit(self, key: str):
+        with self._connect() as conn:
+            conn.execute(f"UPDATE {self.table_name} SET hits = hits + 1 WHERE key = ?", (key,))
+
+    def get(self, namespace: str, params: Dict[str, Any]) -> Optional[CachedResponse]:
+        """Exact lookup by canonical parameters"""
+        key = request_key(namespace, params)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT key, params, content, created_at, expires_at FROM {self.table_name} "
+                "WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        self.record_hit(key)
+        return self._row_to_response(row)
+
+    def related(self, namespace: str, group: str) -> List[CachedResponse]:
+        """Live entries sharing a group, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT key, params, content, created_at, expires_at FROM {self.table_name} "
+                "WHERE namespace = ? AND group_key = ? AND expires_at > ? ORDER BY created_at DESC",
+                (namespace, group, time.time()),
+            ).fetchall()
+        return [self._row_to_response(row) for row in rows]
+
+    def find_similar(self, namespace: str, text: str, threshold: float = 0.8, group: Optional[str] = None,
+                     accept: Optional[Callable[[CachedResponse], bool]] = None) -> Optional[CachedResponse]:
+        """Best live entry whose embedded text is at least `threshold` cosine-similar
+
+        With `accept`, candidates are tried from most to least similar and the
+        first one it accepts is returned; the embedding then only ranks them.
+        """
+        query = self.embedder.embed(text)
+        sql = (f"SELECT key, params, content, created_at, expires_at, embedding FROM {self.table_name} "
+               "WHERE namespace = ? AND expires_at > ? AND embedding IS NOT NULL")
+        args: list = [namespace, time.time()]
+        if group is not None:
+            sql += " AND group_key = ?"
+            args.append(group)
+        with self._connect() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        if not rows:
+            return None
+
+        matrix = np.stack([np.frombuffer(row[5], dtype=np.float32) for row in rows])
+        scores = matrix @ query
+        for best in np.argsort(-scores):
+            if scores[best] < threshold:
+                return None
+            candidate = self._row_to_response(rows[best][:5], similarity=float(scores[best]))
+            if accept is None or accept(candidate):
+                self.record_hit(rows[best][0])
+                return candidate
+        return None
+
+    def put(self, namespace: str, params: Dict[str, Any], content: str, ttl: float,
+            group: Optional[str] = None, text: Optional[str] = None) -> str:
+        """Store an analysis for `ttl` seconds; `text` is embedded for similarity lookup"""
+        key = request_key(namespace, params)
+        embedding = self.embedder.embed(text).tobytes() if text else None
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table_name} "
+                "(key, namespace, group_key, params, content, embedding, created_at, expires_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, namespace, group, json.dumps(params, sort_keys=True, default=str), content, embedding,
+                 now, now + ttl),
+            )
+        return key
+
+    def purge_expired(self) -> int:
+        with self._connect() as conn:
+            return conn.execute(f"DELETE FROM {self.table_name} WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            live, hits = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM {self.table_name} WHERE expires_at > ?",
+                (time.time(),),
+            ).fetchone()
+        return {"live_entries": live, "hits": hits}
+
+
+# Dollar figures with optional thousands separators, decimals and K/M/B suffixes
+DOLLAR_PATTERN = re.compile(
+    r"\$\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?(\s?(?:K|M|B|k|thousand|million|billion)\b)?"
+)
+SUFFIX_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6, "b": 1e9, "billion": 1e9}
+# Figures right after these words are prices or market data, never position sizes
+PRICE_CONTEXT = re.compile(
+    r"\b(price|target|pt|per share|trading at|traded at|closed at|high|low|market cap|capitali[sz]ation|"
+    r"revenue|earnings|eps|net income|sales|valuation)\b[^$]{0,20}$",
+    re.IGNORECASE,
+)
+
+
+def _format_dollars(value: float, suffix: str, decimals: str) -> str:
+    if suffix:
+        multiplier = SUFFIX_MULTIPLIERS[suffix.strip().lower()]
+        return f"${value / multiplier:,.2f}".rstrip("0").rstrip(".") + suffix
+    return f"${value:,.2f}" if decimals else f"${value:,.0f}"
+
+
+def rescale_dollar_amounts(content: str, from_amount: float, to_amount: float,
+                           allocation_step: float = 0.5) -> Tuple[str, int]:
+    """Rescale position-size dollar figures in an analysis to a new investment amount
+
+    A figure is treated as a position size only if it is not preceded by price
+    or market-data wording, lies between 1% and 100% of the original amount, and
+    works out to a whole multiple of `allocation_step` percent of it. Share
+    prices, targets and market caps therefore stay untouched. Returns the new
+    text and the number of figures changed.
+    """
+    ratio = to_amount / from_amount
+    changed = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal changed
+        whole, decimals, suffix = match.group(1), match.group(2) or "", match.group(3) or ""
+        value = float(whole.replace(",", "") + decimals)
+        if suffix:
+            value *= SUFFIX_MULTIPLIERS[suffix.strip().lower()]
+        if PRICE_CONTEXT.search(content[max(match.start() - 40, 0):match.start()]):
+            return match.group(0)
+        percent = value / from_amount * 100
+        on_step = math.isclose(percent / allocation_step, round(percent / allocation_step), abs_tol=0.02)
+        if not (1.0 <= percent <= 100.0 + 1e-9 and on_step):
+            return match.group(0)
+        changed += 1
+        return _format_dollars(value * ratio, suffix, decimals)
+
+    return DOLLAR_PATTERN.sub(replace, content), changed
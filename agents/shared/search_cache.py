@@ -0,0 +1,356 @@
+"""
+Search Cache - Shared Platform Infrastructure
+One on-disk web search cache for every platform and process, with TTL, LRU
+eviction and single-flight coalescing. However many runs ask for "NVDA earnings"
+at once, only one request reaches the search provider.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from agno.tools import Toolkit
+from agno.utils.log import logger
+
+DEFAULT_CACHE_DB = os.getenv(
+    "SEARCH_CACHE_DB", os.path.join(tempfile.gettempdir(), "agno_cache", "search_cache.db")
+)
+
+
+def search_key(provider: str, method: str, query: str, max_results: int) -> str:
+    """Cache key for a search; queries differing only in case or spacing share a key"""
+    payload = json.dumps([provider, method, " ".join(query.lower().split()), max_results])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SearchCacheStats:
+    """Counters for one SearchCache instance"""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+    evictions: int = 0
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses + self.coalesced
+        hit_rate = (self.hits + self.coalesced) / lookups if lookups else 0.0
+        return (f"{lookups} lookups, {self.fetches} provider requests, {self.hits} hits, "
+                f"{self.coalesced} coalesced, {self.evictions} evicted ({hit_rate:.0%} served without a request)")
+
+
+class _Flight:
+    """A fetch in progress inside this process"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """SQLite-backed search result cache shared across processes
+
+    Entries expire after `ttl` seconds, and the least recently used are evicted
+    beyond `max_entries`. `get_or_fetch` coalesces concurrent identical
+    lookups. Threads in one process wait on the leader's in-memory flight, and
+    other processes see the leader's lease row and poll for its result. A lease
+    expires after `lease_seconds`, so a crashed leader cannot block a key.
+    """
+
+    def __init__(self, db_file: str = DEFAULT_CACHE_DB, ttl: float = 3600.0, max_entries: int = 5000,
+                 lease_seconds: float = 30.0, poll_interval: float = 0.05):
+        self.db_file = db_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.stats = SearchCacheStats()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_file)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, provider TEXT, method TEXT, "
+                "query TEXT, result TEXT, created_at REAL, expires_at REAL, last_access REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS search_cache_lru ON search_cache (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS search_inflight (key TEXT PRIMARY KEY, owner TEXT, "
+                         "lease_expires REAL)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a live cached result and mark it recently used"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM search_cache WHERE key = ? AND expires_at > ?",
+                               (key, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE search_cache SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def put(self, key: str, result: str, provider: str = "", method: str = "", query: str = ""):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache "
+                "(key, provider, method, query, result, created_at, expires_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, provider, method, query, result, now, now + self.ttl, now),
+            )
+            evicted = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,)).rowcount
+            evicted += conn.execute(
+                "DELETE FROM search_cache WHERE key IN (SELECT key FROM search_cache ORDER BY last_access DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        self.stats.evictions += evicted
+
+    def _acquire_lease(self, key: str, owner: str) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM search_inflight WHERE key = ? AND lease_expires <= ?", (key, now))
+            acquired = conn.execute(
+                "INSERT OR IGNORE INTO search_inflight (key, owner, lease_expires) VALUES (?, ?, ?)",
+                (key, owner, now + self.lease_seconds),
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        return acquired
+
+    def _release_lease(self, key: str, owner: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_inflight WHERE key = ? AND owner = ?", (key, owner))
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], str], provider: str = "", method: str = "",
+                     query: str = "") -> str:
+        """Return the cached result for `key`, calling `fetch` at most once across concurrent callers"""
+        cached = self.get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            # Another thread of this process is already fetching this key
+            self.stats.coalesced += 1
+            flight.done.wait(self.lease_seconds)
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is not None:
+                return flight.result
+            return fetch()
+
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        try:
+            while not self._acquire_lease(key, owner):
+                # Another process holds the lease: wait for its result or for the lease to lapse
+                time.sleep(self.poll_interval)
+                cached = self.get(key)
+                if cached is not None:
+                    self.stats.coalesced += 1
+                    flight.result = cached
+                    return cached
+            try:
+                # Another process may have stored the result between our lookup and the lease
+                cached = self.get(key)
+                if cached is not None:
+                    self.stats.coalesced += 1
+                    flight.result = cached
+                    return cached
+                self.stats.misses += 1
+                self.stats.fetches += 1
+                result = fetch()
+                self.put(key, result, provider=provider, method=method, query=query)
+                flight.result = result
+                return result
+            finally:
+                self._release_lease(key, owner)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM search_cache WHERE expires_at > ?",
+                                (time.time(),)).fetchone()[0]
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_cache")
+            conn.execute("DELETE FROM search_inflight")
+
+
+_default_cache: Optional[SearchCache] = None
+
+
+def get_default_cache() -> SearchCache:
+    """Process-wide cache on the shared database (`SEARCH_CACHE_DB` overrides the location)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SearchCache()
+    return _default_cache
+
+
+class FakeSearchProvider:
+    """Local stand-in for DuckDuckGoTools with deterministic results and a call counter"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _results(self, kind: str, query: str, max_results: int) -> str:
+        with self._lock:
+            self.calls.append({"method": kind, "query": query, "max_results": max_results})
+        time.sleep(self.latency)
+        return json.dumps([
+            {"title": f"{query} - {kind} result {i + 1}", "href": f"https://example.com/{kind}/{i + 1}",
+             "body": f"Fake {kind} result {i + 1} for '{query}'"}
+            for i in range(max_results)
+        ], indent=2)
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        return self._results("search", query, max_results)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        return self._results("news", query, max_results)
+
+
+class CachedSearchTools(Toolkit):
+    """DuckDuckGo search and news through the shared cache
+
+    Exposes the same `duckduckgo_search` / `duckduckgo_news` tools as
+    `DuckDuckGoTools`, so agent behaviour and prompts are unchanged. Pass a
+    `provider` (e.g. `FakeSearchProvider`) to run without network access.
+    """
+
+    def __init__(self, provider: Optional[Any] = None, cache: Optional[SearchCache] = None,
+                 search: bool = True, news: bool = True, **kwargs):
+        if provider is None:
+            from agno.tools.duckduckgo import DuckDuckGoTools
+
+            provider = DuckDuckGoTools()
+        self.provider = provider
+        self.provider_name = type(provider).__name__
+        self.cache = cache or get_default_cache()
+
+        tools: List[Any] = []
+        if search:
+            tools.append(self.duckduckgo_search)
+        if news:
+            tools.append(self.duckduckgo_news)
+        super().__init__(name="duckduckgo", tools=tools, **kwargs)
+
+    def _cached(self, method: str, query: str, max_results: int) -> str:
+        key = search_key(self.provider_name, method, query, max_results)
+        fetch = getattr(self.provider, method)
+        result = self.cache.get_or_fetch(key, lambda: fetch(query, max_results), provider=self.provider_name,
+                                         method=method, query=query)
+        logger.debug(f"Search cache: {self.cache.stats.summary()}")
+        return result
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Use this function to search DuckDuckGo for a query.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The result from DuckDuckGo.
+        """
+        return self._cached("duckduckgo_search", query, max_results)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Use this function to get the latest news from DuckDuckGo.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The latest news from DuckDuckGo.
+        """
+        return self._cached("duckduckgo_news", query, max_results)
+
+
+def _process_worker(db_file: str, query: str, latency: float, start_at: float, queue):
+    while time.time() < start_at:
+        time.sleep(0.001)
+    provider = FakeSearchProvider(latency=latency)
+    tools = CachedSearchTools(provider=provider, cache=SearchCache(db_file=db_file))
+    tools.duckduckgo_search(query)
+    queue.put(len(provider.calls))
+
+
+def demo(processes: int = 4, threads: int = 8, latency: float = 0.5):
+    """Hit one query from many threads and processes against a fresh cache; prints provider requests"""
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor
+
+    db_file = os.path.join(tempfile.mkdtemp(), "search_cache.db")
+    query = "NVDA earnings"
+
+    provider = FakeSearchProvider(latency=latency)
+    tools = CachedSearchTools(provider=provider, cache=SearchCache(db_file=db_file))
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: tools.duckduckgo_search(query), range(threads)))
+    print(f"🧵 {threads} threads, one process:  {len(provider.calls)} provider request(s)")
+    print(f"   {tools.cache.stats.summary()}")
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    start_at = time.time() + 2.0
+    workers = [ctx.Process(target=_process_worker, args=(db_file, "AMD earnings", latency, start_at, queue))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    calls = sum(queue.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    print(f"🖥️ {processes} processes:            {calls} provider request(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared search cache utilities")
+    parser.add_argument("command", choices=["demo", "stats", "clear"])
+    parser.add_argument("--db", default=DEFAULT_CACHE_DB)
+    args = parser.parse_args()
+
+    print("🔎 Shared Search Cache")
+    print("=" * 60)
+    if args.command == "demo":
+        demo()
+    elif args.command == "stats":
+        print(f"{SearchCache(db_file=args.db).size()} live entries in {args.db}")
+    else:
+        SearchCache(db_file=args.db).clear()
+        print(f"Cleared {args.db}")
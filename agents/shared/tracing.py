@@ -0,0 +1,572 @@
+"""
+Tracing - Shared Platform Infrastructure
+Span-based tracing of a coordinated run: team -> delegated member -> model call
+and tool call, with parent/child links, durations and token counts. Traces are
+appended to a local JSONL file and export to Chrome trace format or a flame graph.
+"""
+
+import argparse
+import contextvars
+import functools
+import html
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_FILE = os.getenv(
+    "AGENT_TRACE_FILE", os.path.join(tempfile.gettempdir(), "agno_traces", "traces.jsonl")
+)
+
+# Tool arguments and results are clipped to this many characters in span attributes
+MAX_ATTRIBUTE_CHARS = 200
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed unit of work; `kind` is team, member, model or tool"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    status: str = "ok"
+    thread: int = field(default_factory=threading.get_ident)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled"""
+
+    def set(self, **attributes):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects finished spans per trace and appends each trace to `trace_file` when its root span ends"""
+
+    def __init__(self, trace_file: str = DEFAULT_TRACE_FILE, enabled: bool = True):
+        self.trace_file = trace_file
+        self.enabled = enabled
+        self._pending: Dict[str, List[Span]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.last_trace: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, kind: str, activate: bool = True, **attributes) -> Iterator[Any]:
+        """Time the enclosed block as a child of the current span (or as a new trace)
+
+        With `activate=False` the span does not become the current one. Use
+        this inside generators, whose callers run in between the yields.
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        current = self.start_span(name, kind, **attributes)
+        token = _current_span.set(current) if activate else None
+        try:
+            yield current
+        except BaseException as e:
+            current.status = "error"
+            current.set(error=f"{type(e).__name__}: {e}"[:MAX_ATTRIBUTE_CHARS])
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self.end_span(current)
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span] = None, **attributes) -> Span:
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            kind=kind,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span):
+        span.end = time.time()
+        with self._lock:
+            self._pending[span.trace_id].append(span)
+            if span.parent_id is not None:
+                return
+            spans = self._pending.pop(span.trace_id)
+            self.last_trace = spans
+        self._write(spans)
+
+    def _write(self, spans: List[Span]):
+        os.makedirs(os.path.dirname(os.path.abspath(self.trace_file)), exist_ok=True)
+        lines = "".join(json.dumps(asdict(s), default=str) + "\n" for s in spans)
+        with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; set AGENT_TRACING=0 to turn tracing off"""
+    global _tracer
+    if _tracer is None:
+        enabled = os.getenv("AGENT_TRACING", "1").lower() not in ("0", "false", "no", "off")
+        _tracer = Tracer(enabled=enabled)
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def print_last_trace():
+    """Print the span tree of the most recently finished trace in this process"""
+    tracer = get_tracer()
+    if not tracer.enabled or not tracer.last_trace:
+        return
+    trace_id = tracer.last_trace[0].trace_id
+    print(f"\n🔍 Trace {trace_id} ({len(tracer.last_trace)} spans)")
+    print(render_tree(tracer.last_trace))
+    print(f"   Export: python -m shared.tracing flamegraph {trace_id}  |  chrome {trace_id}")
+
+
+def _clip(value: Any) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text if len(text) <= MAX_ATTRIBUTE_CHARS else text[:MAX_ATTRIBUTE_CHARS] + "…"
+
+
+def _fail(span: Span, error: BaseException):
+    span.status = "error"
+    span.set(error=f"{type(error).__name__}: {error}"[:MAX_ATTRIBUTE_CHARS])
+    get_tracer().end_span(span)
+
+
+# ============================================================================
+# Instrumentation
+# ============================================================================
+
+def _traced_iterator(span: Span, iterator):
+    # A streamed run stays open until the caller drains it; the span is made
+    # current around each step so work done while producing a chunk nests under it
+    tracer = get_tracer()
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield item
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        tracer.end_span(span)
+
+
+async def _traced_async_iterator(span: Span, iterator):
+    tracer = get_tracer()
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield item
+    except BaseException:
+        span.status = "error"
+        raise
+    finally:
+        tracer.end_span(span)
+
+
+def _finish_run_span(span: Span, response: Any):
+    metrics = getattr(response, "metrics", None) or {}
+    if isinstance(metrics, dict) and metrics.get("total_tokens"):
+        tokens = metrics["total_tokens"]
+        span.set(run_total_tokens=sum(tokens) if isinstance(tokens, list) else tokens)
+    run_id = getattr(response, "run_id", None)
+    if run_id:
+        span.set(run_id=run_id)
+
+
+def _wrap_run(component: Any, kind: str):
+    """Replace `component.run`/`arun` on the instance with versions that open a span"""
+    name = f"{kind}:{component.name or type(component).__name__}"
+    run, arun = component.run, component.arun
+
+    @functools.wraps(run)
+    def traced_run(*args, **kwargs):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return run(*args, **kwargs)
+        _use_tool_hook(component, trace_tool_hook)
+        span = tracer.start_span(name, kind)
+        token = _current_span.set(span)
+        try:
+            result = run(*args, **kwargs)
+        except BaseException as e:
+            _fail(span, e)
+            raise
+        finally:
+            _current_span.reset(token)
+        if inspect.isgenerator(result):
+            return _traced_iterator(span, result)
+        _finish_run_span(span, result)
+        tracer.end_span(span)
+        return result
+
+    @functools.wraps(arun)
+    async def traced_arun(*args, **kwargs):
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return await arun(*args, **kwargs)
+        _use_tool_hook(component, atrace_tool_hook)
+        span = tracer.start_span(name, kind)
+        token = _current_span.set(span)
+        try:
+            result = await arun(*args, **kwargs)
+        except BaseException as e:
+            _fail(span, e)
+            raise
+        finally:
+            _current_span.reset(token)
+        if hasattr(result, "__anext__"):
+            return _traced_async_iterator(span, result)
+        _finish_run_span(span, result)
+        tracer.end_span(span)
+        return result
+
+    component.run = traced_run
+    component.arun = traced_arun
+
+
+def _start_tool_span(function_name: str, arguments: Dict[str, Any]) -> Span:
+    return get_tracer().start_span(f"tool:{function_name}", "tool", arguments=_clip(arguments))
+
+
+def trace_tool_hook(function_name: str, function_call, arguments: Dict[str, Any]):
+    """agno tool hook recording a span around every tool call of a sync run
+
+    Tools that return generators, such as the team's `transfer_task_to_member`,
+    keep their span open until drained, so the delegated member run nests under it.
+    """
+    if not get_tracer().enabled:
+        return function_call(**arguments)
+    span = _start_tool_span(function_name, arguments)
+    token = _current_span.set(span)
+    try:
+        result = function_call(**arguments)
+    except BaseException as e:
+        _fail(span, e)
+        raise
+    finally:
+        _current_span.reset(token)
+    if inspect.isgenerator(result):
+        return _traced_iterator(span, result)
+    span.set(result_chars=len(str(result)))
+    get_tracer().end_span(span)
+    return result
+
+
+async def atrace_tool_hook(function_name: str, function_call, arguments: Dict[str, Any]):
+    """Async counterpart of `trace_tool_hook`; agno skips async hooks in sync runs and vice versa"""
+    if not get_tracer().enabled:
+        return await function_call(**arguments)
+    span = _start_tool_span(function_name, arguments)
+    token = _current_span.set(span)
+    try:
+        result = await function_call(**arguments)
+    except BaseException as e:
+        _fail(span, e)
+        raise
+    finally:
+        _current_span.reset(token)
+    if hasattr(result, "__anext__"):
+        return _traced_async_iterator(span, result)
+    span.set(result_chars=len(str(result)))
+    get_tracer().end_span(span)
+    return result
+
+
+def _use_tool_hook(component: Any, hook):
+    # One tool_hooks list serves both run paths, so the matching hook is swapped in
+    # before each run, including on functions the component has already built
+    hooks = [h for h in component.tool_hooks or [] if h not in (trace_tool_hook, atrace_tool_hook)] + [hook]
+    component.tool_hooks = hooks
+    for function in (getattr(component, "_functions_for_model", None) or {}).values():
+        function.tool_hooks = hooks
+
+
+def instrument(component: Any, kind: str = "team") -> Any:
+    """Trace a Team or Agent and, recursively, its members
+
+    The top-level run, each delegated member run and every tool call become
+    spans; model calls are traced by `ManagedOpenAIChat`. Returns `component`.
+    """
+    if getattr(component, "_traced", False):
+        return component
+    _wrap_run(component, kind)
+    _use_tool_hook(component, trace_tool_hook)
+    component._traced = True
+    for member in getattr(component, "members", None) or []:
+        instrument(member, "team" if hasattr(member, "members") else "member")
+    return component
+
+
+# ============================================================================
+# Loading and export
+# ============================================================================
+
+def load_spans(trace_file: str = DEFAULT_TRACE_FILE, trace_id: Optional[str] = None) -> List[Span]:
+    """Spans of one trace (a prefix of the id is enough), or of every trace if `trace_id` is None"""
+    spans = []
+    if not os.path.exists(trace_file):
+        return spans
+    with open(trace_file, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if trace_id is None or record["trace_id"].startswith(trace_id):
+                spans.append(Span(**record))
+    return spans
+
+
+def list_traces(trace_file: str = DEFAULT_TRACE_FILE) -> List[Dict[str, Any]]:
+    """One summary per trace, oldest first"""
+    traces: Dict[str, Dict[str, Any]] = {}
+    for span in load_spans(trace_file):
+        entry = traces.setdefault(span.trace_id, {"trace_id": span.trace_id, "spans": 0, "model_tokens": 0})
+        entry["spans"] += 1
+        entry["model_tokens"] += span.attributes.get("total_tokens", 0) or 0
+        if span.parent_id is None:
+            entry.update(root=span.name, start=span.start, duration=span.duration, status=span.status)
+    return sorted((t for t in traces.values() if "root" in t), key=lambda t: t["start"])
+
+
+def latest_trace_id(trace_file: str = DEFAULT_TRACE_FILE) -> Optional[str]:
+    traces = list_traces(trace_file)
+    return traces[-1]["trace_id"] if traces else None
+
+
+def _children(spans: List[Span]) -> Dict[Optional[str], List[Span]]:
+    children: Dict[Optional[str], List[Span]] = defaultdict(list)
+    ids = {s.span_id for s in spans}
+    for span in spans:
+        # Spans whose parent was not recorded are shown as roots rather than dropped
+        children[span.parent_id if span.parent_id in ids else None].append(span)
+    for group in children.values():
+        group.sort(key=lambda s: s.start)
+    return children
+
+
+def render_tree(spans: List[Span]) -> str:
+    """Indented span tree with durations, share of the root and model tokens per subtree"""
+    children = _children(spans)
+    lines = []
+
+    def subtree_tokens(span: Span) -> int:
+        own = span.attributes.get("total_tokens", 0) or 0
+        return own + sum(subtree_tokens(c) for c in children.get(span.span_id, []))
+
+    def walk(span: Span, depth: int, root_duration: float):
+        share = span.duration / root_duration if root_duration else 0.0
+        tokens = subtree_tokens(span)
+        details = f"{span.duration:8.2f}s {share:6.1%}"
+        if tokens:
+            details += f"  {tokens:,} tokens"
+        if span.attributes.get("throttled"):
+            details += f"  {span.attributes['throttled']} throttled"
+        if span.status != "ok":
+            details += f"  ❌ {span.attributes.get('error', span.status)}"
+        lines.append(f"{details}  {'  ' * depth}{span.name}")
+        for child in children.get(span.span_id, []):
+            walk(child, depth + 1, root_duration)
+
+    for root in children.get(None, []):
+        walk(root, 0, root.duration)
+    return "\n".join(lines)
+
+
+def self_times(spans: List[Span]) -> Dict[str, float]:
+    """Seconds spent in each span outside its children, keyed by folded stack ("a;b;c")"""
+    children = _children(spans)
+    stacks: Dict[str, float] = defaultdict(float)
+
+    def walk(span: Span, prefix: str):
+        stack = f"{prefix};{span.name}" if prefix else span.name
+        kids = children.get(span.span_id, [])
+        # Parallel children can add up to more than the parent's wall time
+        stacks[stack] += max(span.duration - sum(c.duration for c in kids), 0.0)
+        for child in kids:
+            walk(child, stack)
+
+    for root in children.get(None, []):
+        walk(root, "")
+    return dict(stacks)
+
+
+def folded_stacks(spans: List[Span]) -> str:
+    """Brendan Gregg's folded format in milliseconds, for flamegraph.pl or speedscope"""
+    return "\n".join(f"{stack} {round(seconds * 1000)}" for stack, seconds in self_times(spans).items()
+                     if seconds > 0) + "\n"
+
+
+def chrome_trace(spans: List[Span]) -> Dict[str, Any]:
+    """Chrome trace event format, for chrome://tracing or ui.perfetto.dev
+
+    Spans that overlap without being nested (members working in parallel) are
+    given separate rows, since complete events on one row must nest.
+    """
+    if not spans:
+        return {"traceEvents": []}
+    origin = min(s.start for s in spans)
+    by_id = {s.span_id: s for s in spans}
+    lanes: List[List[Span]] = []
+    lane_of: Dict[str, int] = {}
+
+    def is_ancestor(candidate: Span, span: Span) -> bool:
+        parent = by_id.get(span.parent_id)
+        while parent is not None:
+            if parent.span_id == candidate.span_id:
+                return True
+            parent = by_id.get(parent.parent_id)
+        return False
+
+    def fits(lane: List[Span], span: Span) -> bool:
+        end = span.start + span.duration
+        return all(other.start + other.duration <= span.start or other.start >= end or is_ancestor(other, span)
+                   for other in lane)
+
+    events = []
+    for span in sorted(spans, key=lambda s: (s.start, -s.duration)):
+        preferred = lane_of.get(span.parent_id, 0)
+        lane = next((i for i in [preferred] + list(range(len(lanes))) if i < len(lanes) and fits(lanes[i], span)),
+                    None)
+        if lane is None:
+            lanes.append([])
+            lane = len(lanes) - 1
+        lanes[lane].append(span)
+        lane_of[span.span_id] = lane
+        events.append({
+            "name": span.name,
+            "cat": span.kind,
+            "ph": "X",
+            "ts": round((span.start - origin) * 1e6),
+            "dur": round(span.duration * 1e6),
+            "pid": 1,
+            "tid": lane + 1,
+            "args": {"status": span.status, **span.attributes},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+FLAME_COLORS = {"team": "#e8743b", "member": "#f2b134", "model": "#4c9be8", "tool": "#5cb85c"}
+
+
+def flamegraph_svg(spans: List[Span], title: str = "Agent run", width: int = 1200, row_height: int = 18) -> str:
+    """Self-contained SVG flame graph; frame width is total time spent in that stack"""
+    kinds = {s.name: s.kind for s in spans}
+    totals: Dict[tuple, float] = defaultdict(float)
+    for stack, seconds in self_times(spans).items():
+        frames = tuple(stack.split(";"))
+        for depth in range(1, len(frames) + 1):
+            totals[frames[:depth]] += seconds
+
+    children: Dict[tuple, List[tuple]] = defaultdict(list)
+    for frames in totals:
+        children[frames[:-1]].append(frames)
+    grand_total = sum(totals[frames] for frames in children[()]) or 1.0
+    max_depth = max((len(frames) for frames in totals), default=1)
+    height = (max_depth + 2) * row_height
+    scale = width / grand_total
+    rects = []
+
+    def place(frames: tuple, x: float):
+        # Children start where their parent starts and are laid out left to right
+        w = totals[frames] * scale
+        if w >= 0.5:
+            y = height - (len(frames) + 1) * row_height
+            label = f"{frames[-1]} ({totals[frames]:.2f}s, {totals[frames] / grand_total:.1%})"
+            color = FLAME_COLORS.get(kinds.get(frames[-1], ""), "#bbbbbb")
+            text = html.escape(frames[-1][: int(w / 7)])
+            rects.append(
+                f'<g><title>{html.escape(label)}</title>'
+                f'<rect x="{x * scale:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" fill="{color}" rx="2"/>'
+                f'<text x="{x * scale + 3:.1f}" y="{y + row_height - 5}" font-size="11">{text}</text></g>'
+            )
+        for child in sorted(children[frames]):
+            place(child, x)
+            x += totals[child]
+
+    x = 0.0
+    for root in sorted(children[()]):
+        place(root, x)
+        x += totals[root]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="monospace">'
+        f'<text x="4" y="14" font-size="13">{html.escape(title)} - {grand_total:.2f}s</text>'
+        + "".join(rects) + "</svg>"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and export agent run traces")
+    parser.add_argument("command", choices=["list", "show", "chrome", "flamegraph", "folded"])
+    parser.add_argument("trace_id", nargs="?", help="trace id or prefix (default: latest)")
+    parser.add_argument("--file", default=DEFAULT_TRACE_FILE)
+    parser.add_argument("-o", "--output", help="output path for chrome/flamegraph/folded")
+    args = parser.parse_args()
+
+    print("🔍 Agent Run Traces")
+    print("=" * 60)
+    if args.command == "list":
+        for trace in list_traces(args.file):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trace["start"]))
+            print(f"{trace['trace_id']}  {started}  {trace['duration']:8.2f}s  {trace['spans']:4d} spans  "
+                  f"{trace['model_tokens']:>8,} tokens  {trace['root']}")
+    else:
+        trace_id = args.trace_id or latest_trace_id(args.file)
+        spans = load_spans(args.file, trace_id) if trace_id else []
+        if not spans:
+            raise SystemExit(f"No trace found in {args.file}")
+        if args.command == "show":
+            print(render_tree(spans))
+        else:
+            if args.command == "chrome":
+                output, content = args.output or f"trace-{trace_id}.json", json.dumps(chrome_trace(spans))
+            elif args.command == "folded":
+                output, content = args.output or f"trace-{trace_id}.folded", folded_stacks(spans)
+            else:
+                root = next(s for s in spans if s.parent_id is None)
+                output, content = args.output or f"trace-{trace_id}.svg", flamegraph_svg(spans, title=root.name)
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(content)
+            print(f"Wrote {output}")